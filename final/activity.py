@@ -0,0 +1,162 @@
+"""Collect signal activity statistics during simulation.
+
+Used in the Logic Simulator project to count toggles, edges and time spent
+HIGH or LOW on every output in the network, without storing signal traces.
+
+Classes
+-------
+Activity - counts signal activity on every output.
+"""
+
+
+class Activity:
+
+    """Count signal activity on every output.
+
+    This class keeps running counters for every output in the network. The
+    counters are updated once per simulation cycle and are useful for power
+    estimation and for finding logic that never changes.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    update_slots(self): Resolves the outputs of all devices in the network.
+
+    record_activity(self): Updates the counters of all outputs for one
+                           simulation cycle.
+
+    extend_activity(self, cycles): Updates the counters for the specified
+                                   number of unchanged cycles.
+
+    reset_activity(self): Clears all counters.
+
+    get_activity(self, device_id, output_id): Returns the counters of the
+                                              specified output.
+
+    get_inactive_signals(self): Returns the names of outputs that have never
+                                toggled.
+
+    display_activity(self): Displays the counters in the text console.
+    """
+
+    def __init__(self, names, devices, network):
+        """Initialise the activity dictionary."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+
+        # activity_dictionary stores
+        # {(device_id, output_id): [toggles, rises, falls, high_cycles]}
+        self.activity_dictionary = {}
+
+        # activity_slots stores one [outputs, output_id, previous, counters]
+        # entry per output, so that a cycle can be recorded without device
+        # look-ups. previous is True if the output was HIGH on the last cycle.
+        self.activity_slots = []
+        self.device_count = 0
+
+        self.cycles = 0  # number of cycles recorded
+
+    def update_slots(self):
+        """Resolve the outputs of all devices in the network.
+
+        Counters of outputs that were already being counted are kept. The
+        outputs of buses are not counted.
+        """
+        self.activity_slots = []
+        for device in self.devices.devices_list:
+            if device.width is not None:
+                continue
+            for output_id in device.outputs:
+                counters = self.activity_dictionary.setdefault(
+                    (device.device_id, output_id), [0, 0, 0, 0])
+                self.activity_slots.append([device.outputs, output_id, None,
+                                            counters])
+        self.device_count = len(self.devices.devices_list)
+
+    def record_activity(self):
+        """Update the counters of all outputs for one simulation cycle."""
+        if self.device_count != len(self.devices.devices_list):
+            self.update_slots()
+        high_signals = (self.devices.HIGH, self.devices.RISING)
+        for slot in self.activity_slots:
+            high = slot[0][slot[1]] in high_signals
+            counters = slot[3]
+            if high:
+                counters[3] += 1
+            previous = slot[2]
+            if previous is not None and previous != high:
+                counters[0] += 1
+                if high:
+                    counters[1] += 1
+                else:
+                    counters[2] += 1
+            slot[2] = high
+        self.cycles += 1
+
+    def extend_activity(self, cycles):
+        """Update the counters for a run of cycles in which nothing changes.
+
+        This is used when Network.warp skips cycles. It must follow a call
+        to record_activity.
+        """
+        for slot in self.activity_slots:
+            if slot[2]:
+                slot[3][3] += cycles
+        self.cycles += cycles
+
+    def reset_activity(self):
+        """Clear all counters."""
+        self.activity_dictionary = {}
+        self.cycles = 0
+        self.update_slots()
+
+    def get_activity(self, device_id, output_id):
+        """Return the counters of the specified output.
+
+        The counters are returned as a dictionary with the keys "toggles",
+        "rises", "falls", "high" and "low", where "high" and "low" are the
+        number of cycles spent at each level. Return None if the output has
+        not been counted.
+        """
+        if (device_id, output_id) not in self.activity_dictionary:
+            return None
+        [toggles, rises, falls,
+         high_cycles] = self.activity_dictionary[(device_id, output_id)]
+        return {"toggles": toggles, "rises": rises, "falls": falls,
+                "high": high_cycles, "low": self.cycles - high_cycles}
+
+    def get_inactive_signals(self):
+        """Return the names of outputs that have never toggled."""
+        inactive_list = []
+        for (device_id, output_id), counters in \
+                self.activity_dictionary.items():
+            if counters[0] == 0:
+                inactive_list.append(self.devices.get_signal_name(device_id,
+                                                                  output_id))
+        return inactive_list
+
+    def display_activity(self):
+        """Display the counters of all outputs in the text console."""
+        lines = []
+        signal_names = [self.devices.get_signal_name(device_id, output_id)
+                        for device_id, output_id in self.activity_dictionary]
+        if signal_names:
+            margin = max(len(signal_name) for signal_name in signal_names)
+        for signal_name, (device_id, output_id) in \
+                zip(signal_names, self.activity_dictionary):
+            activity = self.get_activity(device_id, output_id)
+            lines.append("".join([
+                signal_name, (margin - len(signal_name)) * " ", ": ",
+                "toggles ", str(activity["toggles"]),
+                ", rises ", str(activity["rises"]),
+                ", falls ", str(activity["falls"]),
+                ", high ", str(activity["high"]),
+                ", low ", str(activity["low"])]))
+        lines.append("".join(["Cycles recorded: ", str(self.cycles)]))
+        print("\n".join(lines))
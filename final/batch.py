@@ -0,0 +1,346 @@
+"""Run many simulations of one circuit across several processes.
+
+Used in the Logic Simulator project to compile a parsed circuit into a
+picklable netlist, and to run the netlist in parallel without parsing the
+definition file again: for every combination of switch settings, or from
+many seeded cold start-ups.
+
+Classes
+-------
+Netlist - stores a picklable description of a parsed circuit.
+Batch - runs a netlist many times across a pool of processes.
+"""
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+
+
+class Netlist:
+
+    """Store a picklable description of a parsed circuit.
+
+    The netlist only holds name strings and numbers, so it can be sent to
+    other processes, where it is rebuilt into new Names, Devices, Network
+    and Monitors instances.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+    switch_ids: list of IDs of the switches to sweep, e.g. the switches set
+                in the SIGNALS section.
+
+    Public methods
+    --------------
+    build(self, seed=None): Returns new Names, Devices, Network and Monitors
+                            instances for the circuit.
+
+    get_monitor_names(self): Returns the names of the monitored signals.
+    """
+
+    def __init__(self, names, devices, network, monitors, switch_ids=None):
+        """Compile the circuit into lists of name strings and numbers."""
+        # device_list stores
+        # [device_name, device_kind_name, device_property, delay, width]
+        self.device_list = []
+        # connection_list stores
+        # [input_device_name, input_name, output_device_name, output_name]
+        self.connection_list = []
+        # monitor_list stores [device_name, output_name, width]
+        self.monitor_list = []
+        # kind_delays stores {device_kind_name: delay} for timed mode
+        self.kind_delays = {names.get_name_string(device_kind): delay
+                            for device_kind, delay
+                            in devices.kind_delays.items()}
+        self.default_delay = devices.default_delay
+        self.timed = network.timed
+
+        for device in devices.devices_list:
+            device_name = names.get_name_string(device.device_id)
+            if device.device_kind == devices.SWITCH:
+                device_property = device.switch_state
+            elif device.device_kind == devices.CLOCK:
+                device_property = device.clock_half_period
+            elif device.device_kind == devices.SIGGEN:
+                device_property = device.siggen_pulse
+            elif device.device_kind in devices.gate_types and \
+                    device.device_kind != devices.XOR:
+                device_property = len(device.inputs)
+            else:
+                device_property = None
+            self.device_list.append([
+                device_name, names.get_name_string(device.device_kind),
+                device_property, device.delay, device.width])
+
+            for input_id, connected_output in device.inputs.items():
+                if connected_output is None:
+                    continue
+                (output_device_id, output_id) = connected_output
+                self.connection_list.append([
+                    device_name, names.get_name_string(input_id),
+                    names.get_name_string(output_device_id),
+                    self.get_port_name(names, output_id)])
+
+        for device_id, output_id in monitors.monitors_dictionary:
+            self.monitor_list.append([
+                names.get_name_string(device_id),
+                self.get_port_name(names, output_id),
+                devices.get_port_width(device_id, output_id)])
+
+        if switch_ids is None:
+            switch_ids = devices.find_devices(devices.SWITCH)
+        self.switch_names = [names.get_name_string(switch_id)
+                             for switch_id in switch_ids]
+        # switch_widths stores the number of bits of each sweep switch
+        self.switch_widths = [devices.get_port_width(switch_id, None)
+                              for switch_id in switch_ids]
+
+    def get_port_name(self, names, port_id):
+        """Return the name string of a port, or None for a single output."""
+        if port_id is None:
+            return None
+        return names.get_name_string(port_id)
+
+    def get_port_id(self, names, port_name):
+        """Return the ID of a port name, or None for a single output."""
+        if port_name is None:
+            return None
+        [port_id] = names.lookup([port_name])
+        return port_id
+
+    def build(self, seed=None):
+        """Return new Names, Devices, Network and Monitors for the circuit.
+
+        seed is passed on to the new Devices instance for cold start-up.
+        """
+        names = Names()
+        devices = Devices(names, seed)
+        network = Network(names, devices)
+        monitors = Monitors(names, devices, network)
+
+        for kind_name, delay in self.kind_delays.items():
+            [device_kind] = names.lookup([kind_name])
+            devices.set_kind_delay(device_kind, delay)
+        devices.default_delay = self.default_delay
+        network.set_timed(self.timed)
+
+        for device_name, kind_name, device_property, delay, width in \
+                self.device_list:
+            [device_id, device_kind] = names.lookup([device_name, kind_name])
+            devices.make_device(device_id, device_kind, device_property,
+                                delay, width)
+
+        for [input_device_name, input_name, output_device_name,
+             output_name] in self.connection_list:
+            [input_device_id, input_id,
+             output_device_id] = names.lookup([input_device_name, input_name,
+                                               output_device_name])
+            network.make_connection(input_device_id, input_id,
+                                    output_device_id,
+                                    self.get_port_id(names, output_name))
+
+        for device_name, output_name, width in self.monitor_list:
+            [device_id] = names.lookup([device_name])
+            monitors.make_monitor(device_id,
+                                  self.get_port_id(names, output_name))
+
+        return [names, devices, network, monitors]
+
+    def get_monitor_names(self):
+        """Return the names of the monitored signals in monitor order."""
+        return [device_name if output_name is None
+                else ".".join([device_name, output_name])
+                for device_name, output_name, width in self.monitor_list]
+
+
+# The netlist used by run_simulation in worker processes. It is sent once to
+# each worker by the pool initializer, rather than with every run.
+worker_netlist = None
+
+
+def init_worker(netlist):
+    """Store the netlist in a worker process."""
+    global worker_netlist
+    worker_netlist = netlist
+
+
+def run_simulation(switch_settings, cycles, netlist=None, seed=None):
+    """Build the netlist, set its switches and run it from a cold start.
+
+    switch_settings maps switch names to signal levels, and seed seeds the
+    cold start-up. Return a list of monitor traces in monitor order, or
+    None if the network oscillates. Traces are bytes, or tuples for buses
+    whose values do not fit in a byte.
+    """
+    if netlist is None:
+        netlist = worker_netlist
+    [names, devices, network, monitors] = netlist.build(seed)
+    for switch_name, switch_state in switch_settings.items():
+        [switch_id] = names.lookup([switch_name])
+        devices.set_switch(switch_id, switch_state)
+
+    devices.cold_startup()
+    for _ in range(cycles):
+        if not network.execute_network():
+            return None
+        monitors.record_signals()
+    traces = []
+    for signal_list in monitors.monitors_dictionary.values():
+        try:
+            traces.append(bytes(signal_list))
+        except ValueError:  # bus values above 255
+            traces.append(tuple(signal_list))
+    return traces
+
+
+class Batch:
+
+    """Run a netlist many times across a pool of processes.
+
+    Parameters
+    ----------
+    netlist: instance of the batch.Netlist() class.
+    max_workers: maximum number of worker processes. Defaults to the number
+                 of processors.
+
+    Public methods
+    --------------
+    get_switch_settings(self): Returns every combination of settings of the
+                               netlist's sweep switches.
+
+    run_sweep(self, cycles): Runs the netlist for every combination of switch
+                             settings and returns the results in order.
+
+    display_sweep(self, results, monitors): Displays the results of a sweep
+                                            in the text console.
+
+    run_cold_starts(self, cycles, seeds): Runs the netlist from a seeded cold
+                                          start-up for every seed.
+
+    get_disagreements(self, results): Returns the number of distinct traces
+                      of each monitor that differs between cold start-ups.
+
+    display_cold_starts(self, results): Displays which monitors depend on the
+                                        cold start-up state.
+    """
+
+    def __init__(self, netlist, max_workers=None):
+        """Initialise the netlist and pool size."""
+        self.netlist = netlist
+        self.max_workers = max_workers
+
+    def get_switch_settings(self):
+        """Return every combination of settings of the sweep switches.
+
+        Each combination is a dictionary mapping switch names to 0 or 1, or
+        to every value up to the bus mask for a bus switch.
+        """
+        return [dict(zip(self.netlist.switch_names, levels))
+                for levels in itertools.product(*[
+                    range(1 << width)
+                    for width in self.netlist.switch_widths])]
+
+    def run_sweep(self, cycles):
+        """Run the netlist for every combination of switch settings.
+
+        Return a list of [switch_settings, traces] in the order given by
+        get_switch_settings, where traces is None if the network oscillates.
+        """
+        settings_list = self.get_switch_settings()
+        with ProcessPoolExecutor(max_workers=self.max_workers,
+                                 initializer=init_worker,
+                                 initargs=(self.netlist,)) as executor:
+            traces_list = executor.map(
+                run_simulation, settings_list,
+                itertools.repeat(cycles, len(settings_list)),
+                chunksize=max(1, len(settings_list) // 64))
+            return [[switch_settings, traces] for switch_settings, traces
+                    in zip(settings_list, traces_list)]
+
+    def display_sweep(self, results, monitors):
+        """Display the results of a sweep in the text console.
+
+        monitors is any monitors.Monitors() instance, used to draw traces.
+        """
+        monitor_names = self.netlist.get_monitor_names()
+        if monitor_names:
+            margin = max(len(monitor_name) for monitor_name in monitor_names)
+        lines = []
+        for switch_settings, traces in results:
+            lines.append(" ".join(["=".join([switch_name, str(level)])
+                                   for switch_name, level
+                                   in switch_settings.items()]) + "\n")
+            if traces is None:
+                lines.append("Error! Network oscillating.\n")
+                continue
+            for monitor_name, [_, _, width], trace in \
+                    zip(monitor_names, self.netlist.monitor_list, traces):
+                if width > 1:
+                    trace_string = monitors.get_bus_string(trace, width)
+                else:
+                    trace_string = monitors.get_trace_string(trace)
+                lines.append("".join([
+                    monitor_name, (margin - len(monitor_name)) * " ", ": ",
+                    trace_string, "\n"]))
+        print("".join(lines), end="")
+
+    def run_cold_starts(self, cycles, seeds, switch_settings=None):
+        """Run the netlist from a seeded cold start-up for every seed.
+
+        The switches keep their initial states unless switch_settings is
+        given. Return a list of [seed, traces] in the order of seeds, where
+        traces is None if the network oscillates.
+        """
+        seeds = list(seeds)
+        if switch_settings is None:
+            switch_settings = {}
+        with ProcessPoolExecutor(max_workers=self.max_workers,
+                                 initializer=init_worker,
+                                 initargs=(self.netlist,)) as executor:
+            traces_list = executor.map(
+                run_simulation, itertools.repeat(switch_settings, len(seeds)),
+                itertools.repeat(cycles, len(seeds)),
+                itertools.repeat(None, len(seeds)), seeds,
+                chunksize=max(1, len(seeds) // 64))
+            return [[seed, traces] for seed, traces
+                    in zip(seeds, traces_list)]
+
+    def get_disagreements(self, results):
+        """Return the monitors whose traces differ between cold start-ups.
+
+        Return a dictionary mapping each such monitor name to the number of
+        distinct traces seen. Runs that oscillated are ignored.
+        """
+        disagreements = {}
+        traces_list = [traces for _, traces in results if traces is not None]
+        for index, monitor_name in \
+                enumerate(self.netlist.get_monitor_names()):
+            distinct_traces = len(set(traces[index]
+                                      for traces in traces_list))
+            if distinct_traces > 1:
+                disagreements[monitor_name] = distinct_traces
+        return disagreements
+
+    def display_cold_starts(self, results):
+        """Display which monitors depend on the cold start-up state."""
+        lines = []
+        oscillating_seeds = [str(seed) for seed, traces in results
+                             if traces is None]
+        if oscillating_seeds:
+            lines.append(" ".join(["Error! Network oscillating for seeds:"]
+                                  + oscillating_seeds))
+        disagreements = self.get_disagreements(results)
+        if not disagreements:
+            lines.append(" ".join(["All monitors agree over",
+                                   str(len(results)), "cold start-ups."]))
+        for monitor_name, distinct_traces in disagreements.items():
+            lines.append("".join([monitor_name, ": ", str(distinct_traces),
+                                  " distinct traces over ", str(len(results)),
+                                  " cold start-ups"]))
+        print("\n".join(lines))
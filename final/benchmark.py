@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Benchmark the phases of the Logic Simulator.
+
+Used in the Logic Simulator project to time scanning, parsing, device
+construction, simulation, recording and display separately over a range of
+generated circuit sizes, to store the results as JSON and to flag
+regressions against a saved baseline. Only the simulator classes are
+imported, so the benchmarks run without wx or OpenGL.
+
+Usage
+-----
+Show help: benchmark.py -h
+Run the benchmarks: benchmark.py [--sizes N,N,...] [--cycles N]
+                    [--repeat N] [--output <results path>]
+                    [--baseline <baseline path>] [--threshold F]
+
+Classes
+-------
+Benchmark - times the phases of the simulator over a matrix of sizes.
+"""
+import contextlib
+import getopt
+import io
+import json
+import sys
+import time
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from batch import Netlist
+from netgen import Netgen
+
+
+class Benchmark:
+
+    """Time the phases of the simulator over a matrix of circuit sizes.
+
+    Each circuit is a random DAG from netgen.Netgen, with a tenth of its
+    gates made D-types. Every phase is timed repeat times and the fastest
+    time is kept, which is the least disturbed by other processes.
+
+    Parameters
+    ----------
+    sizes: list of circuit sizes in gates.
+    cycles: number of cycles simulated, recorded and displayed.
+    repeat: number of times each phase is timed.
+    seed: seed of the generated circuits.
+
+    Public methods
+    --------------
+    get_definition(self, size): Returns the definition file text of a
+                                circuit.
+
+    time_phase(self, phase): Returns the fastest time taken by phase().
+
+    run_size(self, size): Returns the times of every phase for one size.
+
+    run(self): Returns the results for every size.
+
+    compare(self, results, baseline, threshold): Returns the phases slower
+                                                 than the baseline.
+
+    display_results(self, results, regressions): Displays the results in the
+                                                 text console.
+    """
+
+    phases = ["scan", "parse", "build", "simulate", "record", "display"]
+
+    def __init__(self, sizes, cycles=100, repeat=3, seed=0):
+        """Initialise the benchmark settings."""
+        self.sizes = sizes
+        self.cycles = cycles
+        self.repeat = repeat
+        self.seed = seed
+
+    def get_definition(self, size):
+        """Return the definition file text of a circuit of size gates."""
+        netgen = Netgen(self.seed)
+        netgen.add_dag(size, max(1, size // 100), sequential=0.1)
+        return netgen.get_definition()
+
+    def time_phase(self, phase):
+        """Return the fastest time in seconds taken by phase().
+
+        Anything printed by the phase is discarded.
+        """
+        times = []
+        for _ in range(self.repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                phase()
+                times.append(time.perf_counter() - start)
+        return min(times)
+
+    def run_size(self, size):
+        """Return {phase: seconds} for a circuit of size gates.
+
+        simulate and record are given per cycle.
+        """
+        text = self.get_definition(size)
+
+        def scan():
+            scanner = Scanner("benchmark", io.StringIO(text), Names())
+            while scanner.get_symbol().type != scanner.EOF:
+                pass
+
+        def parse():
+            names = Names()
+            devices = Devices(names, self.seed)
+            network = Network(names, devices)
+            monitors = Monitors(names, devices, network)
+            scanner = Scanner("benchmark", io.StringIO(text), names)
+            parser = Parser(names, devices, network, monitors, scanner)
+            parser.parse_network()
+            return [names, devices, network, monitors]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            [names, devices, network, monitors] = parse()
+        netlist = Netlist(names, devices, network, monitors)
+        # Every output is monitored when recording and displaying
+        for device in devices.devices_list:
+            for output_id in device.outputs:
+                monitors.make_monitor(device.device_id, output_id)
+
+        def simulate():
+            for _ in range(self.cycles):
+                network.execute_network()
+
+        def record():
+            for _ in range(self.cycles):
+                monitors.record_signals()
+
+        def display():
+            monitors.display_signals()
+
+        times = {"scan": self.time_phase(scan),
+                 "parse": self.time_phase(parse),
+                 "build": self.time_phase(lambda: netlist.build(self.seed))}
+        times["simulate"] = self.time_phase(simulate) / self.cycles
+        monitors.reset_monitors()
+        times["record"] = self.time_phase(record) / self.cycles
+        times["display"] = self.time_phase(display)
+        return times
+
+    def run(self):
+        """Return the results for every size.
+
+        The results are a dictionary holding the settings and
+        {size: {phase: seconds}}, with sizes as strings so that the results
+        can be stored as JSON.
+        """
+        return {"cycles": self.cycles, "repeat": self.repeat,
+                "seed": self.seed,
+                "times": {str(size): self.run_size(size)
+                          for size in self.sizes}}
+
+    def compare(self, results, baseline, threshold):
+        """Return the phases that are slower than the baseline.
+
+        A phase is a regression if its time exceeds the baseline time by
+        more than the fraction threshold. Return a list of
+        [size, phase, baseline_time, time], for the sizes and phases in both.
+        """
+        regressions = []
+        for size, times in results["times"].items():
+            baseline_times = baseline["times"].get(size, {})
+            for phase in self.phases:
+                if phase in times and phase in baseline_times and \
+                        times[phase] > baseline_times[phase] * (1 + threshold):
+                    regressions.append([size, phase, baseline_times[phase],
+                                        times[phase]])
+        return regressions
+
+    def display_results(self, results, regressions=None):
+        """Display the results, and any regressions, in the text console."""
+        lines = [" ".join(["{:>8}".format("gates")] +
+                          ["{:>10}".format(phase) for phase in self.phases])]
+        for size, times in results["times"].items():
+            lines.append(" ".join(["{:>8}".format(size)] +
+                                  ["{:>10.3g}".format(times[phase])
+                                   for phase in self.phases]))
+        lines.append("simulate and record are per cycle, in seconds")
+        for size, phase, baseline_time, phase_time in regressions or []:
+            lines.append("".join([
+                "Regression: ", phase, " for ", size, " gates took ",
+                "{:.3g}".format(phase_time), " s, baseline ",
+                "{:.3g}".format(baseline_time), " s"]))
+        print("\n".join(lines))
+
+
+def main(arg_list):
+    """Parse the command line options, run the benchmarks and compare them.
+
+    Exit with status 1 if there are regressions against the baseline.
+    """
+    usage_message = ("Usage:\n"
+                     "Show help: benchmark.py -h\n"
+                     "Run the benchmarks: benchmark.py [--sizes N,N,...] "
+                     "[--cycles N] [--repeat N] [--output <results path>] "
+                     "[--baseline <baseline path>] [--threshold F]")
+    try:
+        options, arguments = getopt.getopt(arg_list, "h",
+                                           ["sizes=", "cycles=", "repeat=",
+                                            "output=", "baseline=",
+                                            "threshold="])
+        settings = dict(options)
+        sizes = [int(size) for size in
+                 settings.get("--sizes", "100,1000,10000").split(",")]
+        cycles = int(settings.get("--cycles", 100))
+        repeat = int(settings.get("--repeat", 3))
+        threshold = float(settings.get("--threshold", 0.2))
+    except (getopt.GetoptError, ValueError):
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+    if "-h" in settings:
+        print(usage_message)
+        sys.exit()
+
+    benchmark = Benchmark(sizes, cycles, repeat)
+    results = benchmark.run()
+    if "--output" in settings:
+        with open(settings["--output"], "w") as results_file:
+            json.dump(results, results_file, indent=2)
+
+    regressions = []
+    if "--baseline" in settings:
+        try:
+            with open(settings["--baseline"]) as baseline_file:
+                baseline = json.load(baseline_file)
+        except (IOError, ValueError):
+            print("Error! Could not read the baseline.")
+            sys.exit()
+        regressions = benchmark.compare(results, baseline, threshold)
+    benchmark.display_results(results, regressions)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,437 @@
+"""Import circuits from BLIF netlists.
+
+Used in the Logic Simulator project to build the network of a standard
+benchmark circuit, such as those of the ISCAS-85 and ISCAS-89 suites, from a
+netlist in the Berkeley Logic Interchange Format instead of a definition
+file.
+
+Classes
+-------
+Blif - builds devices and connections from a BLIF netlist.
+"""
+
+
+class Blif:
+
+    """Build devices and connections from a BLIF netlist.
+
+    The netlist is read one statement at a time, and each device is made as
+    soon as its statement has been read. Every .names logic function is made
+    from AND, OR, NAND, NOR and XOR gates, every .latch is made a DTYPE and
+    every primary input is made a SWITCH. The device driving a net takes the
+    name of the net. Any extra gates needed take the name of the net followed
+    by "#" and a number, which cannot clash with a BLIF name since "#" starts
+    a comment. The connections are made once the whole netlist has been read,
+    since a net may be used before the statement that drives it.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: optional instance of the monitors.Monitors() class. If given,
+              the primary outputs are monitored.
+
+    Public methods
+    --------------
+    import_file(self, path): Builds the network from the BLIF file at path.
+
+    import_lines(self, lines): Builds the network from the lines of a BLIF
+                               netlist.
+
+    get_statements(self, lines): Returns the statements of a BLIF netlist
+                                 as lists of words.
+
+    make_function(self, net_names, cover, line_number): Makes the gates of a
+                                                        .names function.
+
+    make_product(self, net_name, literals, inverted, line_number): Makes the
+                  gates of a product of literals.
+
+    make_latch(self, words, line_number): Makes the D-type of a .latch.
+
+    make_gate(self, net_name, device_kind, input_nets, line_number): Makes
+                                  a gate driving the specified net.
+
+    make_gate_tree(self, net_name, device_kind, input_nets, line_number):
+                  Makes a gate, or a tree of gates if there are more inputs
+                  than a gate allows.
+
+    make_switch(self, net_name, signal, line_number): Makes a switch driving
+                                                      the specified net.
+
+    get_extra_net(self, net_name): Returns a new net name for an extra gate.
+
+    get_inverted_net(self, net_name, line_number): Returns the name of a net
+                                  carrying the inverse of the specified net.
+
+    connect(self): Makes the connections and monitors of the netlist.
+    """
+
+    def __init__(self, names, devices, network, monitors=None):
+        """Initialise the nets and the lists of connections and errors."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        # errors stores the error messages, each starting with a line number
+        self.errors = []
+
+        # drivers stores {net_name: (device_id, output_id)}
+        self.drivers = {}
+        # connection_list stores
+        # [device_id, input_id, net_name, line_number]
+        self.connection_list = []
+        self.output_nets = []  # primary outputs, as [net_name, line_number]
+        self.signal_switch_ids = []  # switches of the primary inputs
+        self.extra_gates = 0  # number of gates named with "#"
+        self.models = 0
+
+        self.gate_input_ids = self.names.lookup([
+            "".join(["I", str(input_number)]) for input_number
+            in range(1, self.devices.max_gate_inputs + 1)])
+
+    def import_file(self, path):
+        """Build the network from the BLIF file at path.
+
+        Return True if successful, or False if the file cannot be read or
+        contains errors.
+        """
+        try:
+            with open(path) as blif_file:
+                return self.import_lines(blif_file)
+        except IOError:
+            self.errors.append("".join(["Cannot open file ", path]))
+            return False
+
+    def import_lines(self, lines):
+        """Build the network from the lines of a BLIF netlist.
+
+        lines is any iterable of strings, such as an open file, so that the
+        netlist is never held in memory as a whole. Return True if
+        successful.
+        """
+        net_names = None  # net names of the current .names function
+        cover = []
+        line_number = 0
+        for line_number, words in self.get_statements(lines):
+            if not words[0].startswith("."):  # a row of a cover
+                if net_names is None:
+                    self.errors.append("".join([
+                        "Line ", str(line_number),
+                        ": cover row outside a .names function"]))
+                else:
+                    cover.append(words)
+                continue
+
+            if net_names is not None:
+                self.make_function(net_names, cover, names_line_number)
+                net_names = None
+
+            keyword = words[0]
+            if keyword == ".names":
+                net_names = words[1:]
+                names_line_number = line_number
+                cover = []
+                if not net_names:
+                    self.errors.append("".join([
+                        "Line ", str(line_number), ": .names needs a net"]))
+                    net_names = None
+            elif keyword == ".inputs":
+                for net_name in words[1:]:
+                    switch_id = self.make_switch(net_name, self.devices.LOW,
+                                                 line_number)
+                    if switch_id is not None:
+                        self.signal_switch_ids.append(switch_id)
+            elif keyword == ".outputs":
+                self.output_nets.extend([net_name, line_number]
+                                        for net_name in words[1:])
+            elif keyword == ".latch":
+                self.make_latch(words[1:], line_number)
+            elif keyword == ".model":
+                self.models += 1
+                if self.models > 1:
+                    self.errors.append("".join([
+                        "Line ", str(line_number),
+                        ": only one .model is supported"]))
+            elif keyword == ".end":
+                break
+            else:  # .subckt, .gate and other extensions
+                self.errors.append("".join([
+                    "Line ", str(line_number), ": ", keyword,
+                    " is not supported"]))
+
+        if net_names is not None:
+            self.make_function(net_names, cover, names_line_number)
+        self.connect()
+        return not self.errors
+
+    def get_statements(self, lines):
+        """Return the statements of a BLIF netlist as lists of words.
+
+        Comments are removed and lines ending in a backslash are joined to
+        the next line. Each statement is yielded as [line_number, words],
+        where line_number is the line the statement ends on.
+        """
+        words = []
+        for line_number, line in enumerate(lines, 1):
+            line = line.split("#", 1)[0].rstrip()
+            continued = line.endswith("\\")
+            if continued:
+                line = line[:-1]
+            words.extend(line.split())
+            if words and not continued:
+                yield [line_number, words]
+                words = []
+        if words:
+            yield [line_number, words]
+
+    def make_function(self, net_names, cover, line_number):
+        """Make the gates of a .names function.
+
+        net_names lists the input nets followed by the output net, and cover
+        holds the rows of the single-output cover. The cover is made as a sum
+        of products, using single gates for the usual forms: AND, OR, NAND,
+        NOR, XOR, buffers and inverters.
+        """
+        input_nets = net_names[:-1]
+        output_net = net_names[-1]
+        cubes = []
+        values = set()
+        for row in cover:
+            if input_nets and len(row) == 2 and \
+                    len(row[0]) == len(input_nets) and \
+                    set(row[0]) <= set("01-") and row[1] in ["0", "1"]:
+                cubes.append(row[0])
+                values.add(row[1])
+            elif not input_nets and row in [["0"], ["1"]]:
+                cubes.append("")
+                values.add(row[0])
+            else:
+                self.errors.append("".join([
+                    "Line ", str(line_number), ": invalid cover row ",
+                    " ".join(row)]))
+                return
+        if len(values) > 1:
+            self.errors.append("".join([
+                "Line ", str(line_number),
+                ": cover mixes on-set and off-set rows"]))
+            return
+        # An off-set cover gives the inverse of the sum of its cubes
+        inverted = values == {"0"}
+
+        # The literals of each cube, as [net_name, positive]
+        cube_literals = [[[net_name, value == "1"] for net_name, value
+                          in zip(input_nets, cube) if value != "-"]
+                         for cube in cubes]
+        if not cubes or any(not literals for literals in cube_literals):
+            # The sum of cubes is 0 if there are none, or 1 if a cube is
+            # always true
+            self.make_switch(output_net, int(bool(cubes) != inverted),
+                             line_number)
+            return
+
+        if len(input_nets) == 2 and set(cubes) in [{"01", "10"},
+                                                   {"00", "11"}]:
+            xnor = (set(cubes) == {"00", "11"}) != inverted
+            if xnor:
+                xor_net = self.get_extra_net(output_net)
+                self.make_gate(xor_net, self.devices.XOR, input_nets,
+                               line_number)
+                self.make_gate(output_net, self.devices.NAND, [xor_net],
+                               line_number)
+            else:
+                self.make_gate(output_net, self.devices.XOR, input_nets,
+                               line_number)
+            return
+
+        if len(cube_literals) == 1:
+            self.make_product(output_net, cube_literals[0], inverted,
+                              line_number)
+            return
+
+        # Sum of products: every cube of several literals is an AND gate
+        terms = []
+        for literals in cube_literals:
+            if len(literals) == 1:
+                terms.append(literals[0])
+            else:
+                term_net = self.get_extra_net(output_net)
+                self.make_product(term_net, literals, False, line_number)
+                terms.append([term_net, True])
+        if not any(positive for net_name, positive in terms):
+            # a sum of inverted nets is a NAND of the nets
+            device_kind = self.devices.AND if inverted else self.devices.NAND
+            term_nets = [net_name for net_name, positive in terms]
+        else:
+            device_kind = self.devices.NOR if inverted else self.devices.OR
+            term_nets = [net_name if positive else
+                         self.get_inverted_net(net_name, line_number)
+                         for net_name, positive in terms]
+        self.make_gate_tree(output_net, device_kind, term_nets, line_number)
+
+    def make_product(self, net_name, literals, inverted, line_number):
+        """Make the gates of a product of literals, inverted if specified."""
+        if not any(positive for literal_net, positive in literals):
+            # a product of inverted nets is a NOR of the nets
+            device_kind = self.devices.OR if inverted else self.devices.NOR
+            input_nets = [literal_net for literal_net, positive in literals]
+        else:
+            device_kind = self.devices.NAND if inverted else self.devices.AND
+            input_nets = [literal_net if positive else
+                          self.get_inverted_net(literal_net, line_number)
+                          for literal_net, positive in literals]
+        self.make_gate_tree(net_name, device_kind, input_nets, line_number)
+
+    def make_latch(self, words, line_number):
+        """Make the D-type of a .latch.
+
+        words are the input and output nets, optionally followed by the
+        latch type and control net, and the initial value. Every latch type
+        is made an edge-triggered D-type: "fe" and "al" latches are clocked
+        by the inverse of their control net. Latches without a control net
+        share one clock.
+        """
+        if len(words) not in range(2, 6):
+            self.errors.append("".join([
+                "Line ", str(line_number), ": invalid .latch"]))
+            return
+        [input_net, output_net] = words[:2]
+        control_net = None
+        if len(words) >= 4:
+            [latch_type, control_net] = words[2:4]
+            if latch_type not in ["fe", "re", "ah", "al", "as"]:
+                self.errors.append("".join([
+                    "Line ", str(line_number), ": invalid latch type ",
+                    latch_type]))
+                return
+            if control_net == "NIL":
+                control_net = None
+            elif latch_type in ["fe", "al"]:
+                control_net = self.get_inverted_net(control_net, line_number)
+        if control_net is None:
+            control_net = "#clock"
+            if control_net not in self.drivers:
+                [clock_id] = self.names.lookup([control_net])
+                self.devices.make_device(clock_id, self.devices.CLOCK, 1)
+                self.drivers[control_net] = (clock_id, None)
+
+        if output_net in self.drivers:
+            self.errors.append("".join([
+                "Line ", str(line_number), ": net ", output_net,
+                " is driven more than once"]))
+            return
+        [device_id] = self.names.lookup([output_net])
+        self.devices.make_device(device_id, self.devices.D_TYPE)
+        self.drivers[output_net] = (device_id, self.devices.Q_ID)
+        if len(words) % 2 == 1 and words[-1] in ["0", "1"]:
+            self.devices.get_device(device_id).dtype_memory = int(words[-1])
+
+        if "#0" not in self.drivers:
+            self.make_switch("#0", self.devices.LOW, line_number)
+        self.connection_list.extend([
+            [device_id, self.devices.DATA_ID, input_net, line_number],
+            [device_id, self.devices.CLK_ID, control_net, line_number],
+            [device_id, self.devices.SET_ID, "#0", line_number],
+            [device_id, self.devices.CLEAR_ID, "#0", line_number]])
+
+    def make_gate(self, net_name, device_kind, input_nets, line_number):
+        """Make a gate driving the specified net.
+
+        There must be no more input nets than a gate allows. Return the
+        device ID, or None if the net is already driven.
+        """
+        if net_name in self.drivers:
+            self.errors.append("".join([
+                "Line ", str(line_number), ": net ", net_name,
+                " is driven more than once"]))
+            return None
+        [device_id] = self.names.lookup([net_name])
+        self.devices.make_gate(device_id, device_kind, len(input_nets))
+        self.drivers[net_name] = (device_id, None)
+        self.connection_list.extend(
+            [device_id, input_id, input_net, line_number]
+            for input_id, input_net in zip(self.gate_input_ids, input_nets))
+        return device_id
+
+    def make_gate_tree(self, net_name, device_kind, input_nets, line_number):
+        """Make a gate, or a tree of gates if there are too many inputs.
+
+        The inputs are first combined in groups by AND gates for AND and
+        NAND, or by OR gates for OR and NOR.
+        """
+        max_inputs = self.devices.max_gate_inputs
+        if len(input_nets) > max_inputs:
+            if device_kind in [self.devices.AND, self.devices.NAND]:
+                group_kind = self.devices.AND
+            else:
+                group_kind = self.devices.OR
+            group_nets = []
+            for start in range(0, len(input_nets), max_inputs):
+                group_net = self.get_extra_net(net_name)
+                self.make_gate_tree(group_net, group_kind,
+                                    input_nets[start:start + max_inputs],
+                                    line_number)
+                group_nets.append(group_net)
+            input_nets = group_nets
+            if len(input_nets) > max_inputs:
+                self.make_gate_tree(net_name, device_kind, input_nets,
+                                    line_number)
+                return
+        self.make_gate(net_name, device_kind, input_nets, line_number)
+
+    def make_switch(self, net_name, signal, line_number):
+        """Make a switch driving the specified net.
+
+        Return the device ID, or None if the net is already driven.
+        """
+        if net_name in self.drivers:
+            self.errors.append("".join([
+                "Line ", str(line_number), ": net ", net_name,
+                " is driven more than once"]))
+            return None
+        [device_id] = self.names.lookup([net_name])
+        self.devices.make_device(device_id, self.devices.SWITCH, signal)
+        self.drivers[net_name] = (device_id, None)
+        return device_id
+
+    def get_extra_net(self, net_name):
+        """Return a new net name for an extra gate of the specified net."""
+        self.extra_gates += 1
+        return "".join([net_name, "#", str(self.extra_gates)])
+
+    def get_inverted_net(self, net_name, line_number):
+        """Return the name of a net carrying the inverse of a net.
+
+        The inverter is made the first time, and shared afterwards.
+        """
+        inverted_net = "".join([net_name, "#not"])
+        if inverted_net not in self.drivers:
+            self.make_gate(inverted_net, self.devices.NAND, [net_name],
+                           line_number)
+        return inverted_net
+
+    def connect(self):
+        """Make the connections and monitors of the netlist.
+
+        Every net used must be driven by a device.
+        """
+        for device_id, input_id, net_name, line_number in \
+                self.connection_list:
+            connected_output = self.drivers.get(net_name)
+            if connected_output is None:
+                self.errors.append("".join([
+                    "Line ", str(line_number), ": net ", net_name,
+                    " is not driven"]))
+                continue
+            self.network.make_connection(device_id, input_id,
+                                         *connected_output)
+        for net_name, line_number in self.output_nets:
+            connected_output = self.drivers.get(net_name)
+            if connected_output is None:
+                self.errors.append("".join([
+                    "Line ", str(line_number), ": output ", net_name,
+                    " is not driven"]))
+            elif self.monitors is not None:
+                self.monitors.make_monitor(*connected_output)
@@ -0,0 +1,138 @@
+"""Stop simulation runs when watched signals meet a condition.
+
+Used in the Logic Simulator project to run the network until an output
+changes or reaches a given value, e.g. until Q goes HIGH or a counter bus
+returns to 0, instead of running for a guessed number of cycles.
+
+Classes
+-------
+Breakpoint - stores the condition on one watched output.
+Breakpoints - checks the breakpoint conditions after every cycle.
+"""
+from monitors import Trigger
+
+
+class Breakpoint(Trigger):
+
+    """Store the condition on one watched output.
+
+    A breakpoint is a Trigger.CHANGE trigger that also keeps the name of its
+    signal for reporting hits.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    outputs: outputs dictionary of the watched device.
+    output_id: output ID of the watched signal.
+    signal_name: name string of the watched signal.
+    value: signal level or bus value to stop at, or None to stop whenever
+           the signal changes.
+    width: number of bits of the watched signal.
+
+    Public methods
+    --------------
+    No public methods.
+    """
+
+    def __init__(self, devices, outputs, output_id, signal_name, value=None,
+                 width=1):
+        """Initialise breakpoint properties."""
+        super().__init__(devices, outputs, output_id, Trigger.CHANGE, value,
+                         width)
+        self.signal_name = signal_name
+
+
+class Breakpoints:
+
+    """Check the breakpoint conditions after every cycle.
+
+    A breakpoint is hit on the cycle its signal changes, if the new signal
+    equals its value or it has no value. Signals are compared as by
+    monitors.Trigger. Only the watched outputs are read after a cycle.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+
+    Public methods
+    --------------
+    make_breakpoint(self, device_id, output_id, value=None): Adds a
+                        breakpoint on the specified output.
+
+    remove_breakpoints(self): Removes all breakpoints.
+
+    get_breakpoint_names(self): Returns a description of every breakpoint.
+
+    start(self): Takes the current signals as the reference for the next
+                 changes, at the start of a run.
+
+    check(self): Returns the breakpoints hit on this cycle.
+    """
+
+    def __init__(self, names, devices, network):
+        """Initialise the breakpoint list and breakpoint errors."""
+        self.names = names
+        self.devices = devices
+        self.network = network
+
+        self.breakpoints = []
+
+        [self.NO_ERROR, self.NOT_OUTPUT,
+         self.INVALID_VALUE] = self.names.unique_error_codes(3)
+
+    def make_breakpoint(self, device_id, output_id, value=None):
+        """Add a breakpoint on the specified output.
+
+        The run stops when the signal changes to value, or on any change if
+        value is None. Return NO_ERROR if successful, or the corresponding
+        error if not.
+        """
+        device = self.devices.get_device(device_id)
+        if device is None:
+            return self.network.DEVICE_ABSENT
+        elif output_id not in device.outputs:
+            return self.NOT_OUTPUT
+        width = self.devices.get_port_width(device_id, output_id)
+        if value is not None and not 0 <= value < 1 << width:
+            return self.INVALID_VALUE
+        self.breakpoints.append(Breakpoint(
+            self.devices, device.outputs, output_id,
+            self.devices.get_signal_name(device_id, output_id), value,
+            width))
+        return self.NO_ERROR
+
+    def remove_breakpoints(self):
+        """Remove all breakpoints."""
+        self.breakpoints = []
+
+    def get_breakpoint_names(self):
+        """Return a description of every breakpoint, e.g. "Q1 = 1"."""
+        return [breakpoint.signal_name if breakpoint.level is None
+                else " = ".join([breakpoint.signal_name,
+                                 str(breakpoint.level)])
+                for breakpoint in self.breakpoints]
+
+    def start(self):
+        """Take the current signals as the reference for the next changes.
+
+        This is called at the start of every run, so that a breakpoint is
+        only hit by a change made during the run.
+        """
+        for breakpoint in self.breakpoints:
+            breakpoint.previous = breakpoint.get_signal()
+
+    def check(self):
+        """Return the breakpoints hit on this cycle.
+
+        Return a list of [signal_name, signal] for every breakpoint whose
+        signal changed to its value, or changed at all if it has no value.
+        Every breakpoint is updated, so each one always compares against the
+        signal after the previous cycle.
+        """
+        hits = []
+        for breakpoint in self.breakpoints:
+            if breakpoint.check():  # previous now holds the new signal
+                hits.append([breakpoint.signal_name, breakpoint.previous])
+        return hits
@@ -0,0 +1,212 @@
+"""Save and resume long simulations.
+
+Used in the Logic Simulator project to write periodic checkpoints of the
+simulation state, the monitor traces and the cycle counter to a compact
+binary file, and to resume a simulation from it.
+
+Classes
+-------
+Checkpoint - writes and loads checkpoint files.
+"""
+import array
+import struct
+
+
+class Checkpoint:
+
+    """Write and load checkpoint files.
+
+    A checkpoint file starts with a header, followed by one record per
+    checkpoint. Each record holds the cycle counter, the state array from
+    Network.snapshot, and for every monitor only the part of its trace
+    recorded since the previous checkpoint. Records are appended, so writing
+    a checkpoint costs time proportional to the new samples only.
+
+    Parameters
+    ----------
+    path: path to the checkpoint file.
+    names: instance of the names.Names() class.
+    devices: instance of the devices.Devices() class.
+    network: instance of the network.Network() class.
+    monitors: instance of the monitors.Monitors() class.
+
+    Public methods
+    --------------
+    start(self): Creates an empty checkpoint file.
+
+    write(self, cycles_completed): Appends a checkpoint of the current
+                                   simulation to the file.
+
+    load(self): Restores the simulation from the last checkpoint in the file.
+    """
+
+    header = b"LOGSIMCK2\n"
+
+    # Record header: state array length, cycles completed, number of monitors
+    record_format = struct.Struct("<III")
+    # Monitor header: name length, tail start position, tail length in
+    # bytes, bytes per sample (1 for signal levels, 8 for bus values)
+    monitor_format = struct.Struct("<HIIB")
+
+    def __init__(self, path, names, devices, network, monitors):
+        """Initialise the file path and the trace lengths written so far."""
+        self.path = path
+        self.names = names
+        self.devices = devices
+        self.network = network
+        self.monitors = monitors
+
+        # written_lengths stores {(device_id, output_id): samples_written}
+        self.written_lengths = {}
+
+    def start(self):
+        """Create an empty checkpoint file, replacing any existing one."""
+        with open(self.path, "wb") as checkpoint_file:
+            checkpoint_file.write(self.header)
+        self.written_lengths = {}
+
+    def write(self, cycles_completed):
+        """Append a checkpoint of the current simulation to the file.
+
+        Only the samples recorded since the last checkpoint are written. A
+        trace that has become shorter since then is written again in full.
+        """
+        state = self.network.snapshot()
+        monitor_count = len(self.monitors.monitors_dictionary)
+        chunks = [self.record_format.pack(len(state), cycles_completed,
+                                          monitor_count), state.tobytes()]
+        written_lengths = {}
+        for (device_id, output_id), signal_list in \
+                self.monitors.monitors_dictionary.items():
+            name = self.devices.get_signal_name(device_id,
+                                                output_id).encode()
+            tail_start = self.written_lengths.get((device_id, output_id), 0)
+            if tail_start > len(signal_list):
+                tail_start = 0
+            tail = self.pack_signals(signal_list[tail_start:])
+            tail_bytes = tail.tobytes()
+            chunks.extend([self.monitor_format.pack(len(name), tail_start,
+                                                    len(tail_bytes),
+                                                    tail.itemsize),
+                           name, tail_bytes])
+            written_lengths[(device_id, output_id)] = len(signal_list)
+
+        with open(self.path, "ab") as checkpoint_file:
+            checkpoint_file.write(b"".join(chunks))
+        self.written_lengths = written_lengths
+
+    def pack_signals(self, signal_list):
+        """Return the signal levels as an array of bytes.
+
+        255 stands for None. A trace holding bus values that do not fit in a
+        byte is returned as an array of 64-bit integers instead, with -1
+        standing for None.
+        """
+        try:
+            packed = bytes(signal_list)
+        except (TypeError, ValueError):  # the trace holds None or buses
+            packed = None
+        if packed is not None and 255 not in packed:
+            return array.array("B", packed)
+        if all(signal is None or 0 <= signal < 255 for signal in signal_list):
+            return array.array("B", [255 if signal is None else signal
+                                     for signal in signal_list])
+        return array.array("q", [-1 if signal is None else signal
+                                 for signal in signal_list])
+
+    def read_record(self, data, position):
+        """Read the record starting at position in the checkpoint data.
+
+        Return [end, state, cycles_completed, tails], where end is the
+        position after the record and tails holds [name, tail_start,
+        signal_list] for every monitor, or None if the record is incomplete
+        or cannot be read.
+        """
+        try:
+            [state_length, cycles_completed,
+             monitor_count] = self.record_format.unpack_from(data, position)
+            position += self.record_format.size
+            state = array.array("q")
+            state_size = state_length * state.itemsize
+            state_bytes = data[position:position + state_size]
+            if len(state_bytes) != state_size:
+                return None
+            state.frombytes(state_bytes)
+            position += state_size
+
+            tails = []
+            for _ in range(monitor_count):
+                [name_length, tail_start, tail_length,
+                 item_size] = self.monitor_format.unpack_from(data, position)
+                position += self.monitor_format.size
+                name_bytes = data[position:position + name_length]
+                if len(name_bytes) != name_length:
+                    return None
+                position += name_length
+                tail_bytes = data[position:position + tail_length]
+                if len(tail_bytes) != tail_length:
+                    return None
+                position += tail_length
+                tail = array.array("B" if item_size == 1 else "q")
+                tail.frombytes(tail_bytes)
+                blank = 255 if item_size == 1 else -1
+                tails.append([name_bytes.decode(), tail_start,
+                              [None if signal == blank else signal
+                               for signal in tail]])
+        except (struct.error, ValueError):
+            return None
+        return [position, state, cycles_completed, tails]
+
+    def load(self):
+        """Restore the simulation from the last checkpoint in the file.
+
+        The network must have been built from the same definition file. The
+        monitors are replaced by those saved in the checkpoint. If the last
+        record is incomplete, e.g. because the simulation stopped while it
+        was written, the last complete record is loaded instead.
+        Return the number of cycles completed, or None if the file cannot be
+        read or does not match the network.
+        """
+        try:
+            with open(self.path, "rb") as checkpoint_file:
+                data = checkpoint_file.read()
+        except IOError:
+            return None
+        if not data.startswith(self.header):
+            return None
+
+        position = len(self.header)
+        state = None
+        cycles_completed = None
+        traces = {}  # {signal_name: [signal_list]}
+        while position < len(data):
+            record = self.read_record(data, position)
+            if record is None:
+                break
+            [position, state, cycles_completed, tails] = record
+            record_traces = {}
+            for name, tail_start, tail in tails:
+                signal_list = traces.get(name, [])
+                del signal_list[tail_start:]
+                signal_list.extend(tail)
+                record_traces[name] = signal_list
+            traces = record_traces
+
+        # Every saved monitor is checked before anything is replaced
+        monitors_dictionary = {}
+        for name, signal_list in traces.items():
+            [device_id, output_id] = self.devices.get_signal_ids(name)
+            device = self.devices.get_device(device_id)
+            if device is None or output_id not in device.outputs:
+                return None
+            monitors_dictionary[(device_id, output_id)] = signal_list
+        if state is None or not self.network.restore(state):
+            return None
+
+        self.monitors.monitors_dictionary.clear()
+        self.monitors.monitors_dictionary.update(monitors_dictionary)
+        self.monitors.update_slots()
+        self.written_lengths = {
+            key: len(signal_list) for key, signal_list
+            in self.monitors.monitors_dictionary.items()}
+        return cycles_completed
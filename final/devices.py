@@ -8,6 +8,7 @@ Classes
 Device - stores device properties.
 Devices - makes and stores all the devices in the logic network.
 """
+import copy
 import random
 
 
@@ -39,9 +40,20 @@ class Device:
         self.device_kind = None
         self.clock_half_period = None
         self.siggen_pulse = None
+        self.siggen_period = None
+        # siggen_waveform packs the output for each counter value into an
+        # int: bit n is the output while siggen_counter is n
+        self.siggen_waveform = None
+        self.siggen_counter = None
         self.clock_counter = None
         self.switch_state = None
         self.dtype_memory = None
+        # Propagation delay in cycles used in timed mode, or None for the
+        # delay of the device kind
+        self.delay = None
+        # Number of bits of a bus device, or None for a single bit. The
+        # outputs of a bus device hold the bus value as an integer.
+        self.width = None
 
 
 class Devices:
@@ -54,6 +66,7 @@ class Devices:
     Parameters
     ----------
     names: instance of the names.Names() class.
+    seed: optional seed for the random cold start-up state.
 
     Public methods
     --------------
@@ -81,6 +94,9 @@ class Devices:
     set_switch(self, device_id, signal): Sets switch_state of specified device
                                          to signal.
 
+    copy_device(self, device, device_id): Adds a copy of a device with a new
+                                          device ID.
+
     make_switch(self, device_id, initial_state): Makes a switch device and sets
                                                  its initial state.
 
@@ -90,20 +106,63 @@ class Devices:
     make_gate(self, device_id, device_kind, no_of_inputs): Makes logic gates
                                         with the specified number of inputs.
 
+    make_siggen(self, device_id, siggen_pulse): Makes a siggen device with
+                                                the specified pulse.
+
     make_d_type(self, device_id): Makes a D-type device.
 
+    get_siggen_block(self, device_id, cycles): Returns the next outputs of
+                                               the specified siggen.
+
+    set_delay(self, device_id, delay): Sets the propagation delay of the
+                                       specified gate or D-type.
+
+    set_kind_delay(self, device_kind, delay): Sets the propagation delay of
+                                              all devices of a kind.
+
+    is_valid_delay(self, device_kind, delay): Returns True if delay is
+                                 allowed for devices of device_kind.
+
+    get_delay(self, device_id): Returns the propagation delay of the
+                                specified device.
+
+    set_width(self, device_id, width): Makes the specified switch, gate or
+                                       D-type a bus of width bits.
+
+    is_valid_width(self, device_kind, width): Returns True if width is
+                                 allowed for devices of device_kind.
+
+    get_port_width(self, device_id, port_id): Returns the number of bits
+                                              carried by the specified port.
+
+    get_bus_mask(self, device_id): Returns the bit mask of the specified
+                                   bus device.
+
+    set_seed(self, seed): Seeds the random number generator used for cold
+                          start-up.
+
     cold_startup(self): Simulates cold start-up of D-types and clocks.
 
-    make_device(self, device_id, device_kind, device_property=None): Creates
-                       the specified device and returns errors if unsuccessful.
+    cold_start_device(self, device): Simulates cold start-up of a single
+                                     device.
+
+    make_device(self, device_id, device_kind, device_property=None,
+                delay=None, width=None): Creates the specified device and
+                                         returns errors if unsuccessful.
     """
 
-    def __init__(self, names):
+    def __init__(self, names, seed=None):
         """Initialise devices list and constants."""
 
         self.names = names
 
         self.devices_list = []
+        # device_index stores {device_id: Device} for fast look-ups
+        self.device_index = {}
+
+        # Each instance has its own generator, so that a cold start-up can be
+        # reproduced from its seed
+        self.random = random.Random(seed)
 
         gate_strings = ["AND", "OR", "NAND", "NOR", "XOR"]
         device_strings = ["CLOCK", "SWITCH", "DTYPE", "SIGGEN"]
@@ -112,7 +171,8 @@ class Devices:
 
         [self.NO_ERROR, self.INVALID_QUALIFIER, self.NO_QUALIFIER,
          self.BAD_DEVICE, self.QUALIFIER_PRESENT,
-         self.DEVICE_PRESENT] = self.names.unique_error_codes(6)
+         self.DEVICE_PRESENT, self.INVALID_DELAY,
+         self.INVALID_WIDTH] = self.names.unique_error_codes(8)
 
         self.signal_types = [self.LOW, self.HIGH, self.RISING,
                              self.FALLING, self.BLANK] = range(5)
@@ -126,13 +186,16 @@ class Devices:
             self.Q_ID, self.QBAR_ID] = self.names.lookup(dtype_outputs)
 
         self.max_gate_inputs = 16
+        self.max_width = 32  # widest bus, so that states fit in 64 bits
+
+        # kind_delays stores {device_kind: delay} for timed mode. Devices of
+        # other kinds, without a delay of their own, take default_delay.
+        self.kind_delays = {}
+        self.default_delay = 1
 
     def get_device(self, device_id):
         """Return the Device object corresponding to device_id."""
-        for device in self.devices_list:
-            if device.device_id == device_id:
-                return device
-        return None
+        return self.device_index.get(device_id)
 
     def find_devices(self, device_kind=None):
         """Return a list of device IDs of the specified device_kind.
@@ -153,6 +216,7 @@ class Devices:
         new_device = Device(device_id)
         new_device.device_kind = device_kind
         self.devices_list.append(new_device)
+        self.device_index[device_id] = new_device
 
 
     def add_input(self, device_id, input_id):
@@ -201,8 +265,15 @@ class Devices:
             return None
 
     def get_signal_ids(self, signal_name):
-        """Return the device and output IDs of the specified signal."""
-        name_string_list = signal_name.split(".")
+        """Return the device and output IDs of the specified signal.
+
+        Device names inside module instances contain periods, so the signal
+        name is only split at its last period if it is not a device name.
+        """
+        device_id = self.names.query(signal_name)
+        if self.get_device(device_id) is not None:
+            return [device_id, None]
+        name_string_list = signal_name.rsplit(".", 1)
         name_id_list = self.names.lookup(name_string_list)
         device_id = name_id_list[0]
         if len(name_id_list) == 2:
@@ -226,6 +297,22 @@ class Devices:
             device.switch_state = signal
             return True
 
+    def copy_device(self, device, device_id):
+        """Add a copy of a device, possibly from another Devices instance.
+
+        The copy has the new device_id and unconnected inputs. Return the new
+        Device object, or None if device_id is already in use.
+        """
+        if device_id in self.device_index:
+            return None
+        new_device = copy.copy(device)
+        new_device.device_id = device_id
+        new_device.inputs = dict.fromkeys(device.inputs)
+        new_device.outputs = dict(device.outputs)
+        self.devices_list.append(new_device)
+        self.device_index[device_id] = new_device
+        return new_device
+
     def make_switch(self, device_id, initial_state):
         """Make a switch device and set its initial state."""
         self.add_device(device_id, self.SWITCH)
@@ -241,14 +328,24 @@ class Devices:
         self.add_device(device_id, self.CLOCK)
         device = self.get_device(device_id)
         device.clock_half_period = clock_half_period
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        self.cold_start_device(device)  # random point in its cycle
 
     def make_siggen(self, device_id, siggen_pulse):
-        """Make a siggen device with the specified pulse"""
+        """Make a siggen device with the specified pulse.
+
+        siggen_pulse is a string of 0s and 1s. It is parsed once into a
+        packed waveform, so that each output is a single bit extraction.
+        """
         self.add_device(device_id, self.SIGGEN)
         device = self.get_device(device_id)
-        device.siggen_pulse = siggen_pulse
-        self.cold_startup()  # clock initialised to a random point in its cycle
+        device.siggen_pulse = str(siggen_pulse)
+        device.siggen_period = len(device.siggen_pulse)
+        # The counter runs from 0 to siggen_period. Counter n outputs the
+        # character n-1 of the pulse, so counter 0 outputs the last one.
+        device.siggen_waveform = \
+            (int(device.siggen_pulse[::-1], 2) << 1) | \
+            int(device.siggen_pulse[-1])
+        self.cold_start_device(device)  # random point in its cycle
 
     def make_gate(self, device_id, device_kind, no_of_inputs):
         """Make logic gates with the specified number of inputs."""
@@ -267,15 +364,125 @@ class Devices:
             self.add_input(device_id, input_id)
         for output_id in self.dtype_output_ids:
             self.add_output(device_id, output_id)
-        self.cold_startup()  # D-type initialised to a random state
-        print("DTYPE made")
+        # D-type initialised to a random state
+        self.cold_start_device(self.get_device(device_id))
+
+    def get_siggen_block(self, device_id, cycles):
+        """Return the next outputs of the specified siggen.
+
+        Return a list of the signal levels the siggen will output over the
+        next number of cycles, without advancing its counter.
+        """
+        device = self.get_device(device_id)
+        states = device.siggen_period + 1
+        shift = (device.siggen_counter + 1) % states
+        # Rotate the waveform so that bit 0 is the output of the next cycle
+        waveform = ((device.siggen_waveform >> shift) |
+                    (device.siggen_waveform << (states - shift))) & \
+            ((1 << states) - 1)
+        return [(waveform >> (cycle % states)) & 1
+                for cycle in range(cycles)]
 
     def is_bin_num(self, num):
-        for i in str(num):
-            if i in ("01") == False:
-                return False
+        """Return True if num is a non-empty string of 0s and 1s."""
+        num = str(num)
+        return bool(num) and all(digit in "01" for digit in num)
+
+    def set_delay(self, device_id, delay):
+        """Set the propagation delay of the specified gate or D-type.
+
+        delay is an integer number of cycles > 0, or None for the delay of
+        the device kind. Return True if successful.
+        """
+        device = self.get_device(device_id)
+        if device is None or not self.is_valid_delay(device.device_kind,
+                                                     delay):
+            return False
+        device.delay = delay
+        return True
+
+    def set_kind_delay(self, device_kind, delay):
+        """Set the propagation delay of all gates or D-types of a kind.
+
+        Return True if successful.
+        """
+        if delay is None or not self.is_valid_delay(device_kind, delay):
+            return False
+        self.kind_delays[device_kind] = delay
+        return True
+
+    def is_valid_delay(self, device_kind, delay):
+        """Return True if delay is allowed for devices of device_kind."""
+        if delay is None:
+            return True
+        if device_kind not in self.gate_types and \
+                device_kind != self.D_TYPE:
+            return False
+        return isinstance(delay, int) and delay > 0
+
+    def get_delay(self, device_id):
+        """Return the propagation delay of the specified device in cycles."""
+        device = self.get_device(device_id)
+        if device.delay is not None:
+            return device.delay
+        return self.kind_delays.get(device.device_kind, self.default_delay)
+
+    def set_width(self, device_id, width):
+        """Make the specified switch, gate or D-type a bus of width bits.
+
+        A width of 1 or None makes a single-bit device. The width must be set
+        before the device is connected. Return True if successful.
+        """
+        device = self.get_device(device_id)
+        if device is None or not self.is_valid_width(device.device_kind,
+                                                     width):
+            return False
+        width = None if width == 1 else width
+        if width != device.width:
+            # Start every output and state from a valid value of the bus
+            device.width = width
+            mask = self.get_bus_mask(device_id)
+            for output_id, signal in device.outputs.items():
+                device.outputs[output_id] = min(signal, self.HIGH) & mask
+            if device.switch_state is not None:
+                device.switch_state &= mask
+            if device.dtype_memory is not None:
+                device.dtype_memory &= mask
         return True
 
+    def is_valid_width(self, device_kind, width):
+        """Return True if width is allowed for devices of device_kind."""
+        if width is None:
+            return True
+        if device_kind not in self.gate_types and \
+                device_kind not in [self.SWITCH, self.D_TYPE]:
+            return False
+        return isinstance(width, int) and 1 <= width <= self.max_width
+
+    def get_port_width(self, device_id, port_id):
+        """Return the number of bits carried by the specified port.
+
+        The CLK, SET and CLEAR inputs of a bus D-type are single bits.
+        """
+        device = self.get_device(device_id)
+        if device is None or device.width is None:
+            return 1
+        if device.device_kind == self.D_TYPE and \
+                port_id in [self.CLK_ID, self.SET_ID, self.CLEAR_ID]:
+            return 1
+        return device.width
+
+    def get_bus_mask(self, device_id):
+        """Return the mask with a 1 for every bit of the specified device."""
+        device = self.get_device(device_id)
+        if device.width is None:
+            return 1
+        return (1 << device.width) - 1
+
+    def set_seed(self, seed):
+        """Seed the random number generator used for cold start-up."""
+        self.random.seed(seed)
+
     def cold_startup(self):
         """Simulate cold start-up of D-types and clocks.
 
@@ -283,43 +490,59 @@ class Devices:
         begin from a random point in their cycles.
         """
         for device in self.devices_list:
-            if device.device_kind == self.D_TYPE:
-                device.dtype_memory = random.choice([self.LOW, self.HIGH])
-
-            elif device.device_kind == self.CLOCK:
-                clock_signal = random.choice([self.LOW, self.HIGH])
-                self.add_output(device.device_id, output_id=None,
-                                signal=clock_signal)
-                # Initialise it to a random point in its cycle.
-                device.clock_counter = \
-                    random.randrange(device.clock_half_period)
-
-            elif device.device_kind == self.SIGGEN:
-                clock_signal = random.choice([self.LOW, self.HIGH])
-                # Initialise it to a random point in its cycle.
-                device.siggen_period = len(str(device.siggen_pulse))
-                device.siggen_counter = \
-                    random.randrange(device.siggen_period)
-
-                siggen_signal = int(str(device.siggen_pulse)[device.siggen_counter])
-
-                self.add_output(device.device_id, output_id=None,
-                                signal=clock_signal)
-
-    def make_device(self, device_id, device_kind, device_property=None):
+            self.cold_start_device(device)
+
+    def cold_start_device(self, device):
+        """Simulate cold start-up of a single D-type, clock or siggen."""
+        if device.device_kind == self.D_TYPE:
+            if device.width is None:
+                device.dtype_memory = self.random.choice([self.LOW,
+                                                          self.HIGH])
+            else:
+                device.dtype_memory = \
+                    self.random.getrandbits(device.width)
+
+        elif device.device_kind == self.CLOCK:
+            clock_signal = self.random.choice([self.LOW, self.HIGH])
+            self.add_output(device.device_id, output_id=None,
+                            signal=clock_signal)
+            # Initialise it to a random point in its cycle.
+            device.clock_counter = \
+                self.random.randrange(device.clock_half_period)
+
+        elif device.device_kind == self.SIGGEN:
+            # Initialise it to a random point in its cycle.
+            device.siggen_counter = \
+                self.random.randrange(device.siggen_period)
+            siggen_signal = \
+                (device.siggen_waveform >> device.siggen_counter) & 1
+            self.add_output(device.device_id, output_id=None,
+                            signal=siggen_signal)
+
+    def make_device(self, device_id, device_kind, device_property=None,
+                    delay=None, width=None):
         """Create the specified device.
 
+        delay is the propagation delay of a gate or D-type in timed mode, and
+        width makes a switch, gate or D-type a bus of width bits.
         Return self.NO_ERROR if successful. Return corresponding error if not.
         """
         # Device has already been added to the devices_list
         if self.get_device(device_id) is not None:
             error_type = self.DEVICE_PRESENT
 
+        elif not self.is_valid_delay(device_kind, delay):
+            error_type = self.INVALID_DELAY
+
+        elif not self.is_valid_width(device_kind, width):
+            error_type = self.INVALID_WIDTH
+
         elif device_kind == self.SWITCH:
-            # Device property is the switch initial state: 0(LOW) or 1(HIGH)
+            # Device property is the switch initial state: 0(LOW) or 1(HIGH),
+            # or the bus value if the switch is a bus
             if device_property is None:
                 error_type = self.NO_QUALIFIER
-            elif device_property not in [self.LOW, self.HIGH]:
+            elif device_property not in range(1 << (width or 1)):
                 error_type = self.INVALID_QUALIFIER
             else:
                 self.make_switch(device_id, device_property)
@@ -372,4 +595,8 @@ class Devices:
         else:
             error_type = self.BAD_DEVICE
 
+        if error_type == self.NO_ERROR:
+            self.set_delay(device_id, delay)
+            if width is not None:
+                self.set_width(device_id, width)
         return error_type
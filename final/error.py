@@ -83,6 +83,11 @@ class Error:
         "MONITOR: Expected ; to end line",
         "DEVICE: Word pulse required",
         "DEVICE: pulse needs to be binary number",
+        "DEVICE: Invalid delay",
+        "MODULES: Name of module already used",
+        "MODULES: Port or device not found in module",
+        "MODULES: Expected a }",
+        "DEVICE: Invalid width",
     )
 
     @classmethod
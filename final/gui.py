@@ -28,6 +28,8 @@ from OpenGL.raw.GL.VERSION.GL_1_1 import GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BI
 import wx
 import wx.glcanvas as wxcanvas
 import time
+import threading
+import ctypes
 import sys
 import os
 import math
@@ -47,6 +49,8 @@ from names import Names
 from devices import Devices
 from network import Network
 from monitors import Monitors
+from breakpoints import Breakpoints
+from pyramid import Pyramid
 from scanner import Scanner
 from parse import Parser
 
@@ -112,6 +116,19 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
 
     render_value(self, values): Handles all drawing operations.
 
+    get_trace_vertices(self, values, start): Returns the vertices of a trace from
+                                             a cycle onwards as a NumPy array.
+
+    update_buffer(self, values): Uploads the cycles recorded since the last paint to
+                                 the vertex buffer.
+
+    get_visible_cycles(self, cycles): Returns the range of cycles inside the canvas.
+
+    render_blocks(self, values, first, last, cycles_per_pixel): Draws a range of
+                        cycles as min/max blocks of at most one pixel.
+
+    get_label_stride(self, cycles): Returns the number of cycles between axis labels.
+
     render_empty(self): Draws empty canvas.
 
     on_paint(self, event): Handles the paint event.
@@ -147,6 +164,10 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
         self.init = False
         self.context = wxcanvas.GLContext(self)
 
+        # When zoomed out to less than a pixel per cycle, the trace is drawn
+        # from a min/max pyramid, with at most one block per pixel
+        self.pyramid = Pyramid(devices.HIGH)
+
         # Initialise variables for panning
         self.pan_x = 0
         self.pan_y = 0
@@ -158,6 +179,15 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
         self.zoom = 1
         self.zoom_state = 1
 
+        # The trace is kept in a vertex buffer, with two vertices per cycle.
+        # Only the cycles recorded since the last paint are uploaded, and the
+        # buffer is rebuilt when the trace is reset.
+        self.cycle_width = 20  # pixels per cycle before zooming
+        self.vertex_buffer = None
+        self.buffer_capacity = 0  # cycles the buffer can hold
+        self.buffer_cycles = 0  # cycles uploaded
+        self.buffer_values = None  # trace the buffer was built from
+
         # Bind events to the canvas
         self.Bind(wx.EVT_PAINT, self.on_paint)
         self.Bind(wx.EVT_SIZE, self.on_size)
@@ -199,7 +229,7 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
         GL.glLoadIdentity()
 
         GL.glTranslated(self.pan_x, self.pan_y, 0.0)
-        GL.glScaled(self.zoom, self.zoom, self.zoom)
+        GL.glScaled(self.zoom, 1.0, 1.0)  # zoom along the time axis only
 
     def render_value(self, values):
         """Draw a trace.
@@ -215,19 +245,21 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
         # Clear everything
         GL.glClear(GL.GL_COLOR_BUFFER_BIT)
 
-        # Draw a sample signal trace
+        # Draw the visible part of the signal trace from the vertex buffer
+        cycles = len(values)
+        self.update_buffer(values)
+        [first, last] = self.get_visible_cycles(cycles)
         GL.glColor3f(0.0, 0.0, 1.0)  # signal trace is blue
-        GL.glBegin(GL.GL_LINE_STRIP)
-        for i in range(len(values)):
-            x = (i * 20) + 10
-            x_next = (i * 20) + 30
-            if values[i] == 1:
-                y = 35
-            else:
-                y = 10
-            GL.glVertex2f(x, y)
-            GL.glVertex2f(x_next, y)
-        GL.glEnd()
+        cycles_per_pixel = 1 / (self.cycle_width * self.zoom)
+        if last > first and cycles_per_pixel >= 1:
+            self.render_blocks(values, first, last, cycles_per_pixel)
+        elif last > first:
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+            GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glVertexPointer(2, GL.GL_FLOAT, 0, None)
+            GL.glDrawArrays(GL.GL_LINE_STRIP, 2 * first, 2 * (last - first))
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
 
         GL.glColor3f(0.5, 0.5, 0.0)
         GL.glColor3f(0.3, 0.5, 0.7)
@@ -241,17 +273,108 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
         GL.glColor3f(0.3, 0.5, 0.7)
         GL.glBegin(GL.GL_LINES)
         GL.glVertex2f(0.0, 10.0)
-        GL.glVertex2f(10 + 20 * (len(values) + 1), 10.0)
+        GL.glVertex2f(10 + self.cycle_width * (cycles + 1), 10.0)
         GL.glEnd()
-        for i in range(len(values) + 1):
-            self.render_text(str(i), (i * 20) + 10, 0.0)
+        # Only the visible labels are drawn, spaced so that they do not overlap
+        stride = self.get_label_stride(cycles)
+        for i in range(first - first % stride, min(last, cycles) + 1, stride):
+            self.render_text(str(i), (i * self.cycle_width) + 10, 0.0)
 
-        self.render_text(_("time"), (len(values) * 20) + 35, 5.0)
+        self.render_text(_("time"), (cycles * self.cycle_width) + 35, 5.0)
         # We have been drawing to the back buffer, flush the graphics pipeline
         # and swap the back buffer to the front
         GL.glFlush()
         self.SwapBuffers()
 
+    def get_trace_vertices(self, values, start):
+        """Return the vertices of the trace from cycle start onwards.
+
+        Every cycle is a horizontal line at the height of its level, so the
+        vertices are a float32 array of [x, y] with two rows per cycle.
+        """
+        levels = np.asarray(values[start:])
+        x = np.arange(start, len(values), dtype="f") * self.cycle_width + 10
+        vertices = np.empty((len(levels), 2, 2), "f")
+        vertices[:, 0, 0] = x
+        vertices[:, 1, 0] = x + self.cycle_width
+        vertices[:, :, 1] = np.where(levels == 1, 35.0, 10.0)[:, np.newaxis]
+        return vertices.reshape(-1, 2)
+
+    def update_buffer(self, values):
+        """Upload the cycles recorded since the last paint to the vertex buffer.
+
+        The buffer grows to twice the number of cycles when it is full, so a
+        growing trace is only uploaded in full a logarithmic number of times.
+        """
+        if self.vertex_buffer is None:
+            self.vertex_buffer = GL.glGenBuffers(1)
+        cycles = len(values)
+        if values is not self.buffer_values or cycles < self.buffer_cycles:
+            # A new or reset trace is uploaded from the start
+            self.buffer_values = values
+            self.buffer_cycles = 0
+            self.pyramid.reset()
+        if cycles == self.buffer_cycles:
+            return
+        cycle_bytes = 2 * 2 * 4  # two vertices of two floats per cycle
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        if cycles > self.buffer_capacity:
+            self.buffer_capacity = max(2 * cycles, 1024)
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, self.buffer_capacity * cycle_bytes,
+                            None, GL.GL_DYNAMIC_DRAW)
+            self.buffer_cycles = 0
+        vertices = self.get_trace_vertices(values, self.buffer_cycles)
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, self.buffer_cycles * cycle_bytes,
+                           vertices.nbytes, vertices)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        self.buffer_cycles = cycles
+
+    def get_visible_cycles(self, cycles):
+        """Return [first, last] for the cycles from first up to last inside the canvas."""
+        width = self.GetClientSize().width
+        scale = self.cycle_width * self.zoom
+        first = int((-self.pan_x - 10 * self.zoom) // scale)
+        last = int((width - self.pan_x - 10 * self.zoom) // scale) + 1
+        return [max(first, 0), max(min(last, cycles), 0)]
+
+    def render_blocks(self, values, first, last, cycles_per_pixel):
+        """Draw the cycles from first up to last as min/max blocks.
+
+        Each block covers as many cycles as fit in one pixel, and is drawn as
+        a vertical line between its lowest and highest level and horizontal
+        lines across it at both, so that even a single-cycle pulse is seen.
+        """
+        self.pyramid.update(values)
+        level = self.pyramid.get_level(cycles_per_pixel)
+        [first_block, mins, maxs] = self.pyramid.get_blocks(first, last, level)
+        block_width = self.cycle_width * 2 ** level
+        x = np.arange(first_block, first_block + len(mins), dtype="f") * block_width + 10
+        low = np.where(mins, 35.0, 10.0)
+        high = np.where(maxs, 35.0, 10.0)
+        vertices = np.empty((len(mins), 6, 2), "f")
+        vertices[:, [0, 1, 2, 4], 0] = x[:, np.newaxis]
+        vertices[:, [3, 5], 0] = (x + block_width)[:, np.newaxis]
+        vertices[:, [0, 2, 3], 1] = low[:, np.newaxis]
+        vertices[:, [1, 4, 5], 1] = high[:, np.newaxis]
+        GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+        GL.glVertexPointer(2, GL.GL_FLOAT, 0, vertices)
+        GL.glDrawArrays(GL.GL_LINES, 0, 6 * len(mins))
+        GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+
+    def get_label_stride(self, cycles):
+        """Return the number of cycles between the labels of the time axis.
+
+        The stride is 1, 2 or 5 times a power of ten, chosen so that labels
+        of the largest cycle number do not overlap at the current zoom.
+        """
+        spacing = 7 * len(str(cycles)) + 6  # pixels taken by the widest label
+        step = 1
+        while True:
+            for multiple in [1, 2, 5]:
+                if step * multiple * self.cycle_width * self.zoom >= spacing:
+                    return step * multiple
+            step *= 10
+
     def render_empty(self):
         """Render empty canvas.
 
@@ -313,7 +436,7 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
     def on_mouse(self, event):
         """Handle mouse events.
 
-        Changes pan position.
+        Changes pan position, and the zoom of the time axis with the wheel.
         """
         self.SetCurrent(self.context)
 
@@ -330,6 +453,13 @@ class MyGLCanvas2D(wxcanvas.GLCanvas):
             self.last_mouse_y = event.GetY()
             self.init = False
 
+        if event.GetWheelRotation() != 0:
+            # Zoom the time axis, keeping the cycle under the mouse in place
+            cycle_x = (event.GetX() - self.pan_x) / self.zoom
+            self.zoom *= 1.25 ** (event.GetWheelRotation() / event.GetWheelDelta())
+            self.pan_x = event.GetX() - cycle_x * self.zoom
+            self.init = False
+
         self.Refresh()  # triggers the paint event
 
 
@@ -353,6 +483,14 @@ class MyGLCanvas3D(wxcanvas.GLCanvas):
 
     render_value(self, values): Handles all drawing operations.
 
+    get_cuboid_vertices(self, values, start): Returns the quads of the cuboids of a
+                                              trace from a cycle onwards.
+
+    update_buffer(self, values): Uploads the cycles recorded since the last paint to
+                                 the vertex buffer.
+
+    get_visible_cycles(self, cycles): Returns the range of cycles inside the view frustum.
+
     reset(self): Reset zoom, pan rotate.
 
     render(self): Handles all drawing operations.
@@ -430,6 +568,29 @@ class MyGLCanvas3D(wxcanvas.GLCanvas):
         # Offset between viewpoint and origin of the scene
         self.depth_offset = 1000
 
+        # The trace is one mesh of cuboids in a vertex buffer, with the
+        # position and normal of the 24 vertices of each cuboid's quads.
+        # Cycle i is at x = i * cycle_spacing, so earlier cycles never move
+        # and only the cycles recorded since the last paint are uploaded.
+        self.cycle_spacing = 300
+        self.half_width = 150
+        self.half_depth = 75
+        self.low_height = 15.0  # height of a cuboid at level 0
+        self.high_height = 165.0  # height of a cuboid at any other level
+        corners = np.array([(1, 0, 1), (-1, 0, 1), (-1, 0, -1), (1, 0, -1),
+                            (1, 1, 1), (1, 1, -1), (-1, 1, -1), (-1, 1, 1)], "f")
+        faces = [(0, 1, 2, 3), (4, 5, 6, 7), (6, 5, 3, 2),
+                 (1, 0, 4, 7), (2, 1, 7, 6), (5, 4, 0, 3)]
+        normals = [(0, -1, 0), (0, 1, 0), (0, 0, -1),
+                   (0, 0, 1), (-1, 0, 0), (1, 0, 0)]
+        # cuboid_corners holds [x sign, 1 if on top, z sign] for every vertex
+        self.cuboid_corners = corners[np.ravel(faces)]
+        self.cuboid_normals = np.repeat(np.array(normals, "f"), 4, axis=0)
+        self.vertex_buffer = None
+        self.buffer_capacity = 0  # cycles the buffer can hold
+        self.buffer_cycles = 0  # cycles uploaded
+        self.buffer_values = None  # trace the buffer was built from
+
         # Bind events to the canvas
         self.Bind(wx.EVT_PAINT, self.on_paint)
         self.Bind(wx.EVT_SIZE, self.on_size)
@@ -512,15 +673,25 @@ class MyGLCanvas3D(wxcanvas.GLCanvas):
         # Clear everything
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
 
-        # Draw a sample signal trace
+        # Draw the cuboids of the trace inside the view, centred on the origin
         GL.glColor3f(1.0, 0.7, 0.5)  # signal trace is beige
         list_length = len(values)
-        for i in range(list_length):
-            z = (i - list_length // 2) * 300
-            if values[i] == 0:
-                self.draw_cuboid(z, 150, 75, 15, "normal")
-            else:
-                self.draw_cuboid(z, 150, 75, 165, "normal")
+        self.update_buffer(values)
+        GL.glPushMatrix()
+        GL.glTranslatef(-(list_length // 2) * self.cycle_spacing, 0.0, 0.0)
+        [first, last] = self.get_visible_cycles(list_length)
+        if last > first:
+            vertex_bytes = 6 * 4  # position and normal of three floats each
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+            GL.glEnableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glEnableClientState(GL.GL_NORMAL_ARRAY)
+            GL.glVertexPointer(3, GL.GL_FLOAT, vertex_bytes, None)
+            GL.glNormalPointer(GL.GL_FLOAT, vertex_bytes, ctypes.c_void_p(3 * 4))
+            GL.glDrawArrays(GL.GL_QUADS, 24 * first, 24 * (last - first))
+            GL.glDisableClientState(GL.GL_NORMAL_ARRAY)
+            GL.glDisableClientState(GL.GL_VERTEX_ARRAY)
+            GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        GL.glPopMatrix()
 
         GL.glColor3f(0.3, 0.5, 0.7)
         GL.glBegin(GL.GL_LINES)
@@ -535,6 +706,89 @@ class MyGLCanvas3D(wxcanvas.GLCanvas):
         GL.glFlush()
         self.SwapBuffers()
 
+    def get_cuboid_vertices(self, values, start):
+        """Return the quads of the cuboids of the trace from cycle start onwards.
+
+        A cycle at level 0 is a low cuboid and any other level a tall one. The
+        result is a float32 array with a row of [x, y, z, normal x, normal y,
+        normal z] for each of the 24 vertices of each cuboid.
+        """
+        heights = np.where(np.asarray(values[start:]) == 0, self.low_height,
+                           self.high_height)
+        x = np.arange(start, len(values), dtype="f") * self.cycle_spacing
+        vertices = np.empty((len(heights), 24, 6), "f")
+        vertices[:, :, 0] = x[:, np.newaxis] + self.cuboid_corners[:, 0] * self.half_width
+        vertices[:, :, 1] = self.half_depth + heights[:, np.newaxis] * self.cuboid_corners[:, 1]
+        vertices[:, :, 2] = self.cuboid_corners[:, 2] * self.half_depth
+        vertices[:, :, 3:] = self.cuboid_normals
+        return vertices.reshape(-1, 6)
+
+    def update_buffer(self, values):
+        """Upload the cycles recorded since the last paint to the vertex buffer.
+
+        The buffer grows to twice the number of cycles when it is full, and is
+        rebuilt when the trace is reset.
+        """
+        if self.vertex_buffer is None:
+            self.vertex_buffer = GL.glGenBuffers(1)
+        cycles = len(values)
+        if values is not self.buffer_values or cycles < self.buffer_cycles:
+            # A new or reset trace is uploaded from the start
+            self.buffer_values = values
+            self.buffer_cycles = 0
+        if cycles == self.buffer_cycles:
+            return
+        cycle_bytes = 24 * 6 * 4  # 24 vertices of six floats per cycle
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        if cycles > self.buffer_capacity:
+            self.buffer_capacity = max(2 * cycles, 256)
+            GL.glBufferData(GL.GL_ARRAY_BUFFER, self.buffer_capacity * cycle_bytes,
+                            None, GL.GL_DYNAMIC_DRAW)
+            self.buffer_cycles = 0
+        vertices = self.get_cuboid_vertices(values, self.buffer_cycles)
+        GL.glBufferSubData(GL.GL_ARRAY_BUFFER, self.buffer_cycles * cycle_bytes,
+                           vertices.nbytes, vertices)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, 0)
+        self.buffer_cycles = cycles
+
+    def get_visible_cycles(self, cycles):
+        """Return [first, last] for the cycles from first up to last inside the view.
+
+        The four long edges of the trace are clipped against the view frustum
+        using the current modelview and projection matrices. Clip coordinates
+        are linear in the cycle number along each edge, so every frustum plane
+        bounds the cycle number from one side. One cycle is added at each end
+        for the width of the cuboids.
+        """
+        # OpenGL returns the matrices column by column, so row vectors are
+        # multiplied on the left
+        transform = np.matmul(
+            np.asarray(GL.glGetFloatv(GL.GL_MODELVIEW_MATRIX), "d").reshape(4, 4),
+            np.asarray(GL.glGetFloatv(GL.GL_PROJECTION_MATRIX), "d").reshape(4, 4))
+        step = np.matmul([self.cycle_spacing, 0.0, 0.0, 0.0], transform)
+        first = cycles
+        last = 0
+        for y in [self.half_depth, self.half_depth + self.high_height]:
+            for z in [-self.half_depth, self.half_depth]:
+                origin = np.matmul([0.0, y, z, 1.0], transform)
+                lower = -1.0
+                upper = float(cycles)
+                for axis in range(3):
+                    for sign in [-1, 1]:
+                        # origin + t * step must satisfy w + sign * axis >= 0
+                        p = origin[3] + sign * origin[axis]
+                        q = step[3] + sign * step[axis]
+                        if q > 0:
+                            lower = max(lower, -p / q)
+                        elif q < 0:
+                            upper = min(upper, -p / q)
+                        elif p < 0:
+                            upper = lower - 1  # the edge is outside the plane
+                if upper >= lower:
+                    first = min(first, math.floor(lower) - 1)
+                    last = max(last, math.ceil(upper) + 2)
+        return [max(first, 0), min(last, cycles)]
+
     def render(self):
         """Handle all drawing operations.
 
@@ -801,8 +1055,25 @@ class SidePanel(wx.Panel):
 
     on_add_monitor(self, event): Handle the event when the add monitor button is pressed, adds a MonitorItem.
 
-    run_network(self, cycles): Run the network for the specified number of simulation cycles.
-                                Return True if successful.
+    on_add_breakpoint(self, event): Handle the event when the add breakpoint button is pressed,
+                                    stops later runs when the selected signal changes.
+
+    on_clear_breakpoints(self, event): Event handler, removes all breakpoints.
+
+    run_network(self, cycles): Run the network for the specified number of simulation cycles,
+                                or until a breakpoint or cancel. Return the number of cycles run.
+
+    start_run(self, cycles): Run the network on a worker thread, keeping the window responsive.
+
+    on_run_progress(self, cycle, cycles): Show the progress of a run and the traces so far.
+
+    on_run_finished(self, cycles_run): Show the traces and count the cycles of a finished run.
+
+    on_cancel_button(self, event): Event handler, stops the current run.
+
+    set_running(self, running): Disable the controls that change the network during a run.
+
+    stop_run(self): Cancel the current run and wait for the worker thread to finish.
 
     on_update_signal(self, event): Set the specified switch to the specified signal level.
 
@@ -842,6 +1113,19 @@ class SidePanel(wx.Panel):
         self.run_button = wx.Button(self, wx.ID_ANY, _("Run"))
         self.continue_button = wx.Button(self, wx.ID_ANY, _("Continue"))
 
+        """Runs are made on a worker thread
+        cancel_button stops the run and gauge shows its progress in percent.
+        The traces are redrawn every progress_interval seconds"""
+        self.cancel_button = wx.Button(self, wx.ID_ANY, _("Cancel"))
+        self.cancel_button.Disable()
+        self.gauge = wx.Gauge(self, wx.ID_ANY, 100)
+        self.cancel_event = threading.Event()
+        self.worker = None
+        self.progress_interval = 0.2
+        self.progress_pending = False  # a progress update is queued
+        self.closing = False  # the window is closing, ignore queued callbacks
+        self.cycles_completed = 0
+
         """Setting the value of a signal/ switch
         switch_box takes the value
         zero_button and one_button allow toggling between 0 and 1
@@ -887,6 +1171,20 @@ class SidePanel(wx.Panel):
         self.remove_all_button = wx.Button(self, wx.ID_ANY, _("Remove all"))
         self.remove_all_button.SetForegroundColour("#ff1a1a")
 
+        """Stopping runs when a signal changes
+        breakpoint_combobox takes the signal and breakpoint_value the value to
+        stop at, or Change to stop at any change"""
+        self.breakpoint_text = wx.StaticText(self, wx.ID_ANY, _("Stop when"))
+        monitored, not_monitored = self.parent.monitors.get_signal_names()
+        self.breakpoint_combobox = wx.ComboBox(
+            self, wx.ID_ANY, _("Select"), choices=monitored + not_monitored
+        )
+        self.breakpoint_value = wx.ComboBox(
+            self, wx.ID_ANY, _("Change"), choices=[_("Change"), "0", "1"]
+        )
+        self.add_breakpoint_button = wx.Button(self, wx.ID_ANY, _("Add"))
+        self.clear_breakpoints_button = wx.Button(self, wx.ID_ANY, _("Clear"))
+
         self.toggle_gui_text = wx.StaticText(
             self, wx.ID_ANY, _("Change between 2D and 3D view mode"))
         if self.parent.dimension == 2:
@@ -898,6 +1196,7 @@ class SidePanel(wx.Panel):
 
         self.run_button.Bind(wx.EVT_BUTTON, self.on_run_button)
         self.continue_button.Bind(wx.EVT_BUTTON, self.on_continue_button)
+        self.cancel_button.Bind(wx.EVT_BUTTON, self.on_cancel_button)
 
         self.add_switch_button.Bind(wx.EVT_BUTTON, self.on_update_signal)
 
@@ -908,16 +1207,22 @@ class SidePanel(wx.Panel):
 
         self.toggle_gui_button.Bind(wx.EVT_BUTTON, self.on_toggle_gui)
 
+        self.add_breakpoint_button.Bind(wx.EVT_BUTTON, self.on_add_breakpoint)
+        self.clear_breakpoints_button.Bind(wx.EVT_BUTTON, self.on_clear_breakpoints)
+
         self.side_sizer = wx.BoxSizer(wx.VERTICAL)
 
         self.cycle_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self.button_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.progress_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self.switch_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self.monitor_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self.remove_monitor_sizer = wx.BoxSizer(wx.HORIZONTAL)
         self.remove_monitor_subsizer = wx.BoxSizer(wx.VERTICAL)
         self.remove_monitor_bordersizer = wx.BoxSizer(wx.VERTICAL)
         self.binary_choice_sizer = wx.BoxSizer(wx.VERTICAL)
+        self.breakpoint_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.breakpoint_button_sizer = wx.BoxSizer(wx.HORIZONTAL)
 
         self.side_sizer.SetMinSize(self.side_sizer.GetMinSize())
         self.side_sizer.Add(self.toggle_gui_text, 0, wx.ALL | wx.EXPAND, 5)
@@ -925,6 +1230,7 @@ class SidePanel(wx.Panel):
         self.side_sizer.Add(wx.StaticLine(self, -1), 0, wx.ALL | wx.EXPAND, 5)
         self.side_sizer.Add(self.cycle_sizer, 1, wx.ALL | wx.EXPAND, 0)
         self.side_sizer.Add(self.button_sizer, 1, wx.ALL | wx.EXPAND, 0)
+        self.side_sizer.Add(self.progress_sizer, 1, wx.ALL | wx.EXPAND, 0)
         self.side_sizer.Add(wx.StaticLine(self, -1), 0, wx.ALL | wx.EXPAND, 5)
         self.side_sizer.Add(self.switch_box_text, 1, wx.ALIGN_CENTER, 0)
         self.side_sizer.Add(self.switch_sizer, 1, wx.EXPAND, 0)
@@ -934,6 +1240,10 @@ class SidePanel(wx.Panel):
         self.side_sizer.Add(wx.StaticLine(self, -1), 0, wx.ALL | wx.EXPAND, 5)
         self.side_sizer.Add(self.remove_monitor_text, 1, wx.ALL | wx.ALIGN_CENTER, 5)
         self.side_sizer.Add(self.remove_monitor_sizer, 1, wx.ALL | wx.EXPAND, 0)
+        self.side_sizer.Add(wx.StaticLine(self, -1), 0, wx.ALL | wx.EXPAND, 5)
+        self.side_sizer.Add(self.breakpoint_text, 1, wx.ALL | wx.ALIGN_CENTER, 5)
+        self.side_sizer.Add(self.breakpoint_sizer, 1, wx.ALL | wx.EXPAND, 0)
+        self.side_sizer.Add(self.breakpoint_button_sizer, 1, wx.ALL | wx.EXPAND, 0)
 
         self.cycle_sizer.Add(self.text, 1, wx.ALL | wx.ALIGN_CENTER, 5)
         self.cycle_sizer.Add(self.spin, 2, wx.ALL, 5)
@@ -941,6 +1251,9 @@ class SidePanel(wx.Panel):
         self.button_sizer.Add(self.run_button, 1, wx.ALL | wx.EXPAND, 5)
         self.button_sizer.Add(self.continue_button, 1, wx.ALL | wx.EXPAND, 5)
 
+        self.progress_sizer.Add(self.gauge, 2, wx.ALL | wx.ALIGN_CENTER, 5)
+        self.progress_sizer.Add(self.cancel_button, 1, wx.ALL | wx.EXPAND, 5)
+
         self.switch_sizer.Add(self.switch_box, 1, wx.ALL, 5)
         self.switch_sizer.Add(self.binary_choice_sizer, 1, wx.ALL, 5)
         self.switch_sizer.Add(self.add_switch_button, 1, wx.ALL, 5)
@@ -967,6 +1280,12 @@ class SidePanel(wx.Panel):
             self.remove_all_button, 0, wx.ALL | wx.EXPAND, 5
         )
 
+        self.breakpoint_sizer.Add(self.breakpoint_combobox, 2, wx.ALL, 5)
+        self.breakpoint_sizer.Add(self.breakpoint_value, 1, wx.ALL, 5)
+
+        self.breakpoint_button_sizer.Add(self.add_breakpoint_button, 1, wx.ALL | wx.EXPAND, 5)
+        self.breakpoint_button_sizer.Add(self.clear_breakpoints_button, 1, wx.ALL | wx.EXPAND, 5)
+
         self.SetSizer(self.side_sizer)
 
     def on_toggle_gui(self, event):
@@ -1023,20 +1342,154 @@ class SidePanel(wx.Panel):
             self.remove_monitor_combobox.Append(monitor)
             self.scrolled_panel.add_monitor(monitor)
 
+    def on_add_breakpoint(self, event):
+        """Handle the event when the add breakpoint button is pressed.
+
+        Later runs stop when the selected signal changes, or changes to the
+        selected value. If no signal is selected, do nothing.
+        """
+        signal_name = self.breakpoint_combobox.GetValue()
+        if signal_name == _("Select"):
+            return
+        [device_id, output_id] = self.parent.devices.get_signal_ids(signal_name)
+        value = self.breakpoint_value.GetValue()
+        try:
+            value = None if value == _("Change") else int(value, 0)
+        except ValueError:
+            print("Error! Invalid breakpoint value.")
+            return
+        breakpoints = self.parent.breakpoints
+        if breakpoints.make_breakpoint(device_id, output_id, value) == breakpoints.NO_ERROR:
+            print("Successfully set breakpoint.")
+        else:
+            print("Error! Could not set breakpoint.")
+
+    def on_clear_breakpoints(self, event):
+        """Handle the event when the clear breakpoints button is pressed.
+
+        Remove all breakpoints.
+        """
+        self.parent.breakpoints.remove_breakpoints()
+        print("Removed all breakpoints.")
+
     def run_network(self, cycles):
         """Run the network for the specified number of simulation cycles.
 
-        Return True if successful.
+        The run stops early at the end of a cycle on which a breakpoint is hit,
+        or when cancel_event is set. This is called on the worker thread, so
+        progress is passed to the window with wx.CallAfter, at most every
+        progress_interval seconds and only once the previous update is drawn.
+        Return the number of cycles run, or None if the network oscillates.
         """
-        for _ in range(cycles):
+        self.parent.breakpoints.start()
+        cycle = 0
+        last_progress = time.perf_counter()
+        while cycle < cycles and not self.cancel_event.is_set():
             if self.parent.network.execute_network():
                 self.parent.monitors.record_signals()
             else:
                 print("Error! Network oscillating.")
-                return False
-        self.parent.monitors.display_signals()
+                if self.parent.network.oscillating_loop:
+                    print("Oscillating loop: " +
+                          ", ".join(self.parent.network.oscillating_loop))
+                return None
+            cycle += 1
+            hits = self.parent.breakpoints.check()
+            if hits:
+                print("".join([
+                    "Breakpoint: ", ", ".join([" = ".join([name, str(signal)]) for name, signal in hits]),
+                    " after cycle ", str(self.cycles_completed + cycle)]))
+                break
+            if not self.progress_pending and \
+                    time.perf_counter() - last_progress > self.progress_interval:
+                self.progress_pending = True
+                wx.CallAfter(self.on_run_progress, cycle, cycles)
+                last_progress = time.perf_counter()
+        return cycle
+
+    def start_run(self, cycles):
+        """Run the network for the specified number of cycles on a worker thread.
+
+        The controls that change the network are disabled until the run
+        finishes, when on_run_finished is called on the event thread.
+        """
+        self.set_running(True)
+        self.cancel_event.clear()
+
+        def work():
+            cycles_run = self.run_network(cycles)
+            wx.CallAfter(self.on_run_finished, cycles_run)
+
+        # A daemon thread does not keep the program open when the window closes
+        self.worker = threading.Thread(target=work, daemon=True)
+        self.worker.start()
+
+    def on_run_progress(self, cycle, cycles):
+        """Show the progress of a run and redraw the traces recorded so far.
+
+        Called on the event thread by wx.CallAfter. The worker only appends to
+        the traces, so they can be drawn while it runs.
+        """
+        if self.closing or not self:  # the window is closing or gone
+            return
+        if self.worker is not None:
+            self.gauge.SetValue(100 * cycle // max(cycles, 1))
+            self.parent.scrolled_panel.render_children()
+        self.progress_pending = False
+
+    def on_run_finished(self, cycles_run):
+        """Show the traces of a finished run and count its cycles.
+
+        Called on the event thread by wx.CallAfter.
+        """
+        if self.closing or not self:  # the window is closing or gone
+            return
+        self.worker = None
+        if self.cancel_event.is_set():
+            print("".join(["Run cancelled after ", str(cycles_run), " cycles."]))
+        if cycles_run is not None:
+            self.cycles_completed += cycles_run
+            self.parent.monitors.display_signals()
         self.parent.scrolled_panel.render_children()
-        return True
+        self.gauge.SetValue(0)
+        self.set_running(False)
+
+    def on_cancel_button(self, event):
+        """Handle the event when the user clicks the cancel button.
+
+        Stop the current run at the end of its cycle.
+        """
+        self.cancel_event.set()
+
+    def set_running(self, running):
+        """Disable the controls that change the network while a run is made.
+
+        This includes the Remove button of every monitor and the buttons that
+        leave the window. Only the cancel button is enabled during a run.
+        """
+        gui_control = self.parent.gui_control
+        controls = [self.run_button, self.continue_button, self.add_switch_button,
+                    self.add_monitor_button, self.remove_monitor_button,
+                    self.remove_all_button, self.toggle_gui_button,
+                    self.add_breakpoint_button, self.clear_breakpoints_button,
+                    gui_control.return_button, gui_control.save_as_button,
+                    gui_control.help_button]
+        controls.extend(item.remove_item for item in self.scrolled_panel.item_list)
+        for control in controls:
+            control.Enable(not running)
+        self.cancel_button.Enable(running)
+
+    def stop_run(self):
+        """Cancel the current run and wait for the worker thread to finish.
+
+        Called when the window closes. The callbacks the worker has already
+        queued with wx.CallAfter are ignored from then on.
+        """
+        self.closing = True
+        self.cancel_event.set()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
 
     def on_update_signal(self, event):
         """Set the specified switch to the specified signal level.
@@ -1082,8 +1535,7 @@ class SidePanel(wx.Panel):
         self.parent.monitors.reset_monitors()
         print("".join(["Running for ", str(cycles), " cycles"]))
         self.parent.devices.cold_startup()
-        if self.run_network(cycles):
-            self.cycles_completed += cycles
+        self.start_run(cycles)
 
     def on_continue_button(self, event):
         """Continue a previously run simulation.
@@ -1094,8 +1546,8 @@ class SidePanel(wx.Panel):
         if cycles is not None:  # if the number of cycles provided is valid
             if self.cycles_completed == 0:
                 print("Error! Nothing to continue. Run first.")
-            elif self.run_network(cycles):
-                self.cycles_completed += cycles
+            else:
+                self.start_run(cycles)
 
     def run_command(self):
         """Run the simulation from scratch.
@@ -1716,7 +2168,7 @@ class Gui(wx.Frame):
     Public methods
     --------------
 
-    closeWindow(self, event): Closes all frames
+    closeWindow(self, event): Stops any run and closes all frames
 
     """
 
@@ -1738,6 +2190,7 @@ class Gui(wx.Frame):
         self.devices = devices
         self.network = network
         self.monitors = monitors
+        self.breakpoints = Breakpoints(names, devices, network)
 
         self.cycles_completed = 0  # number of simulation cycles completed
 
@@ -1770,8 +2223,10 @@ class Gui(wx.Frame):
     def closeWindow(self, event):
         """Close all frames.
 
-        Shutdown everything.
+        Cancel any run and wait for its worker thread, then shutdown
+        everything.
         """
+        self.side_panel.stop_run()
         sys.exit()
 
 
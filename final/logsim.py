@@ -2,19 +2,35 @@
 """Parse command line options and arguments for the Logic Simulator.
 
 This script parses options and arguments specified on the command line, and
-runs either the command line user interface or the graphical user interface.
+runs either the command line user interface, a batch run or the graphical user
+interface. wx and the GUI modules are only imported for the graphical user
+interface, so the other modes run on machines without a display. Each mode
+imports only the modules it uses, so that batch runs start quickly.
 
 Usage
 -----
 Show help: logsim.py -h
-Command line user interface: logsim.py -c <file path>
+Command line user interface: logsim.py [--warp] [--timed] [--profile]
+                             [--script <script path>] -c <file path>
+Checkpointed command line user interface:
+    logsim.py --checkpoint <checkpoint path> [--interval N] [--resume]
+              -c <file path>
+Batch run: logsim.py [--cycles N] [--set <switch>=<level>]...
+                     [--monitor <signal>]... [--output <results path>]
+                     -b <file path>
+Switch sweep: logsim.py [--cycles N] [--workers N] -s <file path>
+Cold start-up analysis: logsim.py [--cycles N] [--seeds K] [--workers N]
+                        -m <file path>
 Graphical user interface: logsim.py <file path>
+
+A script path of - reads the commands of the script from stdin.
+
+A file path ending in .blif is imported as a BLIF netlist instead of being
+parsed as a definition file.
 """
+import contextlib
 import getopt
-import gui
 import sys
-import builtins
-import wx
 import io
 
 from names import Names
@@ -23,8 +39,79 @@ from network import Network
 from monitors import Monitors
 from scanner import Scanner
 from parse import Parser
-from userint import UserInterface
-from gui import Gui
+
+
+def load_network(path):
+    """Parse the definition file at path and build the network.
+
+    Return [names, devices, network, monitors, parser], or None if the file
+    cannot be opened or contains errors. For a BLIF netlist, parser is the
+    blif.Blif() instance that imported it.
+    """
+    # Initialise instances of the four inner simulator classes
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    if path.endswith(".blif"):
+        from blif import Blif  # only BLIF netlists need the importer
+        importer = Blif(names, devices, network, monitors)
+        if importer.import_file(path):
+            return [names, devices, network, monitors, importer]
+        print("\n".join(importer.errors))
+        return None
+    try:
+        """Open and return the file specified by path for reading"""
+        with open(path) as f:
+            content = f.readlines()
+        file = "".join(content)
+    except IOError:
+        print("error, can't find or open file")
+        return None
+    file = io.StringIO(file)
+    scanner = Scanner(path, file, names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    if parser.parse_network():
+        return [names, devices, network, monitors, parser]
+    return None
+
+
+def run_batch(loaded, cycles, switch_settings, monitor_names):
+    """Run a loaded network for a number of cycles without any prompts.
+
+    switch_settings is a list of [switch_name, level] to set first. If
+    monitor_names is not empty, those signals are monitored instead of the
+    monitors of the definition file. The traces are displayed in the text
+    console. Return True if successful.
+    """
+    [names, devices, network, monitors, parser] = loaded
+    for switch_name, level in switch_settings:
+        switch_id = names.query(switch_name)
+        if switch_id is None or \
+                not 0 <= level < 1 << devices.get_port_width(switch_id, None) \
+                or not devices.set_switch(switch_id, level):
+            print("".join(["Error! Invalid switch setting ", switch_name,
+                           "=", str(level), "."]))
+            return False
+    if monitor_names:
+        for device_id, output_id in list(monitors.monitors_dictionary):
+            monitors.remove_monitor(device_id, output_id)
+        for monitor_name in monitor_names:
+            [device_id, output_id] = devices.get_signal_ids(monitor_name)
+            if monitors.make_monitor(device_id, output_id) != \
+                    monitors.NO_ERROR:
+                print("".join(["Error! Could not monitor ", monitor_name,
+                               "."]))
+                return False
+
+    devices.cold_startup()
+    for _ in range(cycles):
+        if not network.execute_network():
+            print("Error! Network oscillating.")
+            return False
+        monitors.record_signals()
+    monitors.display_signals()
+    return True
 
 
 def main(arg_list):
@@ -37,41 +124,135 @@ def main(arg_list):
     """
     usage_message = ("Usage:\n"
                      "Show help: logsim.py -h\n"
-                     "Command line user interface: logsim.py -c <file path>\n"
+                     "Command line user interface: logsim.py [--warp] "
+                     "[--timed] [--profile] [--script <script path>] "
+                     "-c <file path>\n"
+                     "Checkpointed command line user interface: logsim.py "
+                     "--checkpoint <checkpoint path> [--interval N] "
+                     "[--resume] -c <file path>\n"
+                     "Batch run: logsim.py [--cycles N] "
+                     "[--set <switch>=<level>]... [--monitor <signal>]... "
+                     "[--output <results path>] -b <file path>\n"
+                     "Switch sweep: logsim.py [--cycles N] [--workers N] "
+                     "-s <file path>\n"
+                     "Cold start-up analysis: logsim.py [--cycles N] "
+                     "[--seeds K] [--workers N] -m <file path>\n"
                      "Graphical user interface: logsim.py <file path>")
     try:
-        options, arguments = getopt.getopt(arg_list, "hc:")
-    except getopt.GetoptError:
+        options, arguments = getopt.getopt(arg_list, "hc:s:m:b:",
+                                           ["cycles=", "workers=", "seeds=",
+                                            "checkpoint=", "interval=",
+                                            "resume", "warp", "timed",
+                                            "profile", "set=", "monitor=",
+                                            "output=", "script="])
+        settings = dict(options)
+        cycles = int(settings.get("--cycles", 10))
+        seeds = int(settings.get("--seeds", 10))
+        interval = int(settings.get("--interval", 1000))
+        workers = settings.get("--workers")
+        if workers is not None:
+            workers = int(workers)
+        # --set and --monitor may be given several times
+        switch_settings = []
+        for option, value in options:
+            if option == "--set":
+                [switch_name, level] = value.split("=")
+                switch_settings.append([switch_name, int(level, 0)])
+        monitor_names = [value for option, value in options
+                         if option == "--monitor"]
+    except (getopt.GetoptError, ValueError):
         print("Error: invalid command line arguments\n")
         print(usage_message)
-        sys.exit()
+        sys.exit(1)
+
+    # The long options do nothing in the graphical user interface
+    if options and not any(option in settings
+                           for option in ["-h", "-c", "-b", "-s", "-m"]):
+        print("Error: options need one of -c, -b, -s or -m\n")
+        print(usage_message)
+        sys.exit(1)
 
     for option, path in options:
-        print("option is", option, "path is", path)
+        if "-b" not in settings:  # keep the batch output free for scripts
+            print("option is", option, "path is", path)
         if option == "-h":  # print the usage message
             print(usage_message)
             sys.exit()
         elif option == "-c":  # use the command line user interface
-            # Initialise instances of the four inner simulator classes
-            names = Names()
-            devices = Devices(names)
-            network = Network(names, devices)
-            monitors = Monitors(names, devices, network)
-            try:
-                """Open and return the file specified by path for reading"""
-                with open(path) as f:
-                    content = f.readlines()
-                file = "".join(content)
-            except IOError:
-                print("error, can't find or open file")
-                sys.exit()
-            file = io.StringIO(file)
-            scanner = Scanner(path, file, names)
-            parser = Parser(names, devices, network, monitors, scanner)
-            if parser.parse_network():
+            from userint import UserInterface
+            from checkpoint import Checkpoint
+            loaded = load_network(path)
+            if loaded is not None:
+                [names, devices, network, monitors, parser] = loaded
+                # Skip quiet cycles between clock and siggen events
+                network.time_warp = "--warp" in settings
+                # Simulate with the propagation delays of the devices
+                network.set_timed("--timed" in settings)
+                # Count and time the device evaluations of every cycle
+                network.set_profiling("--profile" in settings)
+                checkpoint = None
+                if "--checkpoint" in settings:
+                    checkpoint = Checkpoint(settings["--checkpoint"], names,
+                                            devices, network, monitors)
                 # Initialise an instance of the userint.UserInterface() class
-                userint = UserInterface(names, devices, network, monitors)
-                userint.command_interface()
+                userint = UserInterface(names, devices, network, monitors,
+                                        checkpoint, interval)
+                if checkpoint is not None and "--resume" in settings:
+                    cycles_completed = checkpoint.load()
+                    if cycles_completed is None:
+                        print("Error! Could not resume from checkpoint.")
+                        sys.exit(1)
+                    userint.cycles_completed = cycles_completed
+                    print(" ".join(["Resumed after", str(cycles_completed),
+                                    "cycles."]))
+                if "--script" not in settings:
+                    userint.command_interface()
+                elif settings["--script"] == "-":
+                    userint.script_interface(sys.stdin)
+                else:
+                    try:
+                        with open(settings["--script"]) as script:
+                            userint.script_interface(script)
+                    except IOError:
+                        print("Error! Could not read the script.")
+                        sys.exit(1)
+                if "--profile" in settings:
+                    network.display_profile()
+        elif option == "-b":  # run without prompts, e.g. from scripts
+            # Messages from loading go to stderr, leaving only the results
+            with contextlib.redirect_stdout(sys.stderr):
+                loaded = load_network(path)
+            if loaded is None:
+                sys.exit(1)
+            if "--output" in settings:
+                with open(settings["--output"], "w") as output_file:
+                    with contextlib.redirect_stdout(output_file):
+                        succeeded = run_batch(loaded, cycles,
+                                              switch_settings, monitor_names)
+            else:
+                succeeded = run_batch(loaded, cycles, switch_settings,
+                                      monitor_names)
+            if not succeeded:
+                sys.exit(1)
+        elif option == "-s":  # sweep the switches set in SIGNALS
+            from batch import Netlist, Batch
+            loaded = load_network(path)
+            if loaded is not None:
+                [names, devices, network, monitors, parser] = loaded
+                netlist = Netlist(names, devices, network, monitors,
+                                  parser.signal_switch_ids)
+                batch = Batch(netlist, workers)
+                results = batch.run_sweep(cycles)
+                batch.display_sweep(results, monitors)
+        elif option == "-m":  # compare many seeded cold start-ups
+            from batch import Netlist, Batch
+            loaded = load_network(path)
+            if loaded is not None:
+                [names, devices, network, monitors, parser] = loaded
+                batch = Batch(Netlist(names, devices, network, monitors),
+                              workers)
+                results = batch.run_cold_starts(cycles, range(seeds))
+                batch.display_cold_starts(results)
 
     if not options:  # no option given, use the graphical user interface
 
@@ -79,6 +260,8 @@ def main(arg_list):
 
         Call the gui FrameManager to handle all operation.
         """
+        import gui  # only the graphical user interface needs wx and OpenGL
+
         language = sys.argv[-1]
 
         gui.FrameManager("Logic Simulator", language)
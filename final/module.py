@@ -0,0 +1,144 @@
+"""Compile and instantiate modules.
+
+Used in the Logic Simulator project to store every module of a circuit
+definition file once, as a flat template of devices and connections, and to
+copy the template into the network for each instance of the module.
+
+Classes
+-------
+Module - stores the compiled template of a module.
+"""
+
+
+class Module:
+
+    """Store the compiled template of a module.
+
+    A module is parsed once into its own Devices and Network instances. Its
+    devices, including those of the modules it uses, are then stored as a
+    flat list of device names and prototype Device objects, with their
+    connections as a list of indexes. An instance is made by copying these
+    lists into the network, with the instance name prefixed to every device
+    name, e.g. adder0.fa3.s.
+
+    Parameters
+    ----------
+    names: instance of the names.Names() class.
+    module_id: name ID of the module.
+
+    Public methods
+    --------------
+    compile(self, devices, instances): Stores the devices and connections of
+                                       the module body as the template.
+
+    add_input(self, port_id, device_name, input_id): Connects an input port
+                                  of the module to a device input.
+
+    add_output(self, port_id, device_name, output_id): Makes a device output
+                                  an output port of the module.
+
+    has_device(self, device_name): Returns True if the template contains the
+                                   device.
+
+    instantiate(self, devices, network, instance_name): Copies the template
+                                  into the network as a new instance.
+    """
+
+    def __init__(self, names, module_id):
+        """Initialise an empty template."""
+        self.names = names
+        self.module_id = module_id
+
+        # device_names stores the device names relative to an instance, such
+        # as "fa3.s", and prototypes stores the Device to copy for each
+        self.device_names = []
+        self.prototypes = []
+        self.device_indexes = {}  # {device_name: index in device_names}
+
+        # connection_list stores
+        # [input_device_index, input_id, output_device_index, output_id]
+        self.connection_list = []
+
+        # instances stores {instance_name: Module} for the instances of other
+        # modules made inside this one
+        self.instances = {}
+
+        # inputs stores {port_id: [[device_name, input_id]]} and outputs
+        # stores {port_id: [device_name, output_id]}
+        self.inputs = {}
+        self.outputs = {}
+
+    def compile(self, devices, instances):
+        """Store the devices and connections of the module body.
+
+        devices is the devices.Devices() instance the body was parsed into,
+        and instances maps the name IDs of the instances in the body to
+        their Module objects.
+        """
+        self.prototypes = list(devices.devices_list)
+        self.device_names = [self.names.get_name_string(device.device_id)
+                             for device in self.prototypes]
+        self.device_indexes = {device_name: index for index, device_name
+                               in enumerate(self.device_names)}
+        device_id_indexes = {device.device_id: index for index, device
+                             in enumerate(self.prototypes)}
+
+        self.connection_list = []
+        for input_index, device in enumerate(self.prototypes):
+            for input_id, connected_output in device.inputs.items():
+                if connected_output is None:  # left for an input port
+                    continue
+                (output_device_id, output_id) = connected_output
+                self.connection_list.append([
+                    input_index, input_id,
+                    device_id_indexes[output_device_id], output_id])
+
+        self.instances = {self.names.get_name_string(instance_id): module
+                          for instance_id, module in instances.items()}
+
+    def add_input(self, port_id, device_name, input_id):
+        """Connect an input port of the module to a device input.
+
+        A port may be connected to several device inputs. Return True if
+        successful.
+        """
+        if device_name not in self.device_indexes:
+            return False
+        self.inputs.setdefault(port_id, []).append([device_name, input_id])
+        return True
+
+    def add_output(self, port_id, device_name, output_id):
+        """Make a device output an output port of the module.
+
+        Return True if successful, or False if the device is not in the
+        module or the port is already defined.
+        """
+        if device_name not in self.device_indexes or \
+                port_id in self.outputs:
+            return False
+        self.outputs[port_id] = [device_name, output_id]
+        return True
+
+    def has_device(self, device_name):
+        """Return True if the template contains the named device."""
+        return device_name in self.device_indexes
+
+    def instantiate(self, devices, network, instance_name):
+        """Copy the template into the network as a new instance.
+
+        Every device name is prefixed with instance_name and a period.
+        Return True if successful, or False if a device name is in use.
+        """
+        device_ids = self.names.lookup([".".join([instance_name, device_name])
+                                        for device_name in self.device_names])
+        if any(devices.get_device(device_id) is not None
+               for device_id in device_ids):
+            return False
+
+        for device_id, prototype in zip(device_ids, self.prototypes):
+            devices.copy_device(prototype, device_id)
+        for [input_index, input_id, output_index,
+             output_id] in self.connection_list:
+            network.make_connection(device_ids[output_index], output_id,
+                                    device_ids[input_index], input_id)
+        return True
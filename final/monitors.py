@@ -5,10 +5,89 @@ signals.
 
 Classes
 -------
+Trigger - stores a trigger condition on an output signal.
 Monitors - records and displays specified output signals.
 
 """
 import collections
+import itertools
+import re
+import sys
+
+
+class Trigger:
+
+    """Store a trigger condition on an output signal.
+
+    Single-bit signals are compared as LOW or HIGH, so a FALLING or RISING
+    output counts as the level it is moving to. Bus values are compared
+    unchanged.
+
+    Parameters
+    ----------
+    devices: instance of the devices.Devices() class.
+    outputs: outputs dictionary of the watched device.
+    output_id: output ID of the watched signal.
+    trigger_kind: Trigger.RISE, Trigger.FALL, Trigger.LEVEL or
+                  Trigger.CHANGE.
+    level: signal level or bus value to match if trigger_kind is
+           Trigger.LEVEL, or to change to if trigger_kind is Trigger.CHANGE.
+    width: number of bits of the watched signal.
+
+    Public methods
+    --------------
+    get_signal(self): Returns the watched signal.
+
+    check(self): Returns True if the condition is met on this cycle.
+    """
+
+    # Trigger conditions: the signal rises, falls, equals a level, or
+    # changes (to level if it is not None)
+    trigger_kinds = [RISE, FALL, LEVEL, CHANGE] = range(4)
+
+    def __init__(self, devices, outputs, output_id, trigger_kind, level=None,
+                 width=1):
+        """Initialise trigger properties."""
+        self.devices = devices
+        self.outputs = outputs
+        self.output_id = output_id
+        self.trigger_kind = trigger_kind
+        self.level = level
+        self.width = width
+        self.previous = None  # signal seen on the previous cycle
+
+    def get_signal(self):
+        """Return the watched signal.
+
+        RISING and FALLING are returned as the levels they move to.
+        """
+        signal = self.outputs[self.output_id]
+        if self.width > 1:
+            return signal
+        elif signal == self.devices.RISING:
+            return self.devices.HIGH
+        elif signal == self.devices.FALLING:
+            return self.devices.LOW
+        return signal
+
+    def check(self):
+        """Return True if the condition is met on this cycle.
+
+        The current signal is kept, so the next check compares against it.
+        """
+        signal = self.get_signal()
+        previous = self.previous
+        self.previous = signal
+        if self.trigger_kind == self.RISE:
+            return signal == self.devices.HIGH and \
+                previous == self.devices.LOW
+        elif self.trigger_kind == self.FALL:
+            return signal == self.devices.LOW and \
+                previous == self.devices.HIGH
+        elif self.trigger_kind == self.LEVEL:
+            return signal == self.level
+        return signal != previous and \
+            (self.level is None or signal == self.level)
 
 
 class Monitors:
@@ -35,8 +114,29 @@ class Monitors:
     get_monitor_signal(self, device_id, output_id): Returns the signal level of
                                                     the specified monitor.
 
+    update_slots(self): Resolves the output and signal list of every monitor.
+
     record_signals(self): Records the current signal level of all monitors.
 
+    extend_signals(self, cycles): Records the current signal levels for the
+                                  specified number of unchanged cycles.
+
+    make_trigger(self, device_id, output_id, trigger_kind, level=None):
+                        Adds a trigger condition on the specified output.
+
+    set_trigger_window(self, pre_cycles, post_cycles): Sets how many cycles
+                        are kept before and after each trigger.
+
+    remove_triggers(self): Removes all trigger conditions.
+
+    trigger_fired(self): Returns True if any trigger fires on this cycle.
+
+    get_windows(self): Returns the [start_cycle, length] of every recorded
+                       window.
+
+    fork(self, network): Returns new monitors with copies of these traces,
+                         recording from the specified network.
+
     get_signal_names(self): Returns two lists of signal names: monitored and
                             not monitored.
 
@@ -44,7 +144,20 @@ class Monitors:
 
     get_margin(self): Returns the length of the longest monitor's name.
 
-    display_signals(self): Displays signal trace(s) in the text console.
+    display_signals(self, start=None, stop=None, wrap=None, compress=None):
+                        Displays signal trace(s) in the text console.
+
+    get_segments(self, start, stop): Returns the sample ranges of each
+                                     recorded window.
+
+    get_trace_string(self, signal_list): Returns the text console characters
+                                         for a list of signal levels.
+
+    get_bus_string(self, signal_list, width, run_length=None): Returns the
+                        text console hex values for a list of bus values.
+
+    compress_trace(self, trace, run_length): Returns the trace with long runs
+                                             of one character shortened.
     """
 
     def __init__(self, names, devices, network):
@@ -57,9 +170,43 @@ class Monitors:
         # {(device_id, output_id): [signal_list]}
         self.monitors_dictionary = collections.OrderedDict()
 
+        # monitor_slots stores one [outputs, output_id, signal_list] entry
+        # per monitor, in the same order as monitors_dictionary. The outputs
+        # dictionary of each monitored device is resolved once, when the
+        # monitor is made, so recording a cycle needs no device look-ups.
+        self.monitor_slots = []
+
         [self.NO_ERROR, self.NOT_OUTPUT,
          self.MONITOR_PRESENT] = self.names.unique_error_codes(3)
 
+        # Trigger conditions, as in the Trigger class
+        self.trigger_kinds = [self.RISE, self.FALL, self.LEVEL,
+                              self.CHANGE] = Trigger.trigger_kinds
+
+        # While any trigger is set, only cycles within pre_cycles before or
+        # post_cycles after a cycle on which a trigger fires are stored.
+        self.triggers = []
+        self.pre_cycles = 0
+        self.post_cycles = 0
+        self.pre_buffer = collections.deque(maxlen=0)
+        self.post_remaining = 0
+        self.cycles_seen = 0  # cycles offered to record_signals
+
+        # windows stores [start_cycle, length] for each run of stored cycles
+        self.windows = []
+
+        # Text console characters for each signal level
+        self.trace_characters = {self.devices.LOW: "_",
+                                 self.devices.HIGH: "-",
+                                 self.devices.RISING: "/",
+                                 self.devices.FALLING: "\\",
+                                 self.devices.BLANK: " "}
+        levels = bytes(self.trace_characters)
+        self.trace_table = bytes.maketrans(levels, "".join(
+            self.trace_characters.values()).encode())
+        self.trace_delete = bytes(level for level in range(256)
+                                  if level not in levels)
+
     def make_monitor(self, device_id, output_id, cycles_completed=0):
         """Add the specified signal to the monitors dictionary.
 
@@ -75,10 +222,15 @@ class Monitors:
         else:
             # If n simulation cycles have been completed before making this
             # monitor, then initialise the signal trace with an n-length list
-            # of BLANK signals. Otherwise, initialise the trace with an empty
-            # list.
+            # of BLANK signals, or of None for a bus, since BLANK is also a
+            # bus value. Otherwise, initialise the trace with an empty list.
+            if self.devices.get_port_width(device_id, output_id) > 1:
+                blank = None
+            else:
+                blank = self.devices.BLANK
             self.monitors_dictionary[(device_id, output_id)] = [
-                self.devices.BLANK] * cycles_completed
+                blank] * cycles_completed
+            self.update_slots()
             return self.NO_ERROR
 
     def remove_monitor(self, device_id, output_id):
@@ -90,6 +242,7 @@ class Monitors:
             return False
         else:
             del self.monitors_dictionary[(device_id, output_id)]
+            self.update_slots()
             return True
 
     def get_monitor_signal(self, device_id, output_id):
@@ -102,16 +255,143 @@ class Monitors:
         else:
             return None
 
+    def update_slots(self):
+        """Resolve the output and signal list of every monitor.
+
+        This must be called whenever monitors_dictionary changes, so that
+        record_signals can read every monitored output directly.
+        """
+        self.monitor_slots = []
+        for (device_id, output_id), signal_list in \
+                self.monitors_dictionary.items():
+            device = self.devices.get_device(device_id)
+            self.monitor_slots.append([device.outputs, output_id,
+                                       signal_list])
+
     def record_signals(self):
         """Record the current signal level for every monitor.
 
         This function is called at every simulation cycle.
         """
-        for device_id, output_id in self.monitors_dictionary:
-            signal_level = self.get_monitor_signal(device_id, output_id)
-            self.monitors_dictionary[(device_id,
-                                      output_id)].append(signal_level)
+        if self.triggers:
+            self.record_triggered()
+            return
+        for outputs, output_id, signal_list in self.monitor_slots:
+            signal_list.append(outputs[output_id])
+
+    def extend_signals(self, cycles):
+        """Record the current signal levels for a run of unchanged cycles.
+
+        This is used when Network.warp skips cycles in which no signal
+        changes.
+        """
+        if self.triggers:
+            for _ in range(cycles):
+                self.record_triggered()
+            return
+        for outputs, output_id, signal_list in self.monitor_slots:
+            signal_list.extend([outputs[output_id]] * cycles)
+
+    def record_triggered(self):
+        """Record the current cycle only if it lies within a trigger window.
+
+        Cycles before a trigger are held in a buffer of pre_cycles samples
+        and are discarded when they fall out of it.
+        """
+        cycle = self.cycles_seen
+        self.cycles_seen += 1
+        samples = [outputs[output_id]
+                   for outputs, output_id, _ in self.monitor_slots]
+
+        if self.trigger_fired():
+            for buffered_cycle, buffered_samples in self.pre_buffer:
+                self.store_samples(buffered_cycle, buffered_samples)
+            self.pre_buffer.clear()
+            self.store_samples(cycle, samples)
+            self.post_remaining = self.post_cycles
+        elif self.post_remaining > 0:
+            self.store_samples(cycle, samples)
+            self.post_remaining -= 1
+        else:
+            self.pre_buffer.append((cycle, samples))
+
+    def store_samples(self, cycle, samples):
+        """Append samples to the traces and extend the current window."""
+        for slot, signal in zip(self.monitor_slots, samples):
+            slot[2].append(signal)
+        if self.windows and sum(self.windows[-1]) == cycle:
+            self.windows[-1][1] += 1
+        else:
+            self.windows.append([cycle, 1])
+
+    def make_trigger(self, device_id, output_id, trigger_kind, level=None):
+        """Add a trigger condition on the specified output.
+
+        The trigger fires on the cycle the signal rises (RISE), falls (FALL),
+        changes to level or at all if level is None (CHANGE), or on every
+        cycle it equals level (LEVEL). Return NO_ERROR if successful, or the
+        corresponding error if not.
+        """
+        device = self.devices.get_device(device_id)
+        if device is None:
+            return self.network.DEVICE_ABSENT
+        elif output_id not in device.outputs:
+            return self.NOT_OUTPUT
+        else:
+            self.triggers.append(Trigger(
+                self.devices, device.outputs, output_id, trigger_kind, level,
+                self.devices.get_port_width(device_id, output_id)))
+            return self.NO_ERROR
+
+    def set_trigger_window(self, pre_cycles, post_cycles):
+        """Set how many cycles are kept before and after each trigger."""
+        self.pre_cycles = pre_cycles
+        self.post_cycles = post_cycles
+        self.pre_buffer = collections.deque(self.pre_buffer,
+                                            maxlen=pre_cycles)
+
+    def remove_triggers(self):
+        """Remove all trigger conditions and return to continuous recording."""
+        self.triggers = []
+        self.pre_buffer.clear()
+        self.post_remaining = 0
+
+    def trigger_fired(self):
+        """Return True if any trigger condition is met on this cycle.
+
+        Every trigger is updated, so each one always compares against the
+        signal level of the previous cycle.
+        """
+        fired = False
+        for trigger in self.triggers:
+            if trigger.check():
+                fired = True
+        return fired
+
+    def get_windows(self):
+        """Return the [start_cycle, length] of every recorded window.
+
+        Without triggers, the whole run is a single window.
+        """
+        if self.triggers or self.windows:
+            return self.windows
+        for signal_list in self.monitors_dictionary.values():
+            return [[0, len(signal_list)]]
+        return []
 
+    def fork(self, network):
+        """Return new monitors that record from the specified network.
+
+        network is normally made by Network.fork. The monitors and their
+        traces so far are copied; triggers are not.
+        """
+        forked_monitors = Monitors(self.names, network.devices, network)
+        for (device_id, output_id), signal_list in \
+                self.monitors_dictionary.items():
+            forked_monitors.monitors_dictionary[(device_id, output_id)] = \
+                list(signal_list)
+        forked_monitors.update_slots()
+        return forked_monitors
 
     def get_signal_names(self):
         """Return two signal name lists: monitored and not monitored."""
@@ -138,6 +418,14 @@ class Monitors:
         """
         for device_id, output_id in self.monitors_dictionary:
             self.monitors_dictionary[(device_id, output_id)] = []
+        self.update_slots()
+
+        self.pre_buffer.clear()
+        self.post_remaining = 0
+        self.cycles_seen = 0
+        self.windows = []
+        for trigger in self.triggers:
+            trigger.previous = None
 
     def get_margin(self):
         """Return the length of the longest monitor's name.
@@ -156,23 +444,112 @@ class Monitors:
         else:
             return None
 
-    def display_signals(self):
-        """Display the signal trace(s) in the text console."""
+    def display_signals(self, start=None, stop=None, wrap=None,
+                        compress=None):
+        """Display the signal trace(s) in the text console.
+
+        Only the samples from start up to (not including) stop are shown. If
+        compress is given, runs longer than compress samples are written as
+        the signal character, "x", the run length and the signal character
+        again, e.g. "-x1000-". If wrap is given, traces are split into blocks
+        of at most wrap characters. The output is written in one call. Buses
+        are displayed in hex. Trigger windows are recorded one after another,
+        so the samples of separate windows are divided by "|".
+        """
         margin = self.get_margin()
+        segments = self.get_segments(start, stop)
+        traces = []
         for device_id, output_id in self.monitors_dictionary:
             monitor_name = self.devices.get_signal_name(device_id, output_id)
-            name_length = len(monitor_name)
             signal_list = self.monitors_dictionary[(device_id, output_id)]
-            print(monitor_name + (margin - name_length) * " ", end=": ")
-            for signal in signal_list:
-                if signal == self.devices.HIGH:
-                    print("-", end="")
-                if signal == self.devices.LOW:
-                    print("_", end="")
-                if signal == self.devices.RISING:
-                    print("/", end="")
-                if signal == self.devices.FALLING:
-                    print("\\", end="")
-                if signal == self.devices.BLANK:
-                    print(" ", end="")
-            print("\n", end="")
+            width = self.devices.get_port_width(device_id, output_id)
+            trace_strings = []
+            for segment_start, segment_stop in segments:
+                if width > 1:
+                    trace = self.get_bus_string(
+                        signal_list[segment_start:segment_stop], width,
+                        compress)
+                else:
+                    trace = self.get_trace_string(
+                        signal_list[segment_start:segment_stop])
+                    if compress is not None:
+                        trace = self.compress_trace(trace, compress)
+                trace_strings.append(trace)
+            separator = " | " if width > 1 else "|"
+            traces.append([monitor_name + (margin - len(monitor_name)) * " ",
+                           separator.join(trace_strings)])
+
+        lines = []
+        if wrap is None or not traces:
+            for name, trace in traces:
+                lines.append("".join([name, ": ", trace, "\n"]))
+        else:
+            longest = max(len(trace) for _, trace in traces)
+            for position in range(0, max(longest, 1), wrap):
+                if position > 0:
+                    lines.append("\n")
+                for name, trace in traces:
+                    lines.append("".join([name, ": ",
+                                          trace[position:position + wrap],
+                                          "\n"]))
+        sys.stdout.write("".join(lines))
+
+    def get_segments(self, start, stop):
+        """Return the [start, stop] sample ranges of each recorded window.
+
+        Only the samples from start up to (not including) stop are included.
+        Samples recorded after the triggers were removed form one more range.
+        Without several trigger windows, [[start, stop]] is returned.
+        """
+        if len(self.windows) < 2 or not self.monitors_dictionary:
+            return [[start, stop]]
+        samples = max(len(signal_list) for signal_list
+                      in self.monitors_dictionary.values())
+        [start, stop, _] = slice(start, stop).indices(samples)
+        segments = []
+        window_start = 0
+        for _, length in self.windows + [[None, samples]]:
+            window_stop = min(window_start + length, samples)
+            if max(start, window_start) < min(stop, window_stop):
+                segments.append([max(start, window_start),
+                                 min(stop, window_stop)])
+            window_start = window_stop
+        return segments
+
+    def get_trace_string(self, signal_list):
+        """Return the text console characters for a list of signal levels."""
+        try:
+            return bytes(signal_list).translate(
+                self.trace_table, self.trace_delete).decode()
+        except (TypeError, ValueError):  # not every entry is a signal level
+            return "".join([self.trace_characters.get(signal, "")
+                            for signal in signal_list])
+
+    def get_bus_string(self, signal_list, width, run_length=None):
+        """Return the text console hex values for a list of bus values.
+
+        Every sample is written as a hex number of (width + 3) // 4 digits,
+        separated by spaces, with blanks for None. Runs longer than
+        run_length are written as the value, "x" and the run length, and the
+        value again, e.g. "0a x1000 0a".
+        """
+        digits = (width + 3) // 4
+        hex_format = "".join(["{:0", str(digits), "x}"])
+        words = []
+        for signal, run in itertools.groupby(signal_list):
+            word = digits * " " if signal is None else hex_format.format(signal)
+            count = sum(1 for _ in run)
+            if run_length is not None and count > run_length >= 1:
+                words.extend([word, "".join(["x", str(count)]), word])
+            else:
+                words.extend(count * [word])
+        return " ".join(words)
+
+    def compress_trace(self, trace, run_length):
+        """Return the trace with runs longer than run_length shortened."""
+        if run_length < 1:
+            return trace
+        pattern = re.compile("".join(["(.)\\1{", str(run_length), ",}"]))
+        return pattern.sub(lambda match: "".join([
+            match.group(1), "x", str(len(match.group(0))), match.group(1)]),
+            trace)
@@ -39,6 +39,8 @@ class Names:
         """Initialise names list."""
         self.error_code_count = 0  # how many error codes have been declared
         self.names = []
+        # name_index stores {name_string: name_id} for fast look-ups
+        self.name_index = {}
 
     def unique_error_codes(self, num_error_codes):
         """Return a list of unique integer error codes."""
@@ -56,13 +58,8 @@ class Names:
         # raise TypeError if name_string isn't a string
         if not isinstance(name_string, str):
             raise TypeError("Only strings are allowed as inputs to query")
-        # iterate through all indeces of names list
-        for i in range(len(self.names)):
-            # return index whose name == name_stirng
-            if self.names[i] == name_string:
-                return i
-        # return none if return hasn't been called in for loop
-        return None
+        # return none if the name string has not been added
+        return self.name_index.get(name_string)
 
     def lookup(self, name_string_list):
         """Return a list of name IDs for each name string in name_string_list.
@@ -70,26 +67,16 @@ class Names:
         If the name string is not present in the names list, add it.
         """
         name_ids = []
-        # boolean to determine whether a name in name_string_list
-        # is in names of instance
         for n in name_string_list:
-            present = False
-            for i in range(len(self.names)):
-                if self.names[i] == n:
-                    name_ids.append(i)
-                    present = True
-                    # if a name in name_string_list is found,
-                    # change present to true and break loop
-                    break
-            if(present is False):
-                # if a name in name_string_list isn't found,
-                # add to names list of instance
-                # and add its name_id to the name_ids list
-                # add length of names to name_ids before adding new name,
-                # since length of old names list will be the index of the
-                # new name
-                name_ids.append(len(self.names))
+            name_id = self.name_index.get(n)
+            if name_id is None:
+                # if a name in name_string_list isn't found, add it to the
+                # names list of instance; the length of the old names list
+                # is the index of the new name
+                name_id = len(self.names)
                 self.names.append(n)
+                self.name_index[n] = name_id
+            name_ids.append(name_id)
         return name_ids
 
     def get_name_string(self, name_id):
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""Generate large circuit definition files for scaling tests.
+
+Used in the Logic Simulator project to write valid definition files of a
+requested size and shape, so that the scanner, parser and simulator can be
+measured on realistic large inputs.
+
+Usage
+-----
+Show help: netgen.py -h
+Generate a file: netgen.py [--seed N] [--depth N] [--fanout N]
+                 [--sequential F] <shape> <size> <file path>
+
+where shape is one of dag, adder, shift, clocktree, testbench or latches,
+and size is the number of gates, bits, stages, levels or latches.
+
+Classes
+-------
+Netgen - builds the text of a definition file from circuit shapes.
+"""
+import getopt
+import random
+import sys
+
+
+class Netgen:
+
+    """Build the text of a definition file from circuit shapes.
+
+    Shapes are added one after the other, each with its own name prefix, so
+    that several shapes can be combined into one file. Device names are the
+    prefix followed by a role in capitals and a number, e.g. dagG12.
+
+    Parameters
+    ----------
+    seed: optional seed for the random choices.
+
+    Public methods
+    --------------
+    add_dag(self, gates, depth, fanout=4, sequential=0.0, inputs=None,
+            prefix="dag", siggen_inputs=False): Adds a random combinational
+                  DAG, with a fraction of D-types if sequential is given.
+
+    add_ripple_adder(self, bits, prefix="add"): Adds a ripple-carry adder.
+
+    add_shift_register(self, stages, prefix="shift"): Adds a shift register
+                                                      of D-types.
+
+    add_clock_tree(self, levels, fanout=2, prefix="tree"): Adds a clock
+                  distributed by a tree of buffers to toggling D-types.
+
+    add_testbench(self, gates, depth, fanout=4, sequential=0.0,
+                  prefix="tb"): Adds a random DAG driven by siggens.
+
+    add_latches(self, count, prefix="latch"): Adds cross-coupled NAND
+                                              latches.
+
+    add_device(self, name, definition): Adds a device definition.
+
+    connect(self, source, destination): Adds a connection.
+
+    get_definition(self): Returns the text of the definition file.
+
+    write(self, path): Writes the definition file to path.
+    """
+
+    gate_kinds = ["AND", "OR", "NAND", "NOR", "XOR"]
+
+    def __init__(self, seed=None):
+        """Initialise the sections of the definition file."""
+        self.random = random.Random(seed)
+        self.device_lines = []
+        self.connection_lines = []
+        self.signal_lines = []
+        self.monitor_lines = []
+
+    def add_device(self, name, definition):
+        """Add a device definition, e.g. "NAND inputs 2"."""
+        self.device_lines.append("".join([name, " = ", definition, ";"]))
+
+    def connect(self, source, destination):
+        """Add a connection from a source output to a destination input."""
+        self.connection_lines.append("".join([source, " - ", destination,
+                                              ";"]))
+
+    def add_switch(self, name, level):
+        """Add a switch set to level in the SIGNALS section."""
+        self.add_device(name, "SWITCH")
+        self.signal_lines.append("".join([name, " = ", str(level), ";"]))
+
+    def add_d_type(self, name, data, clock, zero):
+        """Add a D-type with its DATA, CLK, SET and CLEAR connected."""
+        self.add_device(name, "DTYPE")
+        self.connect(data, "".join([name, ".DATA"]))
+        self.connect(clock, "".join([name, ".CLK"]))
+        self.connect(zero, "".join([name, ".SET"]))
+        self.connect(zero, "".join([name, ".CLEAR"]))
+
+    def add_monitor(self, signal_name):
+        """Monitor the named signal."""
+        self.monitor_lines.append("".join([signal_name, ";"]))
+
+    def get_pulse(self):
+        """Return a random siggen pulse of 4 to 16 bits."""
+        return "".join(self.random.choice("01") for _ in
+                       range(self.random.randint(4, 16)))
+
+    def add_dag(self, gates, depth, fanout=4, sequential=0.0, inputs=None,
+                prefix="dag", siggen_inputs=False):
+        """Add a random combinational DAG of gates in depth levels.
+
+        Every gate takes its first input from the level before it, so that
+        the longest path has depth gates, and its other inputs from any
+        earlier level. Outputs are chosen so that none drives more than
+        fanout inputs where possible. A fraction sequential of the gates are
+        made D-types on a shared clock instead. The DAG is driven by inputs
+        switches, or siggens if siggen_inputs is True.
+        """
+        depth = max(1, min(depth, gates))
+        if inputs is None:
+            inputs = max(2, gates // 16)
+        loads = {}  # {output name: number of inputs driven}
+        levels = [[]]
+        for index in range(inputs):
+            name = "".join([prefix, "IN", str(index)])
+            if siggen_inputs:
+                self.add_device(name, "".join(["SIGGEN pulse ",
+                                               self.get_pulse()]))
+            else:
+                self.add_switch(name, self.random.randint(0, 1))
+            levels[0].append(name)
+            loads[name] = 0
+        earlier = list(levels[0])
+
+        clock = "".join([prefix, "CLK"])
+        zero = "".join([prefix, "ZERO"])
+        if sequential > 0:
+            self.add_device(clock, "CLOCK halfperiod 2")
+        if sequential > 0 or siggen_inputs:
+            # The SIGNALS section must set a switch, even in a testbench
+            self.add_switch(zero, 0)
+
+        def choose(pool):
+            # Prefer an output that is below the fanout limit
+            for _ in range(8):
+                source = self.random.choice(pool)
+                if loads[source] < fanout:
+                    break
+            loads[source] += 1
+            return source
+
+        for level in range(1, depth + 1):
+            level_names = []
+            level_gates = gates // depth + (level <= gates % depth)
+            for _ in range(level_gates):
+                index = len(loads) - inputs
+                if self.random.random() < sequential:
+                    name = "".join([prefix, "D", str(index)])
+                    self.add_d_type(name, choose(levels[-1]), clock, zero)
+                    output = "".join([name, ".Q"])
+                else:
+                    name = "".join([prefix, "G", str(index)])
+                    kind = self.random.choice(self.gate_kinds)
+                    input_count = 2 if kind == "XOR" else \
+                        self.random.randint(2, 4)
+                    self.add_device(name, "".join([kind, " inputs ",
+                                                   str(input_count)]))
+                    sources = [choose(levels[-1])] + \
+                        [choose(earlier) for _ in range(input_count - 1)]
+                    for input_number, source in enumerate(sources, 1):
+                        self.connect(source, "".join([name, ".I",
+                                                      str(input_number)]))
+                    output = name
+                loads[output] = 0
+                level_names.append(output)
+            levels.append(level_names)
+            earlier.extend(level_names)
+
+        for output in levels[-1][:8]:
+            self.add_monitor(output)
+
+    def add_ripple_adder(self, bits, prefix="add"):
+        """Add a ripple-carry adder of bits full adders.
+
+        The operands are switches set to random values, and the carry in is
+        a switch set to 0. The sums and the carry out are monitored.
+        """
+        carry = "".join([prefix, "CIN"])
+        self.add_switch(carry, 0)
+        for bit in range(bits):
+            [a, b, half_sum, total, first_carry, second_carry,
+             carry_out] = ["".join([prefix, role, str(bit)]) for role in
+                           ["A", "B", "X", "S", "P", "Q", "C"]]
+            self.add_switch(a, self.random.randint(0, 1))
+            self.add_switch(b, self.random.randint(0, 1))
+            self.add_device(half_sum, "XOR inputs 2")
+            self.add_device(total, "XOR inputs 2")
+            self.add_device(first_carry, "AND inputs 2")
+            self.add_device(second_carry, "AND inputs 2")
+            self.add_device(carry_out, "OR inputs 2")
+            for source, destination in [
+                    (a, half_sum + ".I1"), (b, half_sum + ".I2"),
+                    (half_sum, total + ".I1"), (carry, total + ".I2"),
+                    (a, first_carry + ".I1"), (b, first_carry + ".I2"),
+                    (half_sum, second_carry + ".I1"),
+                    (carry, second_carry + ".I2"),
+                    (first_carry, carry_out + ".I1"),
+                    (second_carry, carry_out + ".I2")]:
+                self.connect(source, destination)
+            self.add_monitor(total)
+            carry = carry_out
+        self.add_monitor(carry)
+
+    def add_shift_register(self, stages, prefix="shift"):
+        """Add a shift register of D-types fed by a siggen.
+
+        The first and last stages are monitored.
+        """
+        clock = "".join([prefix, "CLK"])
+        zero = "".join([prefix, "ZERO"])
+        data = "".join([prefix, "IN"])
+        self.add_device(clock, "CLOCK halfperiod 1")
+        self.add_switch(zero, 0)
+        self.add_device(data, "".join(["SIGGEN pulse ", self.get_pulse()]))
+        for stage in range(stages):
+            name = "".join([prefix, "D", str(stage)])
+            self.add_d_type(name, data, clock, zero)
+            data = "".join([name, ".Q"])
+        self.add_monitor("".join([prefix, "D0.Q"]))
+        self.add_monitor(data)
+
+    def add_clock_tree(self, levels, fanout=2, prefix="tree"):
+        """Add a clock distributed by a tree of buffers.
+
+        Every buffer of the last level clocks a D-type that toggles, with
+        its QBAR output fed back to its DATA input. Two leaves are monitored.
+        """
+        clock = "".join([prefix, "CLK"])
+        zero = "".join([prefix, "ZERO"])
+        self.add_device(clock, "CLOCK halfperiod 1")
+        self.add_switch(zero, 0)
+        branches = [clock]
+        buffers = 0
+        for _ in range(levels):
+            next_branches = []
+            for branch in branches:
+                for _ in range(fanout):
+                    name = "".join([prefix, "B", str(buffers)])
+                    buffers += 1
+                    self.add_device(name, "AND inputs 1")
+                    self.connect(branch, "".join([name, ".I1"]))
+                    next_branches.append(name)
+            branches = next_branches
+        for leaf, branch in enumerate(branches):
+            name = "".join([prefix, "D", str(leaf)])
+            self.add_d_type(name, "".join([name, ".QBAR"]), branch, zero)
+        self.add_monitor("".join([prefix, "D0.Q"]))
+        self.add_monitor("".join([prefix, "D", str(len(branches) - 1),
+                                  ".Q"]))
+
+    def add_testbench(self, gates, depth, fanout=4, sequential=0.0,
+                      prefix="tb"):
+        """Add a random DAG whose inputs are siggens with random pulses."""
+        self.add_dag(gates, depth, fanout, sequential, prefix=prefix,
+                     siggen_inputs=True)
+
+    def add_latches(self, count, prefix="latch"):
+        """Add cross-coupled NAND latches.
+
+        Each latch has active-low set and reset switches, one of which is
+        set to 0 so that the latch starts in a known state. The first latches
+        are monitored.
+        """
+        for latch in range(count):
+            [set_name, reset_name, q, qbar] = [
+                "".join([prefix, role, str(latch)])
+                for role in ["S", "R", "Q", "N"]]
+            set_level = self.random.randint(0, 1)
+            self.add_switch(set_name, set_level)
+            self.add_switch(reset_name, 1 - set_level)
+            self.add_device(q, "NAND inputs 2")
+            self.add_device(qbar, "NAND inputs 2")
+            self.connect(set_name, "".join([q, ".I1"]))
+            self.connect(qbar, "".join([q, ".I2"]))
+            self.connect(reset_name, "".join([qbar, ".I1"]))
+            self.connect(q, "".join([qbar, ".I2"]))
+            if latch < 4:
+                self.add_monitor(q)
+
+    def get_definition(self):
+        """Return the text of the definition file."""
+        sections = []
+        for heading, lines in [("DEVICES", self.device_lines),
+                               ("CONNECTIONS", self.connection_lines),
+                               ("SIGNALS", self.signal_lines),
+                               ("MONITOR", self.monitor_lines)]:
+            sections.append("".join(["    ", heading, "{\n"]))
+            sections.extend("".join(["        ", line, "\n"])
+                            for line in lines)
+            sections.append("    }\n")
+        return "".join(["NETWORK{\n"] + sections + ["}\n"])
+
+    def write(self, path):
+        """Write the definition file to path."""
+        with open(path, "w") as definition_file:
+            definition_file.write(self.get_definition())
+
+
+def main(arg_list):
+    """Parse the command line options and arguments and write the file."""
+    usage_message = ("Usage:\n"
+                     "Show help: netgen.py -h\n"
+                     "Generate a file: netgen.py [--seed N] [--depth N] "
+                     "[--fanout N] [--sequential F] <shape> <size> "
+                     "<file path>\n"
+                     "Shapes: dag, adder, shift, clocktree, testbench, "
+                     "latches")
+    try:
+        options, arguments = getopt.getopt(arg_list, "h",
+                                           ["seed=", "depth=", "fanout=",
+                                            "sequential="])
+        settings = dict(options)
+        if "-h" in settings:
+            print(usage_message)
+            sys.exit()
+        seed = settings.get("--seed")
+        if seed is not None:
+            seed = int(seed)
+        fanout = int(settings.get("--fanout", 4))
+        sequential = float(settings.get("--sequential", 0))
+        [shape, size, path] = arguments
+        size = int(size)
+        depth = int(settings.get("--depth", max(1, size // 100)))
+    except (getopt.GetoptError, ValueError):
+        print("Error: invalid command line arguments\n")
+        print(usage_message)
+        sys.exit()
+
+    netgen = Netgen(seed)
+    if shape == "dag":
+        netgen.add_dag(size, depth, fanout, sequential)
+    elif shape == "adder":
+        netgen.add_ripple_adder(size)
+    elif shape == "shift":
+        netgen.add_shift_register(size)
+    elif shape == "clocktree":
+        netgen.add_clock_tree(size, fanout)
+    elif shape == "testbench":
+        netgen.add_testbench(size, depth, fanout, sequential)
+    elif shape == "latches":
+        netgen.add_latches(size)
+    else:
+        print("Error: unknown shape\n")
+        print(usage_message)
+        sys.exit()
+    netgen.write(path)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -6,6 +6,9 @@ Classes
 --------
 Network - builds and executes the network.
 """
+import array
+import copy
+import time
 
 
 class Network:
@@ -44,6 +47,9 @@ class Network:
 
     execute_switch(self, device_id): Simulates a switch press.
 
+    get_bus_signal(self, device, input_signals): Returns the output value of a
+                                                 bus gate.
+
     execute_gate(self, device_id, x=None, y=None): Simulates a logic gate and
                                               updates its output signal value.
 
@@ -56,8 +62,65 @@ class Network:
     update_clocks(self): If it is time to do so, sets clock signals to RISING
                          or FALLING.
 
+    find_components(self, device_ids, fanout): Returns the strongly
+                        connected components of a connection graph.
+
+    update_components(self): Orders the devices for execution using the
+                             connection graph.
+
+    execute_loop(self, gate_list): Executes the gates of a feedback loop until
+                                   they settle.
+
+    get_state(self, devices_list): Returns the output signals and memory of
+                                   the devices.
+
+    find_oscillating_loop(self, previous_state, state): Returns the names of
+                          the devices in the loop that oscillates.
+
     execute_network(self): Executes all the devices in the network for one
                            simulation cycle.
+
+    set_timed(self, timed): Switches timed mode on or off.
+
+    start_timed(self): Starts the timing wheel for timed mode.
+
+    update_timed(self): Resolves the connections and delays of the devices
+                        for timed mode.
+
+    get_timed_inputs(self, device): Returns the input signals of a device in
+                                    timed mode.
+
+    schedule(self, device, output_id, signal): Schedules an output of a
+                                     device to change after its delay.
+
+    evaluate_timed(self, device): Evaluates a gate or D-type and schedules
+                                  its new outputs.
+
+    execute_timed(self): Executes one cycle of the network in timed mode.
+
+    snapshot(self): Returns a compact copy of the simulation state.
+
+    restore(self, state): Returns the simulation to a state saved by
+                          snapshot.
+
+    fork(self): Returns a new network that continues independently from the
+                current simulation state.
+
+    get_quiet_cycles(self, max_cycles): Returns the number of cycles before
+                                        the next clock or siggen event.
+
+    warp(self, max_cycles): Skips the quiet cycles before the next clock or
+                            siggen event and returns how many were skipped.
+
+    set_profiling(self, profiling): Switches the profiling of
+                                    execute_network on or off.
+
+    get_profile(self): Returns the statistics collected while profiling.
+
+    reset_profile(self): Clears the statistics collected while profiling.
+
+    display_profile(self): Displays the profiling statistics in the text
+                           console.
     """
 
     def __init__(self, names, devices):
@@ -66,10 +129,61 @@ class Network:
         self.devices = devices
 
         [self.NO_ERROR, self.INPUT_TO_INPUT, self.OUTPUT_TO_OUTPUT,
-         self.INPUT_CONNECTED, self.PORT_ABSENT,
-         self.DEVICE_ABSENT] = self.names.unique_error_codes(6)
+         self.INPUT_CONNECTED, self.PORT_ABSENT, self.DEVICE_ABSENT,
+         self.WIDTH_MISMATCH] = self.names.unique_error_codes(7)
         self.steady_state = True  # for checking if signals have settled
 
+        # In time warp mode, callers may skip the quiet cycles between clock
+        # and siggen events using warp()
+        self.time_warp = False
+        # True if nothing changed in the last cycle after its first pass
+        self.quiescent = False
+
+        # Devices in execution order, found by update_components when the
+        # network changes
+        self.gate_components = None
+        self.feedback_components = []
+        self.d_type_loop_devices = []
+        self.component_device_count = 0
+        # Names of the devices in the loop found oscillating, if any
+        self.oscillating_loop = []
+        # Loops of gates that did not settle in the current pass
+        self.unsettled_loops = []
+
+        # gate_parameters stores {gate_kind: (x, y)} for execute_gate, in
+        # the order gates are executed
+        self.gate_parameters = {
+            self.devices.AND: (self.devices.HIGH, self.devices.HIGH),
+            self.devices.OR: (self.devices.LOW, self.devices.LOW),
+            self.devices.NAND: (self.devices.HIGH, self.devices.LOW),
+            self.devices.NOR: (self.devices.LOW, self.devices.HIGH),
+            self.devices.XOR: (None, None)}
+        # gate_levels stores {signal: level} for the inputs of execute_gate
+        self.gate_levels = {
+            self.devices.LOW: self.devices.LOW,
+            self.devices.HIGH: self.devices.HIGH,
+            self.devices.RISING: self.devices.HIGH,
+            self.devices.FALLING: self.devices.LOW}
+
+        # In timed mode, gates and D-types change their outputs a number of
+        # cycles after their inputs, using a timing wheel started by
+        # start_timed
+        self.timed = False
+        self.time = 0
+        self.timing_wheel = None
+        self.timed_inputs = None
+        self.timed_device_count = 0
+
+        # Passes made by the last call of execute_network to settle
+        self.iterations = 0
+        # When profiling, the execution methods are wrapped to collect the
+        # statistics in profile, which is None otherwise
+        self.profile = None
+        self.profiled_methods = ["execute_switch", "execute_gate",
+                                 "execute_d_type", "execute_clock",
+                                 "execute_siggen", "evaluate_timed",
+                                 "execute_network"]
+
     def get_connected_output(self, device_id, input_id):
         """Return the output connected to the given input.
 
@@ -127,9 +241,16 @@ class Network:
                 # Both ports are inputs
                 error_type = self.INPUT_TO_INPUT
             elif second_port_id in second_device.outputs:
+                if self.devices.get_port_width(first_device_id,
+                                               first_port_id) != \
+                        self.devices.get_port_width(second_device_id,
+                                                    second_port_id):
+                    return self.WIDTH_MISMATCH
                 # Make connection
                 first_device.inputs[first_port_id] = (second_device_id,
                                                       second_port_id)
+                self.gate_components = None
+                self.timed_inputs = None
                 error_type = self.NO_ERROR
             else:  # second_port_id is not a valid input or output port
                 error_type = self.PORT_ABSENT
@@ -142,9 +263,16 @@ class Network:
                 if second_device.inputs[second_port_id] is not None:
                     # Input is already in a connection
                     error_type = self.INPUT_CONNECTED
+                elif self.devices.get_port_width(first_device_id,
+                                                 first_port_id) != \
+                        self.devices.get_port_width(second_device_id,
+                                                    second_port_id):
+                    error_type = self.WIDTH_MISMATCH
                 else:
                     second_device.inputs[second_port_id] = (first_device_id,
                                                             first_port_id)
+                    self.gate_components = None
+                    self.timed_inputs = None
                     error_type = self.NO_ERROR
             else:
                 error_type = self.PORT_ABSENT
@@ -205,6 +333,11 @@ class Network:
         """
         device = self.devices.get_device(device_id)
         target = device.switch_state
+        if device.width is not None:  # a bus changes in a single step
+            if device.outputs[None] != target:
+                device.outputs[None] = target
+                self.steady_state = False
+            return True
         signal = self.get_output_signal(device_id, output_id=None)
         # Update and store the updated signal
         updated_signal = self.update_signal(signal, target)
@@ -214,6 +347,31 @@ class Network:
             device.outputs[None] = updated_signal
             return True
 
+    def get_bus_signal(self, device, input_signals):
+        """Return the output value of a bus gate.
+
+        The gate is applied to every bit at once, as one integer operation
+        per input.
+        """
+        (x, y) = self.gate_parameters[device.device_kind]
+        mask = (1 << device.width) - 1
+        if x is None:  # XOR
+            output_signal = 0
+            for input_signal in input_signals:
+                output_signal ^= input_signal
+            return output_signal
+        if x == self.devices.HIGH:  # AND and NAND
+            output_signal = mask
+            for input_signal in input_signals:
+                output_signal &= input_signal
+        else:  # OR and NOR
+            output_signal = 0
+            for input_signal in input_signals:
+                output_signal |= input_signal
+        if x != y:  # NAND and NOR
+            output_signal ^= mask
+        return output_signal
+
     def execute_gate(self, device_id, x=None, y=None):
         """Simulate a logic gate and update its output signal value.
 
@@ -229,14 +387,26 @@ class Network:
             input_signal = self.get_input_signal(device_id, input_id)
             if input_signal is None:  # this input is unconnected
                 return False
+            if device.width is not None:
+                input_signal_list.append(input_signal)
+                continue
+            # A signal that is RISING or FALLING counts as the level it is
+            # moving to, so a change reaches every later gate in one pass
+            input_signal = self.gate_levels.get(input_signal, input_signal)
             input_signal_list.append(input_signal)
-
             if device.device_kind != self.devices.XOR:
                 if input_signal != x:
                     output_signal = self.invert_signal(y)
                     break
                 output_signal = y
 
+        if device.width is not None:  # a bus changes in a single step
+            output_signal = self.get_bus_signal(device, input_signal_list)
+            if device.outputs[None] != output_signal:
+                device.outputs[None] = output_signal
+                self.steady_state = False
+            return True
+
         if device.device_kind == self.devices.XOR:
             # Output is high only if both inputs are different
             if input_signal_list[0] == input_signal_list[1]:  # assume 2 inputs
@@ -273,6 +443,10 @@ class Network:
             elif input_id == self.devices.SET_ID:
                 set_signal = input_signal
 
+        if device.width is not None:
+            return self.execute_bus_d_type(device, clock_signal, data_signal,
+                                           set_signal, clear_signal)
+
         # Set D-type memory depending on the input signal
         if clock_signal == self.devices.RISING:
             if data_signal in [self.devices.HIGH, self.devices.FALLING]:
@@ -301,6 +475,28 @@ class Network:
 
         return True
 
+    def execute_bus_d_type(self, device, clock_signal, data_signal,
+                           set_signal, clear_signal):
+        """Simulate a bus D-type from its input signals.
+
+        The data word is stored on the rising clock edge, and the outputs
+        change to the stored word in a single step. Return True.
+        """
+        mask = (1 << device.width) - 1
+        if clock_signal == self.devices.RISING:
+            device.dtype_memory = data_signal
+        if set_signal == self.devices.HIGH:
+            device.dtype_memory = mask
+        if clear_signal == self.devices.HIGH:
+            device.dtype_memory = 0
+        for output_id, output_signal in [
+                (self.devices.Q_ID, device.dtype_memory),
+                (self.devices.QBAR_ID, device.dtype_memory ^ mask)]:
+            if device.outputs[output_id] != output_signal:
+                device.outputs[output_id] = output_signal
+                self.steady_state = False
+        return True
+
     def execute_clock(self, device_id):
         """Simulate a clock and update its output signal value.
 
@@ -332,9 +528,10 @@ class Network:
     def execute_siggen(self, device_id):
         """If it is time to do so, set clock signals to RISING or FALLING."""
         device = self.devices.get_device(device_id)
-        output = str(device.siggen_pulse)[device.siggen_counter-1]
-        int_out = int(output)
-        device.outputs[None] = int_out
+        output = (device.siggen_waveform >> device.siggen_counter) & 1
+        if device.outputs[None] != output:
+            self.steady_state = False
+        device.outputs[None] = output
         return True
 
     def update_clocks(self):
@@ -357,72 +554,713 @@ class Network:
         siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
         for device_id in siggen_devices:
             device = self.devices.get_device(device_id)
-            if device.siggen_counter == len(str(device.siggen_pulse)):
+            if device.siggen_counter == device.siggen_period:
                 device.siggen_counter = 0
             else:
                 device.siggen_counter += 1
 
+    def find_components(self, device_ids, fanout):
+        """Return the strongly connected components of a connection graph.
+
+        fanout maps every device ID in device_ids to the IDs of the devices
+        its outputs are connected to. The components are found with an
+        iterative form of Tarjan's algorithm and returned in topological
+        order, with the devices of each component in the order of device_ids.
+        """
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        components = []
+        for root in device_ids:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(fanout[root]))]
+            while work:
+                device_id, successors = work[-1]
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = len(index)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(fanout[successor])))
+                        break
+                    elif successor in on_stack:
+                        lowlink[device_id] = min(lowlink[device_id],
+                                                 index[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent_id = work[-1][0]
+                        lowlink[parent_id] = min(lowlink[parent_id],
+                                                 lowlink[device_id])
+                    if lowlink[device_id] == index[device_id]:
+                        component = []
+                        member_id = None
+                        while member_id != device_id:
+                            member_id = stack.pop()
+                            on_stack.discard(member_id)
+                            component.append(member_id)
+                        components.append(component)
+
+        # Tarjan's algorithm finds a component after all those it drives
+        components.reverse()
+        position = {device_id: i for i, device_id in enumerate(device_ids)}
+        for component in components:
+            component.sort(key=position.get)
+        return components
+
+    def update_components(self):
+        """Order the devices for execution using the connection graph.
+
+        The gates are grouped into strongly connected components and ordered
+        so that every gate is executed after the gates driving it, except
+        within feedback loops. The feedback loops of the whole network,
+        including those through D-types, are kept for reporting oscillation.
+        """
+        self.switch_devices = self.devices.find_devices(self.devices.SWITCH)
+        self.d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
+        self.clock_devices = self.devices.find_devices(self.devices.CLOCK)
+        self.siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
+
+        gate_ids = []
+        gate_inputs = {}
+        for device_kind, (x, y) in self.gate_parameters.items():
+            for device_id in self.devices.find_devices(device_kind):
+                gate_ids.append(device_id)
+                gate_inputs[device_id] = (device_id, x, y)
+
+        device_ids = self.devices.find_devices()
+        fanout = {device_id: [] for device_id in device_ids}
+        for device in self.devices.devices_list:
+            for connected_output in device.inputs.values():
+                if connected_output is not None:
+                    fanout[connected_output[0]].append(device.device_id)
+
+        self.feedback_components = [
+            component for component in self.find_components(device_ids,
+                                                             fanout)
+            if len(component) > 1 or component[0] in fanout[component[0]]]
+        # Gates in loops through D-types must be executed once per pass, so
+        # that the D-types see every step of their input signals
+        d_type_loop_ids = set()
+        for component in self.feedback_components:
+            if any(device_id not in gate_inputs for device_id in component):
+                d_type_loop_ids.update(component)
+        # The state of these loops is taken over their devices and the
+        # devices driving them, so that it only repeats if the loops see the
+        # same inputs again
+        state_ids = set(d_type_loop_ids)
+        for device in self.devices.devices_list:
+            if device.device_id in d_type_loop_ids:
+                state_ids.update(connected_output[0] for connected_output
+                                 in device.inputs.values()
+                                 if connected_output is not None)
+        self.d_type_loop_devices = [device for device
+                                    in self.devices.devices_list
+                                    if device.device_id in state_ids]
+
+        gate_fanout = {device_id: [successor_id for successor_id
+                                   in fanout[device_id]
+                                   if successor_id in gate_inputs]
+                       for device_id in gate_ids}
+        # gate_components stores [gate_list, feedback] in execution order,
+        # where gate_list holds (device_id, x, y) for execute_gate and
+        # feedback is True for loops of gates that may be settled on their own
+        self.gate_components = []
+        for component in self.find_components(gate_ids, gate_fanout):
+            feedback = (len(component) > 1 or
+                        component[0] in gate_fanout[component[0]]) and \
+                component[0] not in d_type_loop_ids
+            self.gate_components.append(
+                [[gate_inputs[device_id] for device_id in component],
+                 feedback])
+        self.component_device_count = len(self.devices.devices_list)
+
+    def execute_loop(self, gate_list):
+        """Execute the gates of a feedback loop until they settle.
+
+        The loop is executed repeatedly while its inputs are held. It stops
+        early if the loop returns to a state it has already been in, since it
+        would then never settle with these inputs. Return True if successful.
+        """
+        steady_state = self.steady_state
+        loop_states = set()
+        first_pass = True
+        while True:
+            self.steady_state = True
+            for device_id, x, y in gate_list:
+                if not self.execute_gate(device_id, x, y):
+                    return False
+            if first_pass:
+                steady_state = steady_state and self.steady_state
+                first_pass = False
+            if self.steady_state:
+                break
+            loop_state = tuple([
+                self.devices.get_device(device_id).outputs[None]
+                for device_id, x, y in gate_list])
+            if loop_state in loop_states:
+                self.unsettled_loops.append(gate_list)
+                break
+            loop_states.add(loop_state)
+        self.steady_state = steady_state
+        return True
+
+    def get_state(self, devices_list):
+        """Return the output signals and memory of the devices as a tuple."""
+        return tuple([(tuple(device.outputs.values()), device.dtype_memory)
+                      for device in devices_list])
+
+    def find_oscillating_loop(self, previous_state, state):
+        """Return the names of the devices in the loop that oscillates.
+
+        The loop is the first loop of gates that did not settle in the last
+        pass or, failing that, the first feedback loop containing a device
+        whose state differs between previous_state and state, both taken by
+        get_state over d_type_loop_devices.
+        """
+        if self.unsettled_loops:
+            return [self.names.get_name_string(device_id)
+                    for device_id, x, y in self.unsettled_loops[0]]
+        changed_ids = set([
+            device.device_id for device, previous_device_state, device_state
+            in zip(self.d_type_loop_devices, previous_state, state)
+            if previous_device_state != device_state])
+        for component in self.feedback_components:
+            if changed_ids.intersection(component):
+                return [self.names.get_name_string(device_id)
+                        for device_id in component]
+        return []
+
     def execute_network(self):
         """Execute all the devices in the network for one simulation cycle.
 
-        Return True if successful and the network does not oscillate.
+        Return True if successful and the network does not oscillate. Every
+        pass executes the gates once, in topological order, so a change
+        crosses the gates outside loops in a single pass, and loops of gates
+        are settled on their own by execute_loop. Further passes are only
+        needed for the RISING and FALLING signals to reach their levels and
+        for the D-types to see their new inputs.
+
+        The network oscillates if a loop of gates never settles, or if the
+        loops through D-types return to a state they have already been in
+        during the cycle; the names of the devices in the offending loop are
+        then stored in oscillating_loop. In timed mode, one cycle is executed
+        by execute_timed instead.
         """
-        clock_devices = self.devices.find_devices(self.devices.CLOCK)
-        siggen_devices = self.devices.find_devices(self.devices.SIGGEN)
-        switch_devices = self.devices.find_devices(self.devices.SWITCH)
-        d_type_devices = self.devices.find_devices(self.devices.D_TYPE)
-        and_devices = self.devices.find_devices(self.devices.AND)
-        or_devices = self.devices.find_devices(self.devices.OR)
-        nand_devices = self.devices.find_devices(self.devices.NAND)
-        nor_devices = self.devices.find_devices(self.devices.NOR)
-        xor_devices = self.devices.find_devices(self.devices.XOR)
+        if self.timed:
+            return self.execute_timed()
+        if self.gate_components is None or \
+                self.component_device_count != len(self.devices.devices_list):
+            self.update_components()
+        self.oscillating_loop = []
 
         # This sets clock signals to RISING or FALLING, where necessary
         self.update_clocks()
         self.update_siggen()
 
-        # Number of iterations to wait for the signals to settle before
-        # declaring the network unstable
-        iteration_limit = 20
-
+        states = set()
+        state = None
         iterations = 0
-        while iterations < iteration_limit:
+        while True:
             iterations += 1
             self.steady_state = True
+            self.unsettled_loops = []
 
-            for device_id in switch_devices:  # execute switch devices
+            for device_id in self.switch_devices:  # execute switch devices
                 if not self.execute_switch(device_id):
                     return False
             # Execute D-type devices before clocks to catch the rising edge of
             # the clock
-            for device_id in d_type_devices:  # execute DTYPE devices
+            for device_id in self.d_type_devices:  # execute DTYPE devices
                 if not self.execute_d_type(device_id):
                     return False
-            for device_id in clock_devices:  # complete clock executions
+            for device_id in self.clock_devices:  # complete clock executions
                 if not self.execute_clock(device_id):
                     return False
-            for device_id in siggen_devices:  # complete clock executions
+            for device_id in self.siggen_devices:  # execute siggen devices
                 if not self.execute_siggen(device_id):
                     return False
-            for device_id in and_devices:  # execute AND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in or_devices:  # execute OR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nand_devices:  # execute NAND gate devices
-                if not self.execute_gate(device_id, self.devices.HIGH,
-                                         self.devices.LOW):
-                    return False
-            for device_id in nor_devices:  # execute NOR gate devices
-                if not self.execute_gate(device_id, self.devices.LOW,
-                                         self.devices.HIGH):
-                    return False
-            for device_id in xor_devices:  # execute XOR devices
-                if not self.execute_gate(device_id, None, None):
-                    return False
+            # Execute gates after the gates driving them
+            for gate_list, feedback in self.gate_components:
+                if feedback:
+                    if not self.execute_loop(gate_list):
+                        return False
+                else:
+                    for device_id, x, y in gate_list:
+                        if not self.execute_gate(device_id, x, y):
+                            return False
             if self.steady_state:
                 break
+            if self.unsettled_loops:
+                self.oscillating_loop = self.find_oscillating_loop(None, None)
+                break
+            if not self.d_type_loop_devices:
+                continue
+
+            # Only the loops through D-types can keep changing from pass to
+            # pass, so a repeated state of their devices and inputs means the
+            # network never settles. Passes in which the loops are stable,
+            # while other devices settle, are not counted.
+            loop_state = self.get_state(self.d_type_loop_devices)
+            if loop_state == state:
+                continue
+            previous_state = state
+            state = loop_state
+            if state in states:
+                self.oscillating_loop = self.find_oscillating_loop(
+                    previous_state, state)
+                break
+            states.add(state)
+        self.quiescent = self.steady_state and iterations == 1
+        self.iterations = iterations
         return self.steady_state
+
+    def set_timed(self, timed):
+        """Switch timed mode on or off.
+
+        In timed mode every gate and D-type changes its outputs a number of
+        cycles after its inputs change, given by Devices.get_delay, and all
+        signals are HIGH or LOW. The timing wheel is started again on the
+        next cycle, so this must also be called after delays are changed.
+        """
+        self.timed = timed
+        self.timing_wheel = None
+
+    def start_timed(self):
+        """Start the timing wheel for timed mode.
+
+        Every gate and D-type is evaluated at the current time, so that the
+        network settles from its present state. Return True if successful,
+        or False if an input is unconnected.
+        """
+        # Transitions are completed, since there are none in timed mode
+        for device in self.devices.devices_list:
+            if device.width is not None:  # bus values are never transitions
+                continue
+            for output_id, signal in device.outputs.items():
+                if signal == self.devices.RISING:
+                    device.outputs[output_id] = self.devices.HIGH
+                elif signal == self.devices.FALLING:
+                    device.outputs[output_id] = self.devices.LOW
+
+        self.timing_wheel = [[]]
+        self.wheel_mask = 0
+        # projected_signals stores {(device_id, output_id): signal} for the
+        # last event scheduled on each output
+        self.projected_signals = {}
+        # clock_levels stores {device_id: CLK signal} for D-types, to find
+        # rising edges
+        self.clock_levels = {}
+        if not self.update_timed():
+            return False
+        for device in self.timed_devices:
+            self.evaluate_timed(device)
+        return True
+
+    def update_timed(self):
+        """Resolve the connections and delays of the devices for timed mode.
+
+        Return True if successful, or False if an input is unconnected.
+        """
+        devices_list = self.devices.devices_list
+        device_objects = {device.device_id: device for device in devices_list}
+        # timed_inputs stores {device_id: [(input_id, device, output_id)]}
+        # and timed_fanout stores {device_id: [devices driven]}
+        timed_inputs = {}
+        self.timed_fanout = {device.device_id: [] for device in devices_list}
+        for device in devices_list:
+            inputs = []
+            for input_id, connected_output in device.inputs.items():
+                if connected_output is None:
+                    return False
+                (output_device_id, output_id) = connected_output
+                inputs.append((input_id, device_objects[output_device_id],
+                               output_id))
+                if device not in self.timed_fanout[output_device_id]:
+                    self.timed_fanout[output_device_id].append(device)
+            timed_inputs[device.device_id] = inputs
+        self.timed_inputs = timed_inputs
+
+        self.timed_delays = {}
+        self.timed_devices = []  # gates and D-types
+        for device in devices_list:
+            if device.device_kind in self.gate_parameters or \
+                    device.device_kind == self.devices.D_TYPE:
+                self.timed_delays[device.device_id] = \
+                    self.devices.get_delay(device.device_id)
+                self.timed_devices.append(device)
+            if device.device_kind == self.devices.D_TYPE and \
+                    device.device_id not in self.clock_levels:
+                self.clock_levels[device.device_id] = \
+                    self.get_timed_inputs(device)[self.devices.CLK_ID]
+        self.timed_switches = [device for device in devices_list
+                               if device.device_kind == self.devices.SWITCH]
+        self.timed_clocks = [device for device in devices_list
+                             if device.device_kind == self.devices.CLOCK]
+        self.timed_siggens = [device for device in devices_list
+                              if device.device_kind == self.devices.SIGGEN]
+
+        # The wheel has a slot for every cycle up to the longest delay, so
+        # an event never wraps around onto a slot that is still pending
+        wheel_size = len(self.timing_wheel)
+        while wheel_size <= max(self.timed_delays.values(), default=0):
+            wheel_size *= 2
+        if wheel_size != len(self.timing_wheel):
+            events = [event for slot in self.timing_wheel for event in slot]
+            self.wheel_mask = wheel_size - 1
+            self.timing_wheel = [[] for _ in range(wheel_size)]
+            for event in events:
+                self.timing_wheel[event[0] & self.wheel_mask].append(event)
+        self.timed_device_count = len(devices_list)
+        return True
+
+    def get_timed_inputs(self, device):
+        """Return {input_id: signal} for a device in timed mode."""
+        return {input_id: output_device.outputs[output_id]
+                for input_id, output_device, output_id
+                in self.timed_inputs[device.device_id]}
+
+    def schedule(self, device, output_id, signal):
+        """Schedule an output of a device to change after its delay.
+
+        Nothing is scheduled if the output is already due to have the signal.
+        """
+        key = (device.device_id, output_id)
+        if self.projected_signals.get(key,
+                                      device.outputs[output_id]) == signal:
+            return
+        self.projected_signals[key] = signal
+        time = self.time + self.timed_delays[device.device_id]
+        self.timing_wheel[time & self.wheel_mask].append(
+            (time, device, output_id, signal))
+
+    def evaluate_timed(self, device):
+        """Evaluate a gate or D-type and schedule its new outputs."""
+        inputs = self.get_timed_inputs(device)
+        if device.device_kind == self.devices.D_TYPE:
+            clock_signal = inputs[self.devices.CLK_ID]
+            mask = self.devices.get_bus_mask(device.device_id)
+            if clock_signal == self.devices.HIGH and \
+                    self.clock_levels[device.device_id] == self.devices.LOW:
+                device.dtype_memory = inputs[self.devices.DATA_ID]
+            self.clock_levels[device.device_id] = clock_signal
+            if inputs[self.devices.SET_ID] == self.devices.HIGH:
+                device.dtype_memory = mask
+            if inputs[self.devices.CLEAR_ID] == self.devices.HIGH:
+                device.dtype_memory = self.devices.LOW
+            self.schedule(device, self.devices.Q_ID, device.dtype_memory)
+            self.schedule(device, self.devices.QBAR_ID,
+                          device.dtype_memory ^ mask)
+            return
+
+        (x, y) = self.gate_parameters[device.device_kind]
+        input_signals = list(inputs.values())
+        if device.width is not None:
+            output_signal = self.get_bus_signal(device, input_signals)
+        elif x is None:  # XOR
+            if input_signals[0] == input_signals[1]:
+                output_signal = self.devices.LOW
+            else:
+                output_signal = self.devices.HIGH
+        elif all(input_signal == x for input_signal in input_signals):
+            output_signal = y
+        else:
+            output_signal = self.invert_signal(y)
+        self.schedule(device, None, output_signal)
+
+    def execute_timed(self):
+        """Execute one cycle of the network in timed mode.
+
+        Switches, clocks and siggens change without delay. The events due in
+        this cycle are then applied, and the devices driven by every output
+        that changed are evaluated, so the work done is proportional to the
+        number of events. Return True if successful.
+        """
+        if self.timing_wheel is None:
+            if not self.start_timed():
+                return False
+        elif self.timed_inputs is None or \
+                self.timed_device_count != len(self.devices.devices_list):
+            if not self.update_timed():
+                return False
+        self.time += 1
+        changed_devices = []
+
+        for device in self.timed_switches:
+            if device.outputs[None] != device.switch_state:
+                device.outputs[None] = device.switch_state
+                changed_devices.append(device)
+        for device in self.timed_clocks:
+            if device.clock_counter == device.clock_half_period:
+                device.clock_counter = 0
+                device.outputs[None] = self.invert_signal(
+                    device.outputs[None])
+                changed_devices.append(device)
+            device.clock_counter += 1
+        for device in self.timed_siggens:
+            if device.siggen_counter == device.siggen_period:
+                device.siggen_counter = 0
+            else:
+                device.siggen_counter += 1
+            output = (device.siggen_waveform >> device.siggen_counter) & 1
+            if device.outputs[None] != output:
+                device.outputs[None] = output
+                changed_devices.append(device)
+
+        slot = self.time & self.wheel_mask
+        events = self.timing_wheel[slot]
+        self.timing_wheel[slot] = []
+        for time, device, output_id, signal in events:
+            if device.outputs[output_id] != signal:
+                device.outputs[output_id] = signal
+                changed_devices.append(device)
+
+        driven_devices = {}
+        for device in changed_devices:
+            for driven_device in self.timed_fanout[device.device_id]:
+                driven_devices[driven_device.device_id] = driven_device
+        for device in driven_devices.values():
+            self.evaluate_timed(device)
+
+        self.steady_state = not changed_devices
+        self.quiescent = False  # time warp is not used in timed mode
+        self.iterations = 1
+        return True
+
+    def snapshot(self):
+        """Return a compact copy of the simulation state.
+
+        The state is a 64-bit integer array, so that it holds the values of
+        buses too. It stores, for every device in order, its
+        output signals followed by its D-type memory, clock counter, siggen
+        counter and switch state, with -1 standing for None.
+        """
+        state = array.array("q")
+        for device in self.devices.devices_list:
+            state.extend([-1 if signal is None else signal
+                          for signal in device.outputs.values()])
+            state.extend([-1 if value is None else value for value in [
+                device.dtype_memory, device.clock_counter,
+                device.siggen_counter, device.switch_state]])
+        return state
+
+    def restore(self, state):
+        """Return the simulation to a state saved by snapshot.
+
+        Events in flight in timed mode are not saved, so the timing wheel is
+        started again from the restored state.
+        Return True if successful, or False if the state does not match the
+        devices in the network.
+        """
+        expected_length = sum(len(device.outputs) + 4
+                              for device in self.devices.devices_list)
+        if len(state) != expected_length:
+            return False
+        values = [None if value == -1 else value for value in state]
+        position = 0
+        for device in self.devices.devices_list:
+            for output_id in device.outputs:
+                device.outputs[output_id] = values[position]
+                position += 1
+            [device.dtype_memory, device.clock_counter,
+             device.siggen_counter,
+             device.switch_state] = values[position:position + 4]
+            position += 4
+        self.timing_wheel = None
+        return True
+
+    def fork(self):
+        """Return a new network that continues from the current state.
+
+        The devices are copied, so the new network and this one can then be
+        simulated independently. The names instance is shared.
+        """
+        forked_network = copy.copy(self)
+        memo = {id(self.names): self.names}
+        forked_network.devices = copy.deepcopy(self.devices, memo)
+        # The execution order refers to devices of this network, so it is
+        # found again for the copied devices
+        forked_network.gate_components = None
+        if self.timing_wheel is not None:
+            # Copy the events in flight, referring to the copied devices
+            [forked_network.timing_wheel, forked_network.projected_signals,
+             forked_network.clock_levels] = copy.deepcopy(
+                 [self.timing_wheel, self.projected_signals,
+                  self.clock_levels], memo)
+            forked_network.timed_inputs = None
+        if self.profile is not None:  # the wrappers belong to this network
+            forked_network.set_profiling(False)
+        return forked_network
+
+    def get_quiet_cycles(self, max_cycles):
+        """Return the number of cycles before the next clock or siggen event.
+
+        An event is a clock edge or a change in a siggen output. If the last
+        cycle was quiescent and no switch is changed, every cycle before the
+        next event repeats the last one exactly. Return 0 if the last cycle
+        was not quiescent, and at most max_cycles.
+        """
+        if not self.quiescent:
+            return 0
+        quiet_cycles = max_cycles
+        for device_id in self.devices.find_devices(self.devices.CLOCK):
+            device = self.devices.get_device(device_id)
+            # The edge is applied on the cycle the counter reaches the
+            # half period
+            quiet_cycles = min(quiet_cycles,
+                               device.clock_half_period - device.clock_counter)
+        for device_id in self.devices.find_devices(self.devices.SIGGEN):
+            device = self.devices.get_device(device_id)
+            block = self.devices.get_siggen_block(
+                device_id, min(quiet_cycles, device.siggen_period + 1))
+            for cycle, output in enumerate(block):
+                if output != device.outputs[None]:
+                    quiet_cycles = cycle
+                    break
+        return quiet_cycles
+
+    def warp(self, max_cycles):
+        """Skip the quiet cycles before the next clock or siggen event.
+
+        Clock and siggen counters are advanced as if the cycles had been
+        executed; all signals keep their values. Return the number of cycles
+        skipped, at most max_cycles. The caller records the skipped cycles,
+        e.g. with Monitors.extend_signals.
+        """
+        quiet_cycles = self.get_quiet_cycles(max_cycles)
+        if quiet_cycles == 0:
+            return 0
+        for device_id in self.devices.find_devices(self.devices.CLOCK):
+            self.devices.get_device(device_id).clock_counter += quiet_cycles
+        for device_id in self.devices.find_devices(self.devices.SIGGEN):
+            device = self.devices.get_device(device_id)
+            device.siggen_counter = (device.siggen_counter + quiet_cycles) \
+                % (device.siggen_period + 1)
+        return quiet_cycles
+
+    def set_profiling(self, profiling):
+        """Switch the profiling of execute_network on or off.
+
+        While profiling, the execution methods of this instance are replaced
+        by wrappers that count and time every device evaluation, and record
+        the passes made to settle every cycle. When profiling is off the
+        wrappers are removed, so the unchanged methods of the class run and
+        profiling costs nothing. The statistics are kept until reset.
+        """
+        for method_name in self.profiled_methods:
+            self.__dict__.pop(method_name, None)
+        if not profiling:
+            self.profile = None
+            return
+        if self.profile is None:
+            self.reset_profile()
+        for method_name in self.profiled_methods[:-2]:
+            setattr(self, method_name, self.get_profiled_method(
+                getattr(Network, method_name), False))
+        self.evaluate_timed = self.get_profiled_method(Network.evaluate_timed,
+                                                       True)
+
+        profile = self.profile
+
+        def execute_network():
+            start = time.perf_counter()
+            settled = Network.execute_network(self)
+            profile["time"] += time.perf_counter() - start
+            profile["cycles"] += 1
+            profile["iterations"] += self.iterations
+            histogram = profile["iteration_counts"]
+            histogram[self.iterations] = histogram.get(self.iterations, 0) + 1
+            if not settled:
+                profile["oscillating_cycles"] += 1
+            return settled
+        self.execute_network = execute_network
+
+    def get_profiled_method(self, method, takes_device):
+        """Return a wrapper of a device execution method for profiling.
+
+        The wrapper adds the evaluation and its time to the statistics of
+        the device kind. takes_device is True if the method takes a Device
+        object rather than a device ID.
+        """
+        kinds = self.profile["kinds"]
+
+        def profiled_method(device, *arguments):
+            start = time.perf_counter()
+            result = method(self, device, *arguments)
+            elapsed = time.perf_counter() - start
+            if not takes_device:
+                device = self.devices.get_device(device)
+            kind_statistics = kinds.get(device.device_kind)
+            if kind_statistics is None:
+                kind_statistics = kinds[device.device_kind] = [0, 0.0]
+            kind_statistics[0] += 1
+            kind_statistics[1] += elapsed
+            return result
+        return profiled_method
+
+    def reset_profile(self):
+        """Clear the statistics collected while profiling."""
+        profile = {"cycles": 0, "iterations": 0, "oscillating_cycles": 0,
+                   "time": 0.0, "iteration_counts": {}, "kinds": {}}
+        if self.profile is None:
+            self.profile = profile
+        else:  # the wrappers keep a reference to the dictionary
+            self.profile["kinds"].clear()
+            self.profile["iteration_counts"].clear()
+            profile["kinds"] = self.profile["kinds"]
+            profile["iteration_counts"] = self.profile["iteration_counts"]
+            self.profile.update(profile)
+
+    def get_profile(self):
+        """Return the statistics collected while profiling.
+
+        Return a dictionary with the number of cycles, the total number of
+        passes made to settle them, {passes: number of cycles}, the number of
+        cycles that oscillated, the total time in seconds, and for every
+        device kind name its number of evaluations and their total time.
+        Return None if profiling is off.
+        """
+        if self.profile is None:
+            return None
+        return {
+            "cycles": self.profile["cycles"],
+            "iterations": self.profile["iterations"],
+            "iteration_counts": dict(self.profile["iteration_counts"]),
+            "oscillating_cycles": self.profile["oscillating_cycles"],
+            "time": self.profile["time"],
+            "kinds": {self.names.get_name_string(device_kind):
+                      {"evaluations": evaluations, "time": kind_time}
+                      for device_kind, [evaluations, kind_time]
+                      in self.profile["kinds"].items()}}
+
+    def display_profile(self):
+        """Display the profiling statistics in the text console."""
+        profile = self.get_profile()
+        if profile is None:
+            print("Profiling is off.")
+            return
+        cycles = max(profile["cycles"], 1)
+        lines = ["".join([
+            "Cycles: ", str(profile["cycles"]), ", total time ",
+            "{:.3g}".format(profile["time"]), " s, ",
+            "{:.3g}".format(profile["time"] / cycles), " s per cycle"]),
+            "".join([
+                "Passes to settle: ",
+                "{:.3g}".format(profile["iterations"] / cycles),
+                " per cycle, at most ",
+                str(max(profile["iteration_counts"], default=0)),
+                ", oscillating cycles ",
+                str(profile["oscillating_cycles"])])]
+        for kind_name, statistics in sorted(
+                profile["kinds"].items(),
+                key=lambda item: -item[1]["time"]):
+            lines.append("".join([
+                kind_name, ": ", str(statistics["evaluations"]),
+                " evaluations, ", "{:.3g}".format(statistics["time"]),
+                " s"]))
+        print("\n".join(lines))
@@ -10,6 +10,9 @@ Parser - parses the definition file and builds the logic network.
 """
 
 from error import Error
+from devices import Devices
+from network import Network
+from module import Module
 
 
 class Parser:
@@ -33,6 +36,17 @@ class Parser:
     --------------
     parse_network(self): Parses the circuit definition file.
 
+    module_list(self): Parses the modules section.
+
+    module_parse(self): Parses and compiles a single module.
+
+    port_list(self, module, is_input): Parses the input or output ports of a
+                                       module.
+
+    instance_parse(self): Makes an instance of a module.
+
+    path_parse(self, is_input): Parses a path through module instances.
+
     """
 
     def __init__(self, names, devices, network, monitors, scanner):
@@ -49,6 +63,11 @@ class Parser:
         self.parse_errors = 0
         self.device_names = []
         self.connected_inputs = []
+        self.signal_switch_ids = []  # switches set in the SIGNALS section
+        # modules stores {module_id: Module} and instances stores
+        # {instance_id: Module} for the instances in the current scope
+        self.modules = {}
+        self.instances = {}
         self.gate_var_inputs_IDs = [
             self.scanner.AND_ID,
             self.scanner.NAND_ID,
@@ -57,6 +76,8 @@ class Parser:
             self.scanner.XOR_ID,
 
         ]
+        # words that may follow a device definition
+        self.qualifier_IDs = [self.scanner.width_ID, self.scanner.delay_ID]
         self.device_IDs = [
             self.scanner.AND_ID,
             self.scanner.NAND_ID,
@@ -96,6 +117,9 @@ class Parser:
         """
 
         self.heading_search()
+        if self.instances:
+            # Instances are copies, so give them their own start-up states
+            self.devices.cold_startup()
 
         if Error.num_errors == 0:
             return True
@@ -109,6 +133,11 @@ class Parser:
         print('Network')
         self.OPENCURLY_search()
 
+        if self.symbol.id == self.scanner.MODULES_ID:
+            print('Modules')
+            self.OPENCURLY_search()
+            self.module_list()
+
         if self.symbol.id != self.scanner.DEVICES_ID:
             Error(0, self.symbol)
             # report error 0 if network isn't the first heading found
@@ -154,6 +183,224 @@ class Parser:
             self.symbol = self.scanner.get_symbol()
             # if '{' - go to next symbol
 
+    def module_list(self):
+        """Parse the modules section."""
+        while self.symbol.type == self.scanner.NAME:
+            self.module_parse()
+        if self.symbol.type != self.scanner.RIGHT_BRACKET:
+            Error(35, self.symbol)
+        else:
+            self.sections_complete += 1
+            self.symbol = self.scanner.get_symbol()
+
+    def module_parse(self):
+        """Parse and compile a single module.
+
+        The body of the module is parsed into new Devices and Network
+        instances, in the same way as the network, and then compiled into a
+        Module template. A module may use the modules defined before it.
+        """
+        module_id = self.symbol.id
+        if module_id in self.modules:
+            Error(33, self.symbol)
+        module = Module(self.names, module_id)
+        self.OPENCURLY_search()
+
+        # Parse the body into its own scope
+        scope = [self.devices, self.network, self.device_names,
+                 self.instances]
+        self.devices = Devices(self.names)
+        self.network = Network(self.names, self.devices)
+        self.device_names = []
+        self.instances = {}
+
+        if self.symbol.id != self.scanner.DEVICES_ID:
+            Error(0, self.symbol)
+        else:
+            self.OPENCURLY_search()
+            self.device_list()
+        if self.symbol.id == self.scanner.CONNECTIONS_ID:
+            self.OPENCURLY_search()
+            self.connection_list()
+        module.compile(self.devices, self.instances)
+        if self.symbol.id == self.scanner.INPUTS_ID:
+            self.OPENCURLY_search()
+            self.port_list(module, True)
+        if self.symbol.id == self.scanner.OUTPUTS_ID:
+            self.OPENCURLY_search()
+            self.port_list(module, False)
+
+        [self.devices, self.network, self.device_names,
+         self.instances] = scope
+        self.modules[module_id] = module
+        if self.symbol.type != self.scanner.RIGHT_BRACKET:
+            Error(35, self.symbol)
+        else:
+            self.symbol = self.scanner.get_symbol()
+
+    def port_list(self, module, is_input):
+        """Parse the input or output ports of a module.
+
+        Input ports are connected like outputs, e.g. a - x1.I1; and output
+        ports like inputs, e.g. x2 - s; An input port may be connected to
+        several device inputs on separate lines.
+        """
+        while self.symbol.type == self.scanner.NAME:
+            if is_input:
+                port_id = self.symbol.id
+            else:
+                output = self.output_parse()
+            self.symbol = self.scanner.get_symbol()  # next symbol
+            if self.symbol.type != self.scanner.DASH:
+                Error(12, self.symbol)
+            else:
+                self.symbol = self.scanner.get_symbol()  # next symbol
+                if is_input:
+                    for device_id, input_id in self.input_parse() or []:
+                        module.add_input(
+                            port_id, self.names.get_name_string(device_id),
+                            input_id)
+                elif output is not None:
+                    [device_id, output_id] = output
+                    if self.symbol.type != self.scanner.NAME or \
+                            not module.add_output(
+                                self.symbol.id,
+                                self.names.get_name_string(device_id),
+                                output_id):
+                        Error(34, self.symbol)
+            # go to the end of the line
+            while self.symbol.type not in [self.scanner.SEMICOLON,
+                                           self.scanner.RIGHT_BRACKET,
+                                           self.scanner.EOF]:
+                self.symbol = self.scanner.get_symbol()
+            if self.symbol.type == self.scanner.SEMICOLON:
+                self.symbol = self.scanner.get_symbol()
+        if self.symbol.type == self.scanner.RIGHT_BRACKET:
+            self.symbol = self.scanner.get_symbol()
+        else:
+            Error(35, self.symbol)
+
+    def output_parse(self):
+        """Parse the name of an output, of a device or a module instance.
+
+        Return [device_id, output_id], or None if the output is invalid.
+        """
+        if self.symbol.id in self.instances:
+            return self.path_parse(False)
+        if self.symbol.id not in self.device_names:
+            Error(11, self.symbol)
+            return None
+        return self.signame_in()
+
+    def input_parse(self):
+        """Parse the name of an input, of a device or a module instance.
+
+        Return a list of [device_id, input_id], or None if the input is
+        invalid.
+        """
+        if self.symbol.id in self.instances:
+            return self.path_parse(True)
+        if self.symbol.id not in self.device_names:
+            Error(11, self.symbol)
+            return None
+        device = self.devices.get_device(self.symbol.id)
+        self.symbol = self.scanner.get_symbol()  # next symbol
+        if self.symbol.type != self.scanner.PERIOD:
+            Error(13, self.symbol)
+            return None
+        self.symbol = self.scanner.get_symbol()  # next symbol
+        if self.symbol.id not in device.inputs:
+            Error(14, self.symbol)
+            return None
+        return [[device.device_id, self.symbol.id]]
+
+    def instance_parse(self):
+        """Make an instance of a module and parse the end of its line."""
+        module = self.modules[self.symbol.id]
+        if self.new_device_id is not None:
+            instance_name = self.names.get_name_string(self.new_device_id)
+            if module.instantiate(self.devices, self.network,
+                                  instance_name):
+                self.instances[self.new_device_id] = module
+            else:
+                Error(3, self.symbol)
+
+        self.symbol = self.scanner.get_symbol()  # next symbol
+        if self.symbol.type == self.scanner.SEMICOLON:
+            return 0
+        if self.symbol.type == self.scanner.EOF:
+            return 1
+        if self.symbol.type == self.scanner.RIGHT_BRACKET:
+            return 2
+        Error(10, self.symbol)
+        for i in range(10):
+            # tries to get a semi colon before going to next
+            self.symbol = self.scanner.get_symbol()  # next symbol
+            if self.symbol.type == self.scanner.SEMICOLON:
+                return 0
+            if self.symbol.type == self.scanner.EOF:
+                return 1
+            if self.symbol.type == self.scanner.RIGHT_BRACKET:
+                return 2
+
+    def path_parse(self, is_input):
+        """Parse a path through module instances, such as adder0.fa3.s.
+
+        The current symbol is the name of an instance. The path leads to a
+        port of a module, or to a device inside it followed by its port
+        where needed, as for devices outside modules. If is_input, return a
+        list of [device_id, input_id] for the inputs the path leads to, or
+        else [device_id, output_id] for the output. Return None if the path
+        is invalid.
+        """
+        module = self.instances[self.symbol.id]
+        prefix = self.symbol.string
+        while True:
+            self.symbol = self.scanner.get_symbol()  # next symbol
+            if self.symbol.type != self.scanner.PERIOD:
+                Error(13, self.symbol)
+                return None
+            self.symbol = self.scanner.get_symbol()  # next symbol
+            if self.symbol.type != self.scanner.NAME:
+                Error(34, self.symbol)
+                return None
+            name = self.symbol.string
+            if name in module.instances:
+                prefix = ".".join([prefix, name])
+                module = module.instances[name]
+                continue
+
+            if is_input and self.symbol.id in module.inputs:
+                return [[self.names.query(".".join([prefix, device_name])),
+                         input_id] for device_name, input_id
+                        in module.inputs[self.symbol.id]]
+            if not is_input and self.symbol.id in module.outputs:
+                [device_name, output_id] = module.outputs[self.symbol.id]
+                return [self.names.query(".".join([prefix, device_name])),
+                        output_id]
+            if not module.has_device(name):
+                Error(34, self.symbol)
+                return None
+
+            device = self.devices.get_device(
+                self.names.query(".".join([prefix, name])))
+            if not is_input and device.device_kind != self.devices.D_TYPE:
+                return [device.device_id, None]
+            self.symbol = self.scanner.get_symbol()  # next symbol
+            if self.symbol.type != self.scanner.PERIOD:
+                Error(13, self.symbol)
+                return None
+            self.symbol = self.scanner.get_symbol()  # next symbol
+            if is_input:
+                if self.symbol.id not in device.inputs:
+                    Error(14, self.symbol)
+                    return None
+                return [[device.device_id, self.symbol.id]]
+            if self.symbol.id not in device.outputs:
+                Error(18, self.symbol)
+                return None
+            return [device.device_id, self.symbol.id]
+
     def device_list(self):
         """Parse the device list."""
         while True:
@@ -185,7 +432,8 @@ class Parser:
             # if first symbol of line is a not a name, error 2
             Error(2, self.symbol)
         else:   # if first symbol is a name
-            if self.symbol.id in self.device_names:
+            if self.symbol.id in self.device_names or \
+                    self.symbol.id in self.instances:
                 # if a name has already been used as a device, call error 3
                 Error(3, self.symbol)
             else:
@@ -215,6 +463,9 @@ class Parser:
         gate = False
         clock = False
         siggen = False
+        if self.symbol.id in self.modules:
+            # symbol is a module, so make an instance of it
+            return self.instance_parse()
         if self.symbol.id not in self.device_IDs:
             Error(5, self.symbol)
         elif self.symbol.id in self.gate_var_inputs_IDs:
@@ -247,6 +498,34 @@ class Parser:
             self.device_names.append(self.new_device_id)
             return 0
 
+        elif (self.symbol.id in self.qualifier_IDs and
+                self.new_device_type in [self.scanner.DTYPE_ID,
+                                         self.scanner.SWITCH_ID]):
+            # D-type or switch with a width or propagation delay
+            if self.new_device_type == self.scanner.SWITCH_ID:
+                self.devices.make_switch(self.new_device_id, 0)
+            else:
+                self.devices.make_device(
+                    self.new_device_id, self.new_device_type, None)
+            self.device_names.append(self.new_device_id)
+            self.qualifier_parse()
+            if self.symbol.type == self.scanner.SEMICOLON:
+                return 0
+            if self.symbol.type == self.scanner.EOF:
+                return 1
+            if self.symbol.type == self.scanner.RIGHT_BRACKET:
+                return 2
+            Error(10, self.symbol)
+            for i in range(10):
+                # tries to get a semi colon before going to next
+                self.symbol = self.scanner.get_symbol()  # next symbol
+                if self.symbol.type == self.scanner.SEMICOLON:
+                    return 0
+                if self.symbol.type == self.scanner.EOF:
+                    return 1
+                if self.symbol.type == self.scanner.RIGHT_BRACKET:
+                    return 2
+
         elif self.symbol.type == self.scanner.SEMICOLON:
             # Must be an xor or dtype so make that device
             self.devices.make_device(
@@ -308,12 +587,15 @@ class Parser:
                 else:
                     # Build siggen object
                     self.devices.make_siggen(
-                        self.new_device_id, self.symbol.number)
+                        self.new_device_id, self.symbol.string)
                     self.device_names.append(self.new_device_id)
 
-        # symbol 6 should be a ';' if gate or clock device
+        # symbol 6 should be a ';' if gate or clock device, or the words
+        # width or delay, each followed by a number, if gate
         if gate or clock or siggen:
             self.symbol = self.scanner.get_symbol()  # next symbol
+            if gate:
+                self.qualifier_parse()
             if self.symbol.type == self.scanner.SEMICOLON:
                 return 0
             if self.symbol.type == self.scanner.EOF:
@@ -332,6 +614,28 @@ class Parser:
                     if self.symbol.type == self.scanner.RIGHT_BRACKET:
                         return 2
 
+    def qualifier_parse(self):
+        """Parse the width and delay qualifiers of the new device.
+
+        Each qualifier is the word width or delay followed by a number > 0.
+        On return the symbol is the first one after the qualifiers.
+        """
+        while self.symbol.id in self.qualifier_IDs:
+            qualifier_ID = self.symbol.id
+            self.symbol = self.scanner.get_symbol()  # next symbol
+            if qualifier_ID == self.scanner.delay_ID:
+                # propagation delay in cycles for timed mode
+                if (self.symbol.type != self.scanner.NUMBER or
+                        not self.devices.set_delay(self.new_device_id,
+                                                   self.symbol.number)):
+                    Error(32, self.symbol)
+            elif (self.symbol.type != self.scanner.NUMBER or
+                    not self.devices.set_width(self.new_device_id,
+                                               self.symbol.number)):
+                # number of bits of a bus
+                Error(36, self.symbol)
+            self.symbol = self.scanner.get_symbol()  # next symbol
+
     def is_bin_num(self, num):
         """Check if the symbol is a binary number."""
         for i in str(num):
@@ -359,7 +663,12 @@ class Parser:
         out_device_id = None
         in_device_id = None
         in_port_id = None
-        if self.symbol.id not in self.device_names:
+        if self.symbol.id in self.instances:
+            # output of a module instance
+            output = self.path_parse(False)
+            if output is not None:
+                [in_device_id, in_port_id] = output
+        elif self.symbol.id not in self.device_names:
             Error(11, self.symbol)
         else:
             [in_device_id, in_port_id] = self.signame_in()
@@ -381,7 +690,31 @@ class Parser:
             return 1
 
         # symbol 3: name
-        if self.symbol.id not in self.device_names:
+        if self.symbol.id in self.instances:
+            # inputs of a module instance
+            inputs = self.path_parse(True)
+            if inputs is not None:
+                for device_id, input_id in inputs:
+                    error_type = self.network.make_connection(
+                        in_device_id, in_port_id, device_id, input_id)
+                    if error_type != self.network.NO_ERROR:
+                        Error(16, self.symbol)
+            self.symbol = self.scanner.get_symbol()  # next symbol
+            if self.symbol.type == self.scanner.SEMICOLON:
+                return 0
+            if self.symbol.type == self.scanner.EOF:
+                return 1
+            Error(19, self.symbol)
+            for i in range(10):
+                # tries to get a semi colon before going to next
+                self.symbol = self.scanner.get_symbol()  # next symbol
+                if self.symbol.type == self.scanner.SEMICOLON:
+                    return 0
+                if self.symbol.type == self.scanner.EOF:
+                    return 1
+            return 0
+
+        elif self.symbol.id not in self.device_names:
             Error(11, self.symbol)
 
         else:
@@ -462,11 +795,16 @@ class Parser:
         """Parse a single line of the setsignal section."""
         errors_start = Error.num_errors  # errors started with
         # Expected format : name EQUALS BINARYNUMBER SEMICOLON
-        if self.symbol.id not in self.device_names:
-            Error(20, self.symbol)
+        if self.symbol.id in self.instances:
+            # switch inside a module instance
+            output = self.path_parse(False)
+            switch_set_ID = None if output is None else output[0]
+        else:
+            if self.symbol.id not in self.device_names:
+                Error(20, self.symbol)
 
-        # Find the switch device ID
-        switch_set_ID = self.devices.get_device(self.symbol.id)
+            # Find the switch device ID
+            switch_set_ID = self.symbol.id
 
         self.symbol = self.scanner.get_symbol()  # next symbol
         if self.symbol.type == self.scanner.SEMICOLON:
@@ -485,10 +823,13 @@ class Parser:
 
         if self.symbol.type != self.scanner.NUMBER:
             Error(22, self.symbol)
-        elif self.symbol.number != 0 and self.symbol.number != 1:
+        elif self.symbol.number >= 1 << self.devices.get_port_width(
+                switch_set_ID, None):
+            # a switch is set to 0 or 1, or to any value of its bus
             Error(22, self.symbol)
-        elif self.symbol.number == 1:
-            self.devices.set_switch(switch_set_ID, 1)
+        elif self.devices.set_switch(switch_set_ID, self.symbol.number):
+            if switch_set_ID not in self.signal_switch_ids:
+                self.signal_switch_ids.append(switch_set_ID)
 
         self.symbol = self.scanner.get_symbol()  # next symbol
         if self.symbol.type == self.scanner.SEMICOLON:
@@ -520,7 +861,13 @@ class Parser:
         device_id = None
         output_id = None
 
-        if self.symbol.id not in self.device_names:
+        if self.symbol.id in self.instances:
+            # output of a module instance
+            out = self.path_parse(False)
+            if out is not None:
+                [device_id, output_id] = out
+                error_type = self.monitors.make_monitor(device_id, output_id)
+        elif self.symbol.id not in self.device_names:
             Error(26, self.symbol)
         else:
             print(self.symbol.string)
@@ -0,0 +1,131 @@
+"""Summarise long signal traces at several resolutions.
+
+Used in the Logic Simulator project to draw long monitor traces with a
+number of primitives proportional to the canvas width rather than to the
+number of cycles, at any zoom.
+
+Classes
+-------
+Pyramid - stores a min/max pyramid over a signal trace.
+"""
+import numpy as np
+
+
+class Pyramid:
+
+    """Store a min/max pyramid over a signal trace.
+
+    Level 0 holds the height of every cycle, 1 for the high level and 0
+    otherwise. Every block of level k summarises 2**k cycles by the lowest
+    and highest height within it, so a pulse of a single cycle is still seen
+    as a block spanning both heights at every level. New cycles are added to
+    every level as the trace grows, without summarising the earlier cycles
+    again.
+
+    Parameters
+    ----------
+    high: signal level drawn as high.
+
+    Public methods
+    --------------
+    reset(self): Removes every cycle from the pyramid.
+
+    update(self, values): Adds the cycles of a growing trace that are not
+                          yet in the pyramid.
+
+    get_level(self, cycles_per_pixel): Returns the coarsest level whose
+                                       blocks are at most one pixel wide.
+
+    get_blocks(self, first, last, level): Returns the lowest and highest
+                        heights of the blocks covering a range of cycles.
+    """
+
+    def __init__(self, high=1):
+        """Initialise an empty pyramid."""
+        self.high = high
+        self.reset()
+
+    def reset(self):
+        """Remove every cycle from the pyramid."""
+        self.cycles = 0
+        # mins and maxs store one array per level. The arrays have spare
+        # room at the end, and counts stores the blocks in use.
+        self.mins = []
+        self.maxs = []
+        self.counts = []
+
+    def set_blocks(self, level, start, mins, maxs):
+        """Store the blocks of a level from block start onwards.
+
+        The arrays of the level are doubled in size when they are full.
+        """
+        if level == len(self.mins):
+            self.mins.append(np.zeros(0, np.uint8))
+            self.maxs.append(np.zeros(0, np.uint8))
+            self.counts.append(0)
+        end = start + len(mins)
+        if end > len(self.mins[level]):
+            capacity = max(2 * end, 1024)
+            for arrays in [self.mins, self.maxs]:
+                grown = np.zeros(capacity, np.uint8)
+                grown[:start] = arrays[level][:start]
+                arrays[level] = grown
+        self.mins[level][start:end] = mins
+        self.maxs[level][start:end] = maxs
+        self.counts[level] = end
+
+    def update(self, values):
+        """Add the cycles of values that are not yet in the pyramid.
+
+        values is the whole trace recorded so far. If it is shorter than the
+        pyramid, the trace has been reset and the pyramid is rebuilt.
+        """
+        if len(values) < self.cycles:
+            self.reset()
+        if len(values) == self.cycles:
+            return
+        start = self.cycles
+        heights = (np.asarray(values[start:]) == self.high).astype(np.uint8)
+        self.set_blocks(0, start, heights, heights)
+        self.cycles = len(values)
+
+        # The last block of each level may have been partly filled before,
+        # so it is summarised again along with the new blocks
+        level = 0
+        while self.counts[level] > 1:
+            start //= 2
+            below_mins = self.mins[level][2 * start:self.counts[level]]
+            below_maxs = self.maxs[level][2 * start:self.counts[level]]
+            if len(below_mins) % 2:  # the last block has no pair yet
+                below_mins = np.append(below_mins, below_mins[-1])
+                below_maxs = np.append(below_maxs, below_maxs[-1])
+            level += 1
+            self.set_blocks(level, start,
+                            np.minimum(below_mins[0::2], below_mins[1::2]),
+                            np.maximum(below_maxs[0::2], below_maxs[1::2]))
+
+    def get_level(self, cycles_per_pixel):
+        """Return the coarsest level whose blocks are at most one pixel wide.
+
+        Return 0 if there are no cycles.
+        """
+        level = 0
+        while level + 1 < len(self.counts) and \
+                2 ** (level + 1) <= cycles_per_pixel:
+            level += 1
+        return level
+
+    def get_blocks(self, first, last, level):
+        """Return the blocks of a level covering cycles first up to last.
+
+        Return [first_block, mins, maxs], where first_block is the index of
+        the first block returned, which starts at cycle first_block * 2**level,
+        and mins and maxs hold the lowest and highest height of each block.
+        """
+        if not self.counts:
+            empty = np.zeros(0, np.uint8)
+            return [0, empty, empty]
+        first_block = max(first, 0) >> level
+        last_block = min(-(-last >> level), self.counts[level])
+        return [first_block, self.mins[level][first_block:last_block],
+                self.maxs[level][first_block:last_block]]
@@ -89,7 +89,8 @@ class Scanner:
             "NETWORK", "DEVICES", "CLOCK", "SWITCH", "DTYPE", "AND",
             "NAND", "NOR", "OR", "XOR", "CONNECTIONS", "SIGNALS",
             "SETSIGNAL", "SETCLOCK", "MONITOR", "starttime", "period",
-            "firstchange", "SIGGEN", "pulse"
+            "firstchange", "SIGGEN", "pulse", "delay", "MODULES", "INPUTS",
+            "OUTPUTS", "width"
         ]
 
         # SIMPLE EBNF
@@ -103,7 +104,8 @@ class Scanner:
             self.XOR_ID, self.CONNECTIONS_ID, self.SIGNALS_ID,
             self.SETSIGNALS_ID, self.SETCLOCK_ID, self.MONITOR_ID,
             self.starttime_ID, self.period_ID, self.firstchange_ID,
-            self.SIGGEN_ID, self.pulse_ID
+            self.SIGGEN_ID, self.pulse_ID, self.delay_ID, self.MODULES_ID,
+            self.INPUTS_ID, self.OUTPUTS_ID, self.width_ID
             ] = self.names.lookup(self.keywords_list)
 
         # initialise current character to be first character
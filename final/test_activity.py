@@ -0,0 +1,67 @@
+"""Test the activity module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from activity import Activity
+
+
+@pytest.fixture
+def new_activity():
+    """Return an Activity class instance for two switches and an OR gate."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+
+    [SW1_ID, SW2_ID, OR1_ID, I1, I2] = new_names.lookup(["Sw1", "Sw2", "Or1",
+                                                        "I1", "I2"])
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW2_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(OR1_ID, new_devices.OR, 2)
+
+    new_network.make_connection(SW1_ID, None, OR1_ID, I1)
+    new_network.make_connection(SW2_ID, None, OR1_ID, I2)
+
+    return Activity(new_names, new_devices, new_network)
+
+
+def test_record_activity(new_activity):
+    """Test if toggles, edges and levels are counted correctly."""
+    names = new_activity.names
+    devices = new_activity.devices
+    network = new_activity.network
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+
+    # Sw1 is HIGH on cycles 2, 3 and 6
+    for cycle in range(8):
+        devices.set_switch(SW1_ID, int(cycle in [2, 3, 6]))
+        network.execute_network()
+        new_activity.record_activity()
+
+    assert new_activity.get_activity(SW1_ID, None) == {
+        "toggles": 4, "rises": 2, "falls": 2, "high": 3, "low": 5}
+    assert new_activity.get_activity(OR1_ID, None) == \
+        new_activity.get_activity(SW1_ID, None)
+    assert new_activity.get_activity(SW2_ID, None) == {
+        "toggles": 0, "rises": 0, "falls": 0, "high": 0, "low": 8}
+    assert new_activity.get_inactive_signals() == ["Sw2"]
+
+    new_activity.reset_activity()
+    assert new_activity.get_activity(SW1_ID, None)["toggles"] == 0
+
+
+def test_new_devices_are_counted(new_activity):
+    """Test if devices made after recording starts are counted."""
+    names = new_activity.names
+    devices = new_activity.devices
+    network = new_activity.network
+    [D_ID, QBAR_ID] = names.lookup(["D1", "QBAR"])
+
+    network.execute_network()
+    new_activity.record_activity()
+    devices.make_device(D_ID, devices.D_TYPE)
+    new_activity.record_activity()
+
+    assert new_activity.get_activity(D_ID, QBAR_ID)["toggles"] == 0
+    assert new_activity.cycles == 2
@@ -0,0 +1,147 @@
+"""Test the batch module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from batch import Netlist, Batch, run_simulation
+
+
+@pytest.fixture
+def new_netlist():
+    """Return a Netlist of two switches driving an XOR gate and a D-type."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    [SW1_ID, SW2_ID, SW3_ID, CL_ID, X1_ID, D1_ID, I1,
+     I2] = names.lookup(["Sw1", "Sw2", "Sw3", "Clock1", "X1", "D1", "I1",
+                         "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(SW2_ID, devices.SWITCH, 1)
+    devices.make_device(SW3_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+    devices.make_device(X1_ID, devices.XOR)
+    devices.make_device(D1_ID, devices.D_TYPE)
+    network.make_connection(SW1_ID, None, X1_ID, I1)
+    network.make_connection(SW2_ID, None, X1_ID, I2)
+    network.make_connection(X1_ID, None, D1_ID, devices.DATA_ID)
+    network.make_connection(CL_ID, None, D1_ID, devices.CLK_ID)
+    network.make_connection(SW3_ID, None, D1_ID, devices.SET_ID)
+
+    monitors.make_monitor(X1_ID, None)
+    monitors.make_monitor(D1_ID, devices.QBAR_ID)
+
+    return Netlist(names, devices, network, monitors, [SW1_ID, SW2_ID])
+
+
+def test_build(new_netlist):
+    """Test if a netlist is rebuilt into an equivalent circuit."""
+    [names, devices, network, monitors] = new_netlist.build()
+    [SW2_ID, X1_ID, D1_ID, I2] = names.lookup(["Sw2", "X1", "D1", "I2"])
+
+    assert devices.get_device(SW2_ID).switch_state == devices.HIGH
+    assert network.get_connected_output(X1_ID, I2) == (SW2_ID, None)
+    assert network.get_connected_output(D1_ID, devices.DATA_ID) == \
+        (X1_ID, None)
+    assert network.get_connected_output(D1_ID, devices.CLEAR_ID) is None
+    assert list(monitors.monitors_dictionary) == [(X1_ID, None),
+                                                  (D1_ID, devices.QBAR_ID)]
+    assert new_netlist.get_monitor_names() == ["X1", "D1.QBAR"]
+
+
+def test_build_timed():
+    """Test if a netlist keeps the timed mode and the delays of each kind."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, X1_ID, I1, I2] = names.lookup(["Sw1", "X1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(X1_ID, devices.XOR)
+    network.make_connection(SW1_ID, None, X1_ID, I1)
+    network.make_connection(SW1_ID, None, X1_ID, I2)
+    assert devices.set_kind_delay(devices.XOR, 3)
+    devices.default_delay = 2
+    network.set_timed(True)
+
+    [names, devices, network, monitors] = Netlist(
+        names, devices, network, monitors).build()
+    [X1_ID] = names.lookup(["X1"])
+    assert network.timed
+    assert devices.get_delay(X1_ID) == 3
+    assert devices.default_delay == 2
+
+
+def test_run_simulation(new_netlist):
+    """Test if a single run applies the switch settings."""
+    assert run_simulation({}, 3, new_netlist) is None  # CLEAR unconnected
+
+    new_netlist.connection_list.append(["D1", "CLEAR", "Sw3", None])
+    [xor_trace, _] = run_simulation({"Sw1": 1, "Sw2": 1}, 3, new_netlist)
+    assert list(xor_trace) == [0, 0, 0]
+
+
+def test_run_sweep(new_netlist):
+    """Test if a sweep returns every switch combination in order."""
+    new_netlist.connection_list.append(["D1", "CLEAR", "Sw3", None])
+    results = Batch(new_netlist, max_workers=2).run_sweep(4)
+
+    assert [switch_settings for switch_settings, _ in results] == [
+        {"Sw1": 0, "Sw2": 0}, {"Sw1": 0, "Sw2": 1},
+        {"Sw1": 1, "Sw2": 0}, {"Sw1": 1, "Sw2": 1}]
+    assert [list(traces[0]) for _, traces in results] == [
+        [0] * 4, [1] * 4, [1] * 4, [0] * 4]
+    # QBAR follows the inverse of the XOR output after the first clock edge
+    assert [traces[1][-1] for _, traces in results] == [1, 0, 0, 1]
+
+
+def test_bus_switch_settings():
+    """Test if a sweep tries every value of a bus switch."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    [SW1_ID, BUS1_ID] = names.lookup(["Sw1", "Bus1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(BUS1_ID, devices.SWITCH, 0, None, 2)
+    monitors.make_monitor(BUS1_ID, None)
+    batch = Batch(Netlist(names, devices, network, monitors), max_workers=2)
+
+    assert batch.get_switch_settings() == [
+        {"Sw1": level, "Bus1": value} for level in [0, 1]
+        for value in range(4)]
+    results = batch.run_sweep(2)
+    assert [traces[0][-1] for _, traces in results] == [0, 1, 2, 3] * 2
+
+
+def test_run_cold_starts(new_netlist):
+    """Test if seeded cold start-ups are reproducible and compared."""
+    new_netlist.connection_list.append(["D1", "CLEAR", "Sw3", None])
+    batch = Batch(new_netlist, max_workers=2)
+    results = batch.run_cold_starts(6, [1, 2, 3, 4, 1])
+
+    assert [seed for seed, _ in results] == [1, 2, 3, 4, 1]
+    assert results[0][1] == results[4][1]
+
+    # The XOR output only depends on the switches, but the D-type starts from
+    # a random memory and the clock from a random point in its cycle
+    assert batch.get_disagreements(results) == {"D1.QBAR": 2}
+
+
+def test_cold_start_dependent_d_type(new_netlist):
+    """Test if a D-type that is never clocked is reported as disagreeing."""
+    new_netlist.connection_list.append(["D1", "CLEAR", "Sw3", None])
+    # D2 has no clock edge, set or clear, so it keeps its random memory
+    new_netlist.device_list.append(["D2", "DTYPE", None, None, None])
+    for input_name in ["DATA", "CLK", "SET", "CLEAR"]:
+        new_netlist.connection_list.append(["D2", input_name, "Sw3", None])
+    new_netlist.monitor_list.append(["D2", "Q", 1])
+    batch = Batch(new_netlist, max_workers=2)
+    results = batch.run_cold_starts(6, [1, 2, 3, 4])
+
+    assert sorted(set(traces[2] for _, traces in results)) == [
+        bytes([0] * 6), bytes([1] * 6)]
+    assert batch.get_disagreements(results) == {"D1.QBAR": 2, "D2.Q": 2}
@@ -0,0 +1,31 @@
+"""Test the benchmark module."""
+import json
+
+from benchmark import Benchmark
+
+
+def test_run():
+    """Test if every phase is timed for every size."""
+    benchmark = Benchmark([20, 50], cycles=5, repeat=1)
+    results = benchmark.run()
+
+    assert list(results["times"]) == ["20", "50"]
+    for times in results["times"].values():
+        assert sorted(times) == sorted(benchmark.phases)
+        assert all(phase_time >= 0 for phase_time in times.values())
+    # The results can be stored as JSON
+    assert json.loads(json.dumps(results)) == results
+
+
+def test_compare():
+    """Test if only phases slower than the threshold are regressions."""
+    benchmark = Benchmark([100])
+    baseline = {"times": {"100": {"parse": 1.0, "simulate": 1.0},
+                          "1000": {"parse": 1.0}}}
+    results = {"times": {"100": {"parse": 1.1, "simulate": 1.5,
+                                 "scan": 9.0}}}
+
+    assert benchmark.compare(results, baseline, 0.2) == [
+        ["100", "simulate", 1.0, 1.5]]
+    assert benchmark.compare(results, baseline, 0.05) == [
+        ["100", "parse", 1.0, 1.1], ["100", "simulate", 1.0, 1.5]]
@@ -0,0 +1,115 @@
+"""Test the blif module."""
+import itertools
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from blif import Blif
+
+
+@pytest.fixture
+def new_blif():
+    """Return a new instance of the Blif class."""
+    names = Names()
+    devices = Devices(names, seed=0)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    return Blif(names, devices, network, monitors)
+
+
+def nand(first, second):
+    """Return the NAND of two signal levels."""
+    return 1 - (first & second)
+
+
+def test_import_c17(new_blif):
+    """Test if the ISCAS-85 c17 netlist gives its truth table."""
+    names = new_blif.names
+    devices = new_blif.devices
+    network = new_blif.network
+
+    assert new_blif.import_file("final_test_files/c17.blif")
+    assert network.check_network()
+    input_ids = names.lookup(["N1", "N2", "N3", "N6", "N7"])
+    assert new_blif.signal_switch_ids == input_ids
+    [N22, N23] = names.lookup(["N22", "N23"])
+    assert list(new_blif.monitors.monitors_dictionary) == [(N22, None),
+                                                           (N23, None)]
+
+    for levels in itertools.product([0, 1], repeat=5):
+        for switch_id, level in zip(input_ids, levels):
+            devices.set_switch(switch_id, level)
+        for _ in range(3):
+            assert network.execute_network()
+        [n1, n2, n3, n6, n7] = levels
+        n11 = nand(n3, n6)
+        n16 = nand(n2, n11)
+        assert network.get_output_signal(N22, None) == nand(nand(n1, n3),
+                                                            n16)
+        assert network.get_output_signal(N23, None) == \
+            nand(n16, nand(n11, n7))
+
+
+def test_import_latches(new_blif):
+    """Test if latches are imported as D-types on a shared clock."""
+    names = new_blif.names
+    devices = new_blif.devices
+    network = new_blif.network
+    monitors = new_blif.monitors
+
+    assert new_blif.import_file("final_test_files/counter.blif")
+    [EN, Q0, D1] = names.lookup(["en", "q0", "d1"])
+    assert Q0 in devices.find_devices(devices.D_TYPE)
+    assert devices.get_device(D1).device_kind == devices.XOR
+    assert len(devices.find_devices(devices.CLOCK)) == 1
+
+    devices.set_switch(EN, 1)
+    for _ in range(16):
+        assert network.execute_network()
+        monitors.record_signals()
+    # The clock has a period of 2 cycles, so q0 toggles every 2 cycles
+    q0_trace = monitors.monitors_dictionary[(Q0, devices.Q_ID)]
+    for cycle in range(2, 14):
+        assert q0_trace[cycle + 2] == 1 - q0_trace[cycle]
+
+
+def test_import_wide_function(new_blif):
+    """Test if functions wider than a gate are made from gate trees."""
+    names = new_blif.names
+    devices = new_blif.devices
+    network = new_blif.network
+    input_names = ["a" + str(index) for index in range(20)]
+    lines = [".model wide", ".inputs " + " ".join(input_names),
+             ".outputs y", ".names " + " ".join(input_names) + " y",
+             20 * "1" + " 0", ".end"]
+
+    assert new_blif.import_lines(lines)
+    input_ids = names.lookup(input_names)
+    [Y] = names.lookup(["y"])
+    assert devices.get_device(Y).device_kind == devices.NAND
+    for switch_id in input_ids:
+        devices.set_switch(switch_id, 1)
+    for _ in range(4):
+        assert network.execute_network()
+    assert network.get_output_signal(Y, None) == devices.LOW
+    devices.set_switch(input_ids[-1], 0)
+    for _ in range(4):
+        assert network.execute_network()
+    assert network.get_output_signal(Y, None) == devices.HIGH
+
+
+@pytest.mark.parametrize("lines, error", [
+    ([".names a y", "1 1"], "Line 1: net a is not driven"),
+    ([".inputs a", ".names a a", "1 1"], "Line 2: net a is driven more"),
+    ([".inputs a", ".subckt add x=a"], "Line 2: .subckt is not supported"),
+    ([".inputs a", ".names a y", "1 1", "0 0"], "Line 2: cover mixes"),
+    ([".inputs a b", ".names a b y", "1 1"], "Line 2: invalid cover row"),
+    ([".outputs y"], "Line 1: output y is not driven"),
+])
+def test_import_errors(new_blif, lines, error):
+    """Test if import_lines reports errors with their line numbers."""
+    assert not new_blif.import_lines(lines)
+    assert new_blif.errors[0].startswith(error)
@@ -0,0 +1,83 @@
+"""Test the breakpoints module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from breakpoints import Breakpoints
+
+
+@pytest.fixture
+def new_breakpoints():
+    """Return a Breakpoints instance for a switch, a clock and a bus switch."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+
+    [SW1_ID, CL_ID, BUS1_ID] = names.lookup(["Sw1", "Clock1", "Bus1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(CL_ID, devices.CLOCK, 2)
+    devices.make_device(BUS1_ID, devices.SWITCH, 0, None, 8)
+    return Breakpoints(names, devices, network)
+
+
+def test_make_breakpoint(new_breakpoints):
+    """Test if make_breakpoint checks the signal and value."""
+    breakpoints = new_breakpoints
+    devices = breakpoints.devices
+    [SW1_ID, BUS1_ID, I1] = devices.names.lookup(["Sw1", "Bus1", "I1"])
+
+    assert breakpoints.make_breakpoint(SW1_ID, None, 1) == \
+        breakpoints.NO_ERROR
+    assert breakpoints.make_breakpoint(BUS1_ID, None, 0xff) == \
+        breakpoints.NO_ERROR
+    assert breakpoints.make_breakpoint(BUS1_ID, None) == breakpoints.NO_ERROR
+    assert breakpoints.make_breakpoint(SW1_ID, None, 2) == \
+        breakpoints.INVALID_VALUE
+    assert breakpoints.make_breakpoint(SW1_ID, I1) == breakpoints.NOT_OUTPUT
+    assert breakpoints.make_breakpoint(I1, None) == \
+        breakpoints.network.DEVICE_ABSENT
+    assert breakpoints.get_breakpoint_names() == ["Sw1 = 1", "Bus1 = 255",
+                                                  "Bus1"]
+
+    breakpoints.remove_breakpoints()
+    assert breakpoints.get_breakpoint_names() == []
+
+
+def test_check(new_breakpoints):
+    """Test if breakpoints are only hit by changes to their value."""
+    breakpoints = new_breakpoints
+    devices = breakpoints.devices
+    network = breakpoints.network
+    [SW1_ID, CL_ID, BUS1_ID] = devices.names.lookup(["Sw1", "Clock1",
+                                                     "Bus1"])
+    breakpoints.make_breakpoint(SW1_ID, None, devices.HIGH)
+    breakpoints.make_breakpoint(BUS1_ID, None, 2)
+
+    devices.set_switch(SW1_ID, devices.HIGH)
+    network.execute_network()
+    breakpoints.start()  # a level reached before the run is not a hit
+    network.execute_network()
+    assert breakpoints.check() == []
+
+    devices.set_switch(SW1_ID, devices.LOW)
+    network.execute_network()
+    assert breakpoints.check() == []
+    devices.set_switch(SW1_ID, devices.HIGH)
+    devices.set_switch(BUS1_ID, 2)  # the same number as RISING
+    network.execute_network()
+    assert breakpoints.check() == [["Sw1", devices.HIGH], ["Bus1", 2]]
+    network.execute_network()
+    assert breakpoints.check() == []
+
+    # A breakpoint without a value is hit by every clock edge
+    breakpoints.remove_breakpoints()
+    breakpoints.make_breakpoint(CL_ID, None)
+    breakpoints.start()
+    hits = []
+    for cycle in range(8):
+        network.execute_network()
+        if breakpoints.check():
+            hits.append(cycle)
+    assert len(hits) == 4
+    assert [hits[1] - hits[0], hits[2] - hits[1]] == [2, 2]
@@ -0,0 +1,116 @@
+"""Test the checkpoint module."""
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from checkpoint import Checkpoint
+
+
+def build_network(gate_name="A1"):
+    """Return a network of a switch and a clock driving an AND gate."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    [SW1_ID, CL_ID, A1_ID, I1, I2] = names.lookup(["Sw1", "Clock1",
+                                                   gate_name, "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 1)
+    devices.make_device(CL_ID, devices.CLOCK, 2)
+    devices.make_device(A1_ID, devices.AND, 2)
+    network.make_connection(SW1_ID, None, A1_ID, I1)
+    network.make_connection(CL_ID, None, A1_ID, I2)
+    monitors.make_monitor(A1_ID, None)
+    monitors.make_monitor(CL_ID, None)
+    return [names, devices, network, monitors]
+
+
+def run(network, monitors, cycles):
+    """Run the network and record the monitors for the number of cycles."""
+    for _ in range(cycles):
+        assert network.execute_network()
+        monitors.record_signals()
+
+
+def test_resume(tmp_path):
+    """Test if a resumed simulation continues exactly as the original."""
+    path = str(tmp_path / "run.ck")
+    [names, devices, network, monitors] = build_network()
+    checkpoint = Checkpoint(path, names, devices, network, monitors)
+    checkpoint.start()
+
+    run(network, monitors, 5)
+    checkpoint.write(5)
+    size_after_first = (tmp_path / "run.ck").stat().st_size
+    run(network, monitors, 3)
+    checkpoint.write(8)
+    size_after_second = (tmp_path / "run.ck").stat().st_size
+    # Only the 3 new samples of each monitor are appended
+    assert size_after_second - size_after_first < size_after_first
+
+    [names, devices, resumed_network,
+     resumed_monitors] = build_network()
+    resumed = Checkpoint(path, names, devices, resumed_network,
+                         resumed_monitors)
+    assert resumed.load() == 8
+    assert list(resumed_monitors.monitors_dictionary.values()) == \
+        list(monitors.monitors_dictionary.values())
+
+    run(network, monitors, 6)
+    run(resumed_network, resumed_monitors, 6)
+    assert list(resumed_monitors.monitors_dictionary.values()) == \
+        list(monitors.monitors_dictionary.values())
+
+
+def test_load_errors(tmp_path):
+    """Test if unreadable checkpoints are rejected."""
+    [names, devices, network, monitors] = build_network()
+    missing = Checkpoint(str(tmp_path / "missing.ck"), names, devices,
+                         network, monitors)
+    assert missing.load() is None
+
+    path = tmp_path / "bad.ck"
+    path.write_bytes(b"not a checkpoint")
+    assert Checkpoint(str(path), names, devices, network,
+                      monitors).load() is None
+
+
+@pytest.mark.parametrize("cut", [1, 3, 8, 20])
+def test_load_truncated(tmp_path, cut):
+    """Test if a truncated last record falls back to the previous record."""
+    path = tmp_path / "run.ck"
+    [names, devices, network, monitors] = build_network()
+    checkpoint = Checkpoint(str(path), names, devices, network, monitors)
+    checkpoint.start()
+    run(network, monitors, 5)
+    checkpoint.write(5)
+    saved_traces = [list(signal_list) for signal_list
+                    in monitors.monitors_dictionary.values()]
+    run(network, monitors, 3)
+    checkpoint.write(8)
+    path.write_bytes(path.read_bytes()[:-cut])
+
+    [names, devices, resumed_network, resumed_monitors] = build_network()
+    resumed = Checkpoint(str(path), names, devices, resumed_network,
+                         resumed_monitors)
+    assert resumed.load() == 5
+    assert list(resumed_monitors.monitors_dictionary.values()) == \
+        saved_traces
+
+
+def test_load_unknown_monitor(tmp_path):
+    """Test if a checkpoint monitoring a missing device is rejected."""
+    path = str(tmp_path / "run.ck")
+    [names, devices, network, monitors] = build_network()
+    checkpoint = Checkpoint(path, names, devices, network, monitors)
+    checkpoint.start()
+    run(network, monitors, 2)
+    checkpoint.write(2)
+
+    # The monitors of the current session are kept
+    [names, devices, network, monitors] = build_network("B1")
+    monitored = list(monitors.monitors_dictionary)
+    assert Checkpoint(path, names, devices, network, monitors).load() is None
+    assert list(monitors.monitors_dictionary) == monitored
@@ -96,6 +96,14 @@ def test_make_device(new_devices):
     ("(D_ID, D_ID, None)", "new_devices.BAD_DEVICE"),
     ("(CL_ID, new_devices.CLOCK, 0)", "new_devices.INVALID_QUALIFIER"),
     ("(CL_ID, new_devices.CLOCK, 10)", "new_devices.NO_ERROR"),
+    ("(AND1_ID, new_devices.AND, 2, 0)", "new_devices.INVALID_DELAY"),
+    ("(SW1_ID, new_devices.SWITCH, 1, 2)", "new_devices.INVALID_DELAY"),
+    ("(AND1_ID, new_devices.AND, 2, 3)", "new_devices.NO_ERROR"),
+    ("(AND1_ID, new_devices.AND, 2, None, 33)", "new_devices.INVALID_WIDTH"),
+    ("(CL_ID, new_devices.CLOCK, 10, None, 8)", "new_devices.INVALID_WIDTH"),
+    ("(SW1_ID, new_devices.SWITCH, 256, None, 8)",
+     "new_devices.INVALID_QUALIFIER"),
+    ("(SW1_ID, new_devices.SWITCH, 255, None, 8)", "new_devices.NO_ERROR"),
 
     # Note: XOR device X2_ID will have been made earlier in the function
     ("(X2_ID, new_devices.XOR)", "new_devices.DEVICE_PRESENT"),
@@ -148,3 +156,41 @@ def test_set_switch(new_devices):
     # Set switch Sw1 to LOW
     new_devices.set_switch(SW1_ID, new_devices.LOW)
     assert switch_object.switch_state == new_devices.LOW
+
+
+def test_seeded_cold_startup():
+    """Test if cold start-up is reproducible from a seed."""
+    states = []
+    for _ in range(2):
+        names = Names()
+        devices = Devices(names, seed=7)
+        device_ids = names.lookup(["D" + str(i) for i in range(20)])
+        for device_id in device_ids:
+            devices.make_device(device_id, devices.D_TYPE)
+        devices.set_seed(3)
+        devices.cold_startup()
+        states.append([devices.get_device(device_id).dtype_memory
+                       for device_id in device_ids])
+    assert states[0] == states[1]
+
+
+def test_siggen_block(new_devices):
+    """Test if the siggen waveform keeps leading zeros and wraps around."""
+    [SG_ID] = new_devices.names.lookup(["Sg1"])
+    assert new_devices.make_device(SG_ID, new_devices.SIGGEN,
+                                   "0011") == new_devices.NO_ERROR
+    siggen_object = new_devices.get_device(SG_ID)
+    assert siggen_object.siggen_period == 4
+
+    # Counter n outputs the pulse character n-1, counter 0 the last one
+    siggen_object.siggen_counter = 0
+    assert new_devices.get_siggen_block(SG_ID, 10) == [0, 0, 1, 1, 1,
+                                                       0, 0, 1, 1, 1]
+    assert siggen_object.siggen_counter == 0
+
+
+def test_is_bin_num(new_devices):
+    """Test if is_bin_num only accepts strings of 0s and 1s."""
+    assert new_devices.is_bin_num("0101")
+    assert not new_devices.is_bin_num("0121")
+    assert not new_devices.is_bin_num("")
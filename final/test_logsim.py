@@ -0,0 +1,76 @@
+"""Test the logsim module."""
+import subprocess
+import sys
+
+import pytest
+
+from logsim import load_network, run_batch, main
+
+
+def test_import_without_gui():
+    """Test if the text modes are loaded without importing wx or OpenGL."""
+    code = ("import sys, logsim; "
+            "print(any(module.split('.')[0] in ['wx', 'OpenGL', 'gui'] "
+            "for module in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                            text=True, check=True).stdout
+    assert output.strip() == "False"
+
+
+def test_batch_imports():
+    """Test if batch mode does not import the modules of the other modes."""
+    code = ("import sys, logsim; "
+            "logsim.main(['-b', 'final_test_files/flipflop.txt']); "
+            "print(any(module in ['userint', 'batch', 'checkpoint', 'blif'] "
+            "for module in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True,
+                            text=True, check=True).stdout
+    assert output.splitlines()[-1] == "False"
+
+
+def test_usage_errors(capsys):
+    """Test if invalid arguments exit with status 1."""
+    for arg_list in [["--set", "sw", "-b", "final_test_files/flipflop.txt"],
+                     ["--cycles", "x", "-c", "final_test_files/flipflop.txt"],
+                     ["--warp", "final_test_files/flipflop.txt"],
+                     ["--timed", "--checkpoint", "run.ck"]]:
+        with pytest.raises(SystemExit) as exit_info:
+            main(arg_list)
+        assert exit_info.value.code == 1
+        assert capsys.readouterr().out.startswith("Error: ")
+
+
+def test_run_batch(capsys):
+    """Test if a batch run sets switches and displays the chosen monitors."""
+    loaded = load_network("final_test_files/flipflop.txt")
+    capsys.readouterr()
+    assert run_batch(loaded, 8, [["sw", 0]], ["sw", "n1", "dtype.QBAR"])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[:2] == ["sw        : ________", "n1        : --------"]
+    assert lines[2].startswith("dtype.QBAR: ")
+
+    assert not run_batch(loaded, 8, [["sw", 2]], [])
+    assert not run_batch(loaded, 8, [], ["dtype.I1"])
+
+
+def test_batch_option(tmpdir, capsys):
+    """Test if -b writes the results to a file and fails with status 1."""
+    path = str(tmpdir.join("results.txt"))
+    main(["--cycles", "4", "--set", "sw=0", "--monitor", "n1", "--output",
+          path, "-b", "final_test_files/flipflop.txt"])
+    with open(path) as results_file:
+        assert results_file.read() == "n1: ----\n"
+    assert capsys.readouterr().out == ""
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--set", "nope=1", "-b", "final_test_files/flipflop.txt"])
+    assert exit_info.value.code == 1
+
+    # A file that cannot be opened also fails, with the error on stderr
+    capsys.readouterr()
+    with pytest.raises(SystemExit) as exit_info:
+        main(["-b", str(tmpdir.join("nonexist.txt"))])
+    assert exit_info.value.code == 1
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "can't find or open file" in captured.err
@@ -0,0 +1,84 @@
+"""Test the module module."""
+import io
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from error import Error
+from module import Module
+
+
+@pytest.fixture
+def half_adder():
+    """Return a Module compiled from a half adder."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    [X1, A1, I1, I2, A, B, S, C] = names.lookup(["x1", "a1", "I1", "I2",
+                                                 "a", "b", "s", "c"])
+    devices.make_device(X1, devices.XOR)
+    devices.make_device(A1, devices.AND, 2)
+
+    module = Module(names, names.query("halfadder"))
+    module.compile(devices, {})
+    module.add_input(A, "x1", I1)
+    module.add_input(A, "a1", I1)
+    module.add_input(B, "x1", I2)
+    module.add_input(B, "a1", I2)
+    module.add_output(S, "x1", None)
+    module.add_output(C, "a1", None)
+    return module
+
+
+def test_instantiate(half_adder):
+    """Test if instantiate copies the template with hierarchical names."""
+    names = half_adder.names
+    devices = Devices(names)
+    network = Network(names, devices)
+
+    assert half_adder.instantiate(devices, network, "ha0")
+    assert half_adder.instantiate(devices, network, "ha1")
+    assert [names.get_name_string(device_id)
+            for device_id in devices.find_devices()] == [
+                "ha0.x1", "ha0.a1", "ha1.x1", "ha1.a1"]
+    # The copies are independent of the template and of each other
+    [HA0_X1, HA1_X1] = names.lookup(["ha0.x1", "ha1.x1"])
+    assert devices.get_device(HA0_X1) is not devices.get_device(HA1_X1)
+    assert devices.get_device(HA0_X1).inputs is not \
+        half_adder.prototypes[0].inputs
+
+    # Device names already in use
+    assert not half_adder.instantiate(devices, network, "ha0")
+
+
+def test_parse_modules():
+    """Test if a network of nested module instances is parsed and runs."""
+    Error.num_errors = 0
+    Error.types = []
+    Error.symbols = []
+    path = "final_test_files/modules.txt"
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    with open(path) as definition_file:
+        scanner = Scanner(path, io.StringIO(definition_file.read()), names)
+    parser = Parser(names, devices, network, monitors, scanner)
+
+    assert parser.parse_network()
+    assert network.check_network()
+    assert names.query("adder0.fa1.o1") in devices.find_devices(devices.OR)
+
+    # 3 + 1 = 4
+    assert network.execute_network()
+    [S0, S1, COUT] = names.lookup(["adder0.fa0.x2", "adder0.fa1.x2",
+                                   "adder0.fa1.o1"])
+    assert network.get_output_signal(S0, None) == devices.LOW
+    assert network.get_output_signal(S1, None) == devices.LOW
+    assert network.get_output_signal(COUT, None) == devices.HIGH
+    assert devices.get_signal_ids("adder0.fa1.o1") == [COUT, None]
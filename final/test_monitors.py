@@ -120,6 +120,92 @@ def test_record_signals(new_monitors):
         (OR1_ID, None): [LOW, HIGH, HIGH]}
 
 
+def test_record_signals_after_changes(new_monitors):
+    """Test if record_signals follows added, removed and reset monitors."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, SW2_ID, OR1_ID, CL_ID] = names.lookup(["Sw1", "Sw2", "Or1",
+                                                    "Clock1"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+    BLANK = devices.BLANK
+
+    network.execute_network()
+    new_monitors.record_signals()
+
+    new_monitors.remove_monitor(SW2_ID, None)
+    devices.make_device(CL_ID, devices.CLOCK, 2)
+    new_monitors.make_monitor(CL_ID, None, 1)
+    devices.set_switch(SW1_ID, HIGH)
+    network.execute_network()
+    new_monitors.record_signals()
+
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == [LOW, HIGH]
+    assert new_monitors.monitors_dictionary[(OR1_ID, None)] == [LOW, HIGH]
+    assert new_monitors.monitors_dictionary[(CL_ID, None)][0] == BLANK
+
+    new_monitors.reset_monitors()
+    new_monitors.record_signals()
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == [HIGH]
+
+
+def test_triggered_recording(new_monitors):
+    """Test if only cycles around a trigger are stored."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, SW2_ID, OR1_ID] = names.lookup(["Sw1", "Sw2", "Or1"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    new_monitors.make_trigger(OR1_ID, None, new_monitors.RISE)
+    new_monitors.set_trigger_window(2, 1)
+
+    # Or1 rises on cycle 5 and stays HIGH
+    for cycle in range(10):
+        if cycle == 5:
+            devices.set_switch(SW2_ID, HIGH)
+        network.execute_network()
+        new_monitors.record_signals()
+
+    assert new_monitors.monitors_dictionary == {
+        (SW1_ID, None): [LOW, LOW, LOW, LOW],
+        (SW2_ID, None): [LOW, LOW, HIGH, HIGH],
+        (OR1_ID, None): [LOW, LOW, HIGH, HIGH]}
+    assert new_monitors.get_windows() == [[3, 4]]
+
+
+def test_level_trigger_windows(capsys, new_monitors):
+    """Test if separate level triggers give separate windows."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID, I1] = names.lookup(["Sw1", "I1"])
+
+    assert new_monitors.make_trigger(SW1_ID, I1, new_monitors.LEVEL,
+                                     devices.HIGH) == new_monitors.NOT_OUTPUT
+    assert new_monitors.make_trigger(SW1_ID, None, new_monitors.LEVEL,
+                                     devices.HIGH) == new_monitors.NO_ERROR
+
+    for cycle in range(12):
+        devices.set_switch(SW1_ID, int(cycle in [2, 8, 9]))
+        network.execute_network()
+        new_monitors.record_signals()
+
+    assert new_monitors.get_windows() == [[2, 1], [8, 2]]
+    new_monitors.display_signals()
+    assert capsys.readouterr().out.splitlines() == [
+        "Sw1: -|--", "Sw2: _|__", "Or1: -|--"]
+    new_monitors.display_signals(start=1)
+    assert capsys.readouterr().out.splitlines()[0] == "Sw1: --"
+    new_monitors.reset_monitors()
+    assert new_monitors.get_windows() == []
+
+
 def test_get_margin(new_monitors):
     """Test if get_margin returns the length of the longest monitor name."""
     names = new_monitors.names
@@ -197,3 +283,89 @@ def test_display_signals(capsys, new_monitors):
             "Clock1: -__--__--__--__--__-" in traces)
 
     assert "" in traces  # additional empty line at the end
+
+
+def test_display_signals_options(capsys, new_monitors):
+    """Test if traces can be windowed, compressed and wrapped."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+
+    [SW1_ID] = names.lookup(["Sw1"])
+
+    for cycle in range(30):
+        devices.set_switch(SW1_ID, int(cycle >= 20))
+        network.execute_network()
+        new_monitors.record_signals()
+
+    new_monitors.display_signals(start=18, stop=22)
+    out, _ = capsys.readouterr()
+    assert out.split("\n")[0] == "Sw1: __--"
+
+    new_monitors.display_signals(compress=5)
+    out, _ = capsys.readouterr()
+    assert out.split("\n")[0] == "Sw1: _x20_-x10-"
+    assert out.split("\n")[1] == "Sw2: _x30_"
+
+    new_monitors.display_signals(wrap=25)
+    out, _ = capsys.readouterr()
+    assert out.split("\n") == ["Sw1: ____________________-----",
+                                "Sw2: _________________________",
+                                "Or1: ____________________-----",
+                                "",
+                                "Sw1: -----",
+                                "Sw2: _____",
+                                "Or1: -----",
+                                ""]
+
+
+def test_fork(new_monitors):
+    """Test if forked monitors record from the forked network."""
+    names = new_monitors.names
+    network = new_monitors.network
+
+    [SW1_ID] = names.lookup(["Sw1"])
+    network.execute_network()
+    new_monitors.record_signals()
+
+    forked_network = network.fork()
+    forked_monitors = new_monitors.fork(forked_network)
+    forked_network.devices.set_switch(SW1_ID, 1)
+    forked_network.execute_network()
+    forked_monitors.record_signals()
+
+    assert forked_monitors.monitors_dictionary[(SW1_ID, None)] == [0, 1]
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == [0]
+
+
+def test_extend_signals(new_monitors):
+    """Test if extend_signals repeats the current signal levels."""
+    names = new_monitors.names
+    network = new_monitors.network
+    [SW1_ID] = names.lookup(["Sw1"])
+
+    network.execute_network()
+    new_monitors.record_signals()
+    new_monitors.extend_signals(3)
+    assert new_monitors.monitors_dictionary[(SW1_ID, None)] == [0, 0, 0, 0]
+
+
+def test_bus_monitor_made_late(capsys, new_monitors):
+    """Test if a bus monitored after a run is blank for the earlier cycles."""
+    names = new_monitors.names
+    devices = new_monitors.devices
+    network = new_monitors.network
+    [BUS1_ID] = names.lookup(["Bus1"])
+    devices.make_device(BUS1_ID, devices.SWITCH, 4, None, 8)
+
+    for _ in range(2):
+        network.execute_network()
+        new_monitors.record_signals()
+    assert new_monitors.make_monitor(BUS1_ID, None, 2) == \
+        new_monitors.NO_ERROR
+    network.execute_network()
+    new_monitors.record_signals()
+
+    new_monitors.display_signals()
+    # Padding with BLANK would show the earlier cycles as the value 04
+    assert "Bus1:       04\n" in capsys.readouterr().out
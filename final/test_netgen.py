@@ -0,0 +1,83 @@
+"""Test the netgen module."""
+import io
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from error import Error
+from netgen import Netgen
+
+
+def parse_definition(text):
+    """Return [parsed, names, devices, network] for a definition text."""
+    Error.reset()
+    names = Names()
+    devices = Devices(names, seed=0)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    scanner = Scanner("generated", io.StringIO(text), names)
+    parser = Parser(names, devices, network, monitors, scanner)
+    return [parser.parse_network(), names, devices, network]
+
+
+@pytest.mark.parametrize("shape", [
+    "netgen.add_dag(200, 10, 3, 0.1)",
+    "netgen.add_ripple_adder(8)",
+    "netgen.add_shift_register(16)",
+    "netgen.add_clock_tree(3, 3)",
+    "netgen.add_testbench(100, 6, sequential=0.2)",
+    "netgen.add_latches(10)",
+])
+def test_shapes_parse_and_run(shape):
+    """Test if every shape gives a valid definition that simulates."""
+    netgen = Netgen(seed=1)
+    eval(shape)
+    [parsed, names, devices, network] = parse_definition(
+        netgen.get_definition())
+
+    assert parsed
+    assert Error.num_errors == 0
+    assert network.check_network()
+    for _ in range(20):
+        assert network.execute_network()
+
+
+def test_dag_size():
+    """Test if a DAG has the requested number of gates and D-types."""
+    netgen = Netgen(seed=2)
+    netgen.add_dag(500, 20, sequential=0.25)
+    [parsed, names, devices, network] = parse_definition(
+        netgen.get_definition())
+
+    assert parsed
+    gate_count = sum(len(devices.find_devices(gate_kind))
+                     for gate_kind in devices.gate_types)
+    d_type_count = len(devices.find_devices(devices.D_TYPE))
+    assert gate_count + d_type_count == 500
+    assert 75 < d_type_count < 175
+
+
+def test_ripple_adder_adds():
+    """Test if the ripple adder gives the sum of its operands."""
+    netgen = Netgen(seed=3)
+    netgen.add_ripple_adder(6)
+    [parsed, names, devices, network] = parse_definition(
+        netgen.get_definition())
+
+    assert parsed
+    for _ in range(20):
+        assert network.execute_network()
+
+    def get_word(role, bits):
+        return sum(network.get_output_signal(
+            names.query("".join(["add", role, str(bit)])), None) << bit
+            for bit in range(bits))
+
+    total = get_word("S", 6) + (network.get_output_signal(
+        names.query("addC5"), None) << 6)
+    assert total == get_word("A", 6) + get_word("B", 6)
@@ -4,6 +4,10 @@ import pytest
 from names import Names
 from devices import Devices
 from network import Network
+from monitors import Monitors
+from scanner import Scanner
+from parse import Parser
+from error import Error
 
 
 @pytest.fixture
@@ -31,6 +35,35 @@ def network_with_devices():
     return new_network
 
 
+@pytest.fixture
+def toggle_network():
+    """Return a Network of a toggle flip-flop and a D-type set by Sw1."""
+    new_names = Names()
+    new_devices = Devices(new_names)
+    new_network = Network(new_names, new_devices)
+
+    [D1_ID, D2_ID, CL_ID, ZERO_ID, SW1_ID] = new_names.lookup(
+        ["D1", "D2", "Clock1", "Zero", "Sw1"])
+    new_devices.make_device(D1_ID, new_devices.D_TYPE)
+    new_devices.make_device(D2_ID, new_devices.D_TYPE)
+    new_devices.make_device(CL_ID, new_devices.CLOCK, 1)
+    new_devices.make_device(ZERO_ID, new_devices.SWITCH, 0)
+    new_devices.make_device(SW1_ID, new_devices.SWITCH, 0)
+
+    # D1 toggles on every rising clock edge
+    new_network.make_connection(D1_ID, new_devices.QBAR_ID, D1_ID,
+                                new_devices.DATA_ID)
+    new_network.make_connection(ZERO_ID, None, D1_ID, new_devices.SET_ID)
+    new_network.make_connection(ZERO_ID, None, D2_ID, new_devices.DATA_ID)
+    new_network.make_connection(SW1_ID, None, D2_ID, new_devices.SET_ID)
+    for device_id in [D1_ID, D2_ID]:
+        new_network.make_connection(CL_ID, None, device_id,
+                                    new_devices.CLK_ID)
+        new_network.make_connection(ZERO_ID, None, device_id,
+                                    new_devices.CLEAR_ID)
+    return new_network
+
+
 def test_get_connected_output(network_with_devices):
     """Test if the output connected to a given input port is correct."""
     network = network_with_devices
@@ -348,3 +381,396 @@ def test_oscillating_network(new_network):
     network.make_connection(NOR1, None, NOR1, I1)
 
     assert not network.execute_network()
+
+
+def test_oscillating_loop_names(new_network):
+    """Test if execute_network reports the devices of an oscillating loop."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, OR1, NAND1, NAND2, NAND3, I1] = names.lookup(
+        ["Sw1", "Or1", "Nand1", "Nand2", "Nand3", "I1"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(OR1, devices.OR, 1)
+    for device_id in [NAND1, NAND2, NAND3]:
+        devices.make_device(device_id, devices.NAND, 1)
+
+    # Ring of three inverters, driving an OR gate outside the loop
+    network.make_connection(NAND1, None, NAND2, I1)
+    network.make_connection(NAND2, None, NAND3, I1)
+    network.make_connection(NAND3, None, NAND1, I1)
+    network.make_connection(NAND3, None, OR1, I1)
+
+    assert not network.execute_network()
+    assert network.oscillating_loop == ["Nand1", "Nand2", "Nand3"]
+
+
+def test_oscillating_d_type_loop(new_network):
+    """Test if execute_network reports a loop through a D-type."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, CL1, D1] = names.lookup(["Sw1", "Clock1", "D1"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(CL1, devices.CLOCK, 5)
+    devices.make_device(D1, devices.D_TYPE)
+    network.make_connection(SW1, None, D1, devices.DATA_ID)
+    network.make_connection(CL1, None, D1, devices.CLK_ID)
+
+    # Q clears the D-type and QBAR sets it again
+    network.make_connection(D1, devices.Q_ID, D1, devices.CLEAR_ID)
+    network.make_connection(D1, devices.QBAR_ID, D1, devices.SET_ID)
+
+    assert not network.execute_network()
+    assert network.oscillating_loop == ["D1"]
+
+
+def test_stable_d_type_loop(toggle_network):
+    """Test if a D-type loop that is stable while others settle is allowed."""
+    network = toggle_network
+    devices = network.devices
+    [SW1_ID, D1_ID] = devices.names.lookup(["Sw1", "D1"])
+
+    for _ in range(3):
+        assert network.execute_network()
+    devices.set_switch(SW1_ID, devices.HIGH)
+    for _ in range(3):
+        assert network.execute_network()
+        assert network.oscillating_loop == []
+
+
+def test_find_components(new_network):
+    """Test if find_components returns loops in topological order."""
+    network = new_network
+    fanout = {1: [2], 2: [3], 3: [2, 4], 4: [], 5: [1]}
+    assert network.find_components([1, 2, 3, 4, 5], fanout) == [
+        [5], [1], [2, 3], [4]]
+
+
+def test_deep_chain_settles(new_network):
+    """Test if a long chain of gates made in reverse order settles."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, I1] = names.lookup(["Sw1", "I1"])
+    gate_ids = names.lookup(["And" + str(i) for i in range(40)])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    for device_id in reversed(gate_ids):
+        devices.make_device(device_id, devices.AND, 1)
+    previous_id = SW1
+    for device_id in gate_ids:
+        network.make_connection(previous_id, None, device_id, I1)
+        previous_id = device_id
+
+    assert network.execute_network()
+    devices.set_switch(SW1, devices.HIGH)
+    assert network.execute_network()
+    assert network.get_output_signal(gate_ids[-1], None) == devices.HIGH
+    # The change crosses the whole chain in one pass, and the RISING
+    # signals reach HIGH in the next
+    assert network.iterations == 3
+
+
+def test_snapshot_and_fork(network_with_devices):
+    """Test if the simulation state can be saved, restored and forked."""
+    network = network_with_devices
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, OR1_ID, CL_ID, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "Or1", "Clock1", "I1", "I2"])
+    HIGH = devices.HIGH
+    LOW = devices.LOW
+
+    devices.make_device(CL_ID, devices.CLOCK, 3)
+    network.make_connection(SW1_ID, None, OR1_ID, I1)
+    network.make_connection(SW2_ID, None, OR1_ID, I2)
+    network.execute_network()
+    clock_trace = []
+    state = network.snapshot()
+
+    # Flip Sw1 in a fork; the original network is unaffected
+    forked_network = network.fork()
+    forked_network.devices.set_switch(SW1_ID, HIGH)
+    for _ in range(4):
+        forked_network.execute_network()
+        network.execute_network()
+        clock_trace.append(network.get_output_signal(CL_ID, None))
+    assert forked_network.get_output_signal(OR1_ID, None) == HIGH
+    assert network.get_output_signal(OR1_ID, None) == LOW
+    assert [forked_network.get_output_signal(CL_ID, None)] == \
+        clock_trace[-1:]
+
+    # Restoring the snapshot repeats the same clock trace
+    devices.set_switch(SW2_ID, HIGH)
+    network.execute_network()
+    assert network.restore(state)
+    assert devices.get_device(SW2_ID).switch_state == LOW
+    replayed_trace = []
+    for _ in range(4):
+        network.execute_network()
+        replayed_trace.append(network.get_output_signal(CL_ID, None))
+    assert replayed_trace == clock_trace
+
+    assert not network.restore(state[:-1])
+
+
+def test_snapshot_and_fork_d_types(toggle_network):
+    """Test if forks and snapshots of D-type loops run independently."""
+    network = toggle_network
+    devices = network.devices
+    [SW1_ID, D1_ID, D2_ID] = devices.names.lookup(["Sw1", "D1", "D2"])
+    Q_ID = devices.Q_ID
+
+    devices.set_switch(SW1_ID, devices.LOW)
+    for _ in range(3):
+        assert network.execute_network()
+    state = network.snapshot()
+
+    # Setting D2 in a fork leaves the original network unaffected
+    forked_network = network.fork()
+    forked_network.devices.set_switch(SW1_ID, devices.HIGH)
+    toggle_trace = []
+    for _ in range(6):
+        assert network.execute_network()
+        assert forked_network.execute_network()
+        toggle_trace.append(network.get_output_signal(D1_ID, Q_ID))
+        assert forked_network.get_output_signal(D1_ID, Q_ID) == \
+            toggle_trace[-1]
+    assert forked_network.get_output_signal(D2_ID, Q_ID) == devices.HIGH
+    assert network.get_output_signal(D2_ID, Q_ID) == devices.LOW
+    assert set(toggle_trace) == {devices.LOW, devices.HIGH}
+
+    # Restoring the snapshot repeats the same toggle trace
+    assert network.restore(state)
+    replayed_trace = []
+    for _ in range(6):
+        assert network.execute_network()
+        replayed_trace.append(network.get_output_signal(D1_ID, Q_ID))
+    assert replayed_trace == toggle_trace
+
+
+def test_fork_flipflop():
+    """Test if a fork of flipflop.txt runs like the original network."""
+    Error.reset()
+    names = Names()
+    devices = Devices(names, seed=0)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    path = "final_test_files/flipflop.txt"
+    with open(path) as definition_file:
+        scanner = Scanner(path, definition_file, names)
+        parser = Parser(names, devices, network, monitors, scanner)
+        assert parser.parse_network()
+    [DTYPE_ID] = names.lookup(["dtype"])
+
+    for _ in range(3):
+        assert network.execute_network()
+    forked_network = network.fork()
+    for _ in range(12):
+        assert network.execute_network()
+        assert forked_network.execute_network()
+        assert forked_network.get_output_signal(DTYPE_ID, devices.Q_ID) == \
+            network.get_output_signal(DTYPE_ID, devices.Q_ID)
+    # The fork watches its own devices for oscillation
+    assert forked_network.d_type_loop_devices
+    for device in forked_network.d_type_loop_devices:
+        assert device is forked_network.devices.get_device(device.device_id)
+
+
+def test_warp():
+    """Test if skipping quiet cycles gives the same traces."""
+    traces = []
+    for time_warp in [False, True]:
+        names = Names()
+        devices = Devices(names, seed=5)
+        network = Network(names, devices)
+        [CL_ID, SG_ID, D_ID, SW_ID, X_ID, I1, I2] = names.lookup(
+            ["Clock1", "Sig1", "D1", "Sw1", "X1", "I1", "I2"])
+        devices.make_device(CL_ID, devices.CLOCK, 17)
+        devices.make_device(SG_ID, devices.SIGGEN, "1100000000001")
+        devices.make_device(D_ID, devices.D_TYPE)
+        devices.make_device(SW_ID, devices.SWITCH, 0)
+        devices.make_device(X_ID, devices.XOR)
+        network.make_connection(CL_ID, None, D_ID, devices.CLK_ID)
+        network.make_connection(SG_ID, None, D_ID, devices.DATA_ID)
+        network.make_connection(SW_ID, None, D_ID, devices.SET_ID)
+        network.make_connection(SW_ID, None, D_ID, devices.CLEAR_ID)
+        network.make_connection(D_ID, devices.Q_ID, X_ID, I1)
+        network.make_connection(SG_ID, None, X_ID, I2)
+        devices.cold_startup()
+
+        trace = []
+        skipped_total = 0
+        while len(trace) < 200:
+            assert network.execute_network()
+            trace.append([network.get_output_signal(X_ID, None),
+                          network.get_output_signal(CL_ID, None)])
+            if time_warp:
+                skipped = network.warp(200 - len(trace))
+                trace.extend([trace[-1]] * skipped)
+                skipped_total += skipped
+        traces.append(trace)
+
+    assert traces[0] == traces[1]
+    assert skipped_total > 100
+
+
+def test_timed_hazard(new_network):
+    """Test if timed mode shows the glitch caused by a slow inverter."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, INV1, AND1, I1, I2] = names.lookup(["Sw1", "Inv1", "And1", "I1",
+                                              "I2"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(INV1, devices.NAND, 1, delay=3)
+    devices.make_device(AND1, devices.AND, 2)
+    network.make_connection(SW1, None, INV1, I1)
+    network.make_connection(SW1, None, AND1, I1)
+    network.make_connection(INV1, None, AND1, I2)
+
+    network.set_timed(True)
+    for _ in range(5):
+        assert network.execute_network()
+    assert network.get_output_signal(INV1, None) == devices.HIGH
+
+    devices.set_switch(SW1, devices.HIGH)
+    and_signals = []
+    for _ in range(6):
+        assert network.execute_network()
+        and_signals.append(network.get_output_signal(AND1, None))
+    # The AND gate is HIGH until the inverter catches up with the switch
+    assert and_signals == [devices.LOW, devices.HIGH, devices.HIGH,
+                           devices.HIGH, devices.LOW, devices.LOW]
+
+
+def test_timed_d_type_and_fork(new_network):
+    """Test if D-type delays are kept by a network forked in timed mode."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1, SW2, D1] = names.lookup(["Sw1", "Sw2", "D1"])
+    devices.make_device(SW1, devices.SWITCH, 0)
+    devices.make_device(SW2, devices.SWITCH, 0)
+    devices.make_device(D1, devices.D_TYPE)
+    devices.set_kind_delay(devices.D_TYPE, 10)
+    network.make_connection(SW1, None, D1, devices.SET_ID)
+    network.make_connection(SW2, None, D1, devices.CLEAR_ID)
+    network.make_connection(SW2, None, D1, devices.CLK_ID)
+    network.make_connection(SW2, None, D1, devices.DATA_ID)
+    devices.get_device(D1).dtype_memory = devices.LOW
+
+    network.set_timed(True)
+    assert network.execute_network()
+    devices.set_switch(SW1, devices.HIGH)
+    assert network.execute_network()
+    forked_network = network.fork()
+
+    for _ in range(10):
+        assert network.get_output_signal(D1, devices.Q_ID) != devices.HIGH
+        assert network.execute_network()
+        assert forked_network.execute_network()
+    assert network.get_output_signal(D1, devices.Q_ID) == devices.HIGH
+    assert forked_network.get_output_signal(D1, devices.Q_ID) == \
+        devices.HIGH
+    assert devices.get_device(D1) is not \
+        forked_network.devices.get_device(D1)
+
+
+def test_execute_bus(new_network):
+    """Test if bus gates and D-types evaluate whole words at once."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, SW2_ID, SW3_ID, NAND1_ID, D1_ID, CL_ID, I1, I2] = names.lookup(
+        ["Sw1", "Sw2", "Sw3", "Nand1", "D1", "Clock1", "I1", "I2"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0x5a, None, 8)
+    devices.make_device(SW2_ID, devices.SWITCH, 0x0f, None, 8)
+    devices.make_device(SW3_ID, devices.SWITCH, 0)
+    devices.make_device(NAND1_ID, devices.NAND, 2, None, 8)
+    devices.make_device(D1_ID, devices.D_TYPE, None, None, 8)
+    devices.make_device(CL_ID, devices.CLOCK, 1)
+
+    assert devices.get_port_width(D1_ID, devices.DATA_ID) == 8
+    assert devices.get_port_width(D1_ID, devices.CLK_ID) == 1
+    # A bus cannot be connected to a single-bit input, or the reverse
+    assert network.make_connection(SW1_ID, None, D1_ID, devices.CLK_ID) == \
+        network.WIDTH_MISMATCH
+    assert network.make_connection(NAND1_ID, I1, SW3_ID, None) == \
+        network.WIDTH_MISMATCH
+
+    for connection in [(SW1_ID, None, NAND1_ID, I1),
+                       (SW2_ID, None, NAND1_ID, I2),
+                       (NAND1_ID, None, D1_ID, devices.DATA_ID),
+                       (CL_ID, None, D1_ID, devices.CLK_ID),
+                       (SW3_ID, None, D1_ID, devices.SET_ID),
+                       (SW3_ID, None, D1_ID, devices.CLEAR_ID)]:
+        assert network.make_connection(*connection) == network.NO_ERROR
+
+    # The stored word follows the NAND output after the next rising edge
+    for _ in range(4):
+        assert network.execute_network()
+    assert network.get_output_signal(NAND1_ID, None) == 0xf5
+    assert network.get_output_signal(D1_ID, devices.Q_ID) == 0xf5
+    assert network.get_output_signal(D1_ID, devices.QBAR_ID) == 0x0a
+
+    # Timed mode evaluates the same words
+    devices.set_switch(SW2_ID, 0xff)
+    network.set_timed(True)
+    for _ in range(4):
+        assert network.execute_network()
+    assert network.get_output_signal(NAND1_ID, None) == 0xa5
+    assert network.get_output_signal(D1_ID, devices.Q_ID) == 0xa5
+
+
+def test_profiling(new_network):
+    """Test if profiling counts passes and evaluations, and can be removed."""
+    network = new_network
+    devices = network.devices
+    names = devices.names
+
+    [SW1_ID, NAND1_ID, NOR1_ID, I1] = names.lookup(
+        ["Sw1", "Nand1", "Nor1", "I1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(NAND1_ID, devices.NAND, 1)
+    network.make_connection(SW1_ID, None, NAND1_ID, I1)
+
+    assert network.get_profile() is None
+    network.set_profiling(True)
+    for _ in range(3):
+        assert network.execute_network()
+    profile = network.get_profile()
+    assert profile["cycles"] == 3
+    assert profile["iterations"] == sum(
+        passes * cycles for passes, cycles
+        in profile["iteration_counts"].items())
+    assert profile["oscillating_cycles"] == 0
+    # Switches are executed once in every pass
+    assert profile["kinds"]["SWITCH"]["evaluations"] == profile["iterations"]
+    assert profile["kinds"]["NAND"]["evaluations"] >= 3
+
+    # A fork is not profiled, and reset keeps profiling on
+    forked_network = network.fork()
+    assert forked_network.get_profile() is None
+    assert forked_network.execute_network()
+    assert network.get_profile()["cycles"] == 3
+    network.reset_profile()
+    assert network.execute_network()
+    assert network.get_profile()["cycles"] == 1
+
+    devices.make_device(NOR1_ID, devices.NOR, 1)
+    network.make_connection(NOR1_ID, None, NOR1_ID, I1)
+    assert not network.execute_network()
+    assert network.get_profile()["oscillating_cycles"] == 1
+
+    # Switching profiling off restores the methods of the class
+    network.set_profiling(False)
+    assert network.get_profile() is None
+    assert "execute_network" not in vars(network)
@@ -8,6 +8,7 @@ from scanner import Scanner
 from error import Error
 
 import pytest
+import io
 import sys
 import os
 
@@ -117,3 +118,28 @@ def test_error_detection(file, expected_errors):
         + " has error type " + str(Error.types[i]) + ", should be "+  str(error[0])
 
         assert Error.symbols[i].string == error[1]
+
+
+def test_parse_bus(capsys):
+    """Test if bus devices are parsed, checked and displayed in hex."""
+    Error.reset()
+    path = "final_test_files/bus.txt"
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+    with open(path) as definition_file:
+        scanner = Scanner(path, io.StringIO(definition_file.read()), names)
+    parser = Parser(names, devices, network, monitors, scanner)
+
+    assert parser.parse_network()
+    [X, N] = names.lookup(["x", "n"])
+    assert devices.get_port_width(X, None) == 32
+    assert devices.get_delay(N) == 2
+
+    assert network.execute_network()
+    monitors.record_signals()
+    monitors.display_signals()
+    output = capsys.readouterr().out
+    # 0xff00ff00 XOR 0x12345678
+    assert "x    : ed34a978\n" in output
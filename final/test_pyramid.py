@@ -0,0 +1,69 @@
+"""Test the pyramid module."""
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+from pyramid import Pyramid  # noqa: E402
+
+
+def get_expected_blocks(values, level):
+    """Return the lowest and highest heights of every block of a level."""
+    heights = [int(value == 1) for value in values]
+    size = 2 ** level
+    blocks = [heights[start:start + size]
+              for start in range(0, len(heights), size)]
+    return [[min(block) for block in blocks], [max(block) for block in blocks]]
+
+
+def test_update_in_steps():
+    """Test if a pyramid built in steps matches every block directly."""
+    generator = random.Random(0)
+    values = []
+    pyramid = Pyramid()
+    for step in [1, 1, 5, 64, 3, 1000, 200]:
+        values.extend(generator.choice([0, 1, 4]) for _ in range(step))
+        pyramid.update(values)
+        assert pyramid.cycles == len(values)
+        for level in range(len(pyramid.counts)):
+            [first_block, mins, maxs] = pyramid.get_blocks(0, len(values),
+                                                           level)
+            assert first_block == 0
+            assert [list(mins), list(maxs)] == get_expected_blocks(values,
+                                                                   level)
+    assert pyramid.counts[-1] == 1
+
+
+def test_single_cycle_pulse():
+    """Test if a pulse of one cycle is seen at every level."""
+    values = [0] * 100000
+    values[54321] = 1
+    pyramid = Pyramid()
+    pyramid.update(values)
+    for level in range(1, len(pyramid.counts)):
+        [first_block, mins, maxs] = pyramid.get_blocks(0, len(values), level)
+        assert list(np.nonzero(maxs)[0]) == [54321 >> level]
+        assert not mins.any()
+
+
+def test_get_blocks_and_level():
+    """Test if the visible range gives O(pixels) blocks of the right level."""
+    values = [cycle % 2 for cycle in range(4096)]
+    pyramid = Pyramid()
+    pyramid.update(values)
+
+    assert pyramid.get_level(0.5) == 0
+    assert pyramid.get_level(1) == 0
+    assert pyramid.get_level(7.9) == 2
+    assert pyramid.get_level(10 ** 9) == len(pyramid.counts) - 1
+
+    [first_block, mins, maxs] = pyramid.get_blocks(1000, 1900, 3)
+    assert first_block == 125
+    assert len(mins) == len(maxs) == 113  # cycles 1000 up to 1904
+    assert not mins.any() and maxs.all()
+
+    # A reset trace is summarised again from the start
+    pyramid.update([1, 1])
+    [first_block, mins, maxs] = pyramid.get_blocks(0, 2, 1)
+    assert list(mins) == [1] and list(maxs) == [1]
+    assert Pyramid().get_blocks(0, 10, 0)[0] == 0
@@ -0,0 +1,126 @@
+"""Test the userint module."""
+import io
+
+import pytest
+
+from names import Names
+from devices import Devices
+from network import Network
+from monitors import Monitors
+from userint import UserInterface
+
+
+@pytest.fixture
+def new_userint():
+    """Return a UserInterface for a switch driving an inverter."""
+    names = Names()
+    devices = Devices(names)
+    network = Network(names, devices)
+    monitors = Monitors(names, devices, network)
+
+    [SW1_ID, NAND1_ID, I1] = names.lookup(["Sw1", "Nand1", "I1"])
+    devices.make_device(SW1_ID, devices.SWITCH, 0)
+    devices.make_device(NAND1_ID, devices.NAND, 1)
+    network.make_connection(SW1_ID, None, NAND1_ID, I1)
+    monitors.make_monitor(NAND1_ID, None)
+
+    return UserInterface(names, devices, network, monitors)
+
+
+def test_script_interface(new_userint, capsys):
+    """Test if a script runs without prompts and its output is written."""
+    script = io.StringIO("# comment\n"
+                         "r 2\n"
+                         "\n"
+                         "s Sw1 1\n"
+                         "m Sw1\n"
+                         "c 2\n"
+                         "z Nand1\n"
+                         "r 3\n"
+                         "q\n"
+                         "r 10\n")
+    new_userint.script_interface(script)
+    assert capsys.readouterr().out == (
+        "#: r 2\n"
+        "Running for 2 cycles\n"
+        "Nand1: --\n"
+        "#: s Sw1 1\n"
+        "Successfully set switch.\n"
+        "#: m Sw1\n"
+        "Successfully made monitor.\n"
+        "#: c 2\n"
+        "Nand1: --__\n"
+        "Sw1  :   --\n"
+        "Continuing for 2 cycles. Total: 4\n"
+        "#: z Nand1\n"
+        "Successfully zapped monitor\n"
+        "#: r 3\n"
+        "Running for 3 cycles\n"
+        "Sw1: ---\n"
+        "#: q\n")
+    assert new_userint.cycles_completed == 3
+
+
+def test_script_errors(new_userint, capsys):
+    """Test if invalid commands in a script are reported and skipped."""
+    new_userint.script_interface(["x", "s Sw2 1", "c 1", "s Sw1 1"])
+    assert capsys.readouterr().out == (
+        "#: x\n"
+        "Invalid command. Enter 'h' for help.\n"
+        "#: s Sw2 1\n"
+        "Error! Unknown name.\n"
+        "#: c 1\n"
+        "Error! Nothing to continue. Run first.\n"
+        "#: s Sw1 1\n"
+        "Successfully set switch.\n")
+
+
+def test_breakpoint_command(new_userint, capsys):
+    """Test if runs stop at a breakpoint and continue from there."""
+    new_userint.script_interface(["b Nand1 0", "b Sw1 2", "r 5",
+                                  "s Sw1 1", "c 5", "k", "c 2"])
+    assert capsys.readouterr().out == (
+        "#: b Nand1 0\n"
+        "Successfully set breakpoint.\n"
+        "#: b Sw1 2\n"
+        "Number out of range.\n"
+        "#: r 5\n"
+        "Running for 5 cycles\n"
+        "Nand1: -----\n"
+        "#: s Sw1 1\n"
+        "Successfully set switch.\n"
+        "#: c 5\n"
+        "Breakpoint: Nand1 = 0 after cycle 6\n"
+        "Nand1: -----_\n"
+        "Continuing for 1 cycles. Total: 6\n"
+        "#: k\n"
+        "Removed all breakpoints.\n"
+        "#: c 2\n"
+        "Nand1: -----___\n"
+        "Continuing for 2 cycles. Total: 8\n")
+
+
+def test_activity_command(new_userint, capsys):
+    """Test if activity is only counted after the activity command."""
+    new_userint.script_interface(["r 2", "a", "a", "c 1", "s Sw1 1",
+                                  "c 2", "a"])
+    assert capsys.readouterr().out == (
+        "#: r 2\n"
+        "Running for 2 cycles\n"
+        "Nand1: --\n"
+        "#: a\n"
+        "Counting activity from the next cycle.\n"
+        "#: a\n"
+        "Error! No activity recorded. Run first.\n"
+        "#: c 1\n"
+        "Nand1: ---\n"
+        "Continuing for 1 cycles. Total: 3\n"
+        "#: s Sw1 1\n"
+        "Successfully set switch.\n"
+        "#: c 2\n"
+        "Nand1: ---__\n"
+        "Continuing for 2 cycles. Total: 5\n"
+        "#: a\n"
+        "Sw1  : toggles 1, rises 1, falls 0, high 2, low 1\n"
+        "Nand1: toggles 1, rises 0, falls 1, high 1, low 2\n"
+        "Cycles recorded: 3\n")
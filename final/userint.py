@@ -7,6 +7,12 @@ Classes:
 --------
 UserInterface - reads and parses user commands.
 """
+import contextlib
+import io
+import sys
+
+from activity import Activity
+from breakpoints import Breakpoints
 
 
 class UserInterface:
@@ -15,8 +21,8 @@ class UserInterface:
 
     This class allows the user to enter certain commands.
     These commands enable the user to run or continue the simulation for a
-    number of cycles, set switches, add or zap monitors, show help, or quit
-    the program.
+    number of cycles, set switches, add or zap monitors, set breakpoints,
+    show help, or quit the program.
 
     Parameters
     -----------
@@ -24,12 +30,19 @@ class UserInterface:
     devices: instance of the devices.Devices() class.
     network: instance of the network.Network() class.
     monitors: instance of the monitors.Monitors() class.
+    checkpoint: optional instance of the checkpoint.Checkpoint() class.
+    checkpoint_interval: number of cycles between checkpoints.
 
     Public methods:
     ---------------
     command_interface(self): Reads in the commands and calls the corresponding
                              functions.
 
+    script_interface(self, script): Executes the commands of a script without
+                                    prompts.
+
+    execute_command(self, command): Calls the function of a command.
+
     get_line(self): Prints a prompt for the user and updates the user entry.
 
     read_command(self): Returns the first non-whitespace character.
@@ -58,23 +71,45 @@ class UserInterface:
 
     zap_command(self): Removes the specified monitor.
 
+    breakpoint_command(self): Stops later runs when the specified signal
+                              changes, or changes to the specified value.
+
+    clear_breakpoints_command(self): Removes all breakpoints.
+
     run_network(self, cycles): Runs the network for the specified number of
-                               simulation cycles.
+                               simulation cycles, or until a breakpoint.
 
     run_command(self): Runs the simulation from scratch.
 
     continue_command(self): Continues a previously run simulation.
+
+    activity_command(self): Starts counting the activity of every output, or
+                            displays the activity counted.
+
+    display_command(self): Sets the run length above which displayed traces
+                           are shortened.
     """
 
-    def __init__(self, names, devices, network, monitors):
+    def __init__(self, names, devices, network, monitors, checkpoint=None,
+                 checkpoint_interval=1000):
         """Initialise variables."""
         self.names = names
         self.devices = devices
         self.monitors = monitors
         self.network = network
+        self.activity = Activity(names, devices, network)
+        # Activity is only counted once the activity command asks for it
+        self.counting_activity = False
+        self.breakpoints = Breakpoints(names, devices, network)
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
 
         self.cycles_completed = 0  # number of simulation cycles completed
 
+        # Runs of more than compress_length identical samples are shortened
+        # when traces are displayed. None displays every sample.
+        self.compress_length = None
+
         self.character = ""  # current character
         self.line = ""  # current string entered by the user
         self.cursor = 0  # cursor position
@@ -86,23 +121,61 @@ class UserInterface:
         self.get_line()  # get the user entry
         command = self.read_command()  # read the first character
         while command != "q":
-            if command == "h":
-                self.help_command()
-            elif command == "s":
-                self.switch_command()
-            elif command == "m":
-                self.monitor_command()
-            elif command == "z":
-                self.zap_command()
-            elif command == "r":
-                self.run_command()
-            elif command == "c":
-                self.continue_command()
-            else:
-                print("Invalid command. Enter 'h' for help.")
+            self.execute_command(command)
             self.get_line()  # get the user entry
             command = self.read_command()  # read the first character
 
+    def script_interface(self, script):
+        """Execute the commands of a script without prompts.
+
+        script is an iterable of command lines, such as an open file or
+        sys.stdin. Blank lines and lines starting with "#" are skipped, and
+        the script ends at its last line or at a "q" command. Every command
+        is echoed after a "#: " prompt, so the output reads like an
+        interactive session, and the output is written in one call at the
+        end. The network is built once, so repeated runs only reset the
+        signals and monitors.
+        """
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            for line in script:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                print("#: " + line)
+                self.line = line
+                self.cursor = 0
+                command = self.read_command()
+                if command == "q":
+                    break
+                self.execute_command(command)
+        sys.stdout.write(output.getvalue())
+
+    def execute_command(self, command):
+        """Call the function of the command character."""
+        if command == "h":
+            self.help_command()
+        elif command == "s":
+            self.switch_command()
+        elif command == "m":
+            self.monitor_command()
+        elif command == "z":
+            self.zap_command()
+        elif command == "r":
+            self.run_command()
+        elif command == "c":
+            self.continue_command()
+        elif command == "a":
+            self.activity_command()
+        elif command == "d":
+            self.display_command()
+        elif command == "b":
+            self.breakpoint_command()
+        elif command == "k":
+            self.clear_breakpoints_command()
+        else:
+            print("Invalid command. Enter 'h' for help.")
+
     def get_line(self):
         """Print prompt for the user and update the user entry."""
         self.cursor = 0
@@ -207,6 +280,12 @@ class UserInterface:
         print("s X N     - set switch X to N (0 or 1)")
         print("m X       - set a monitor on signal X")
         print("z X       - zap the monitor on signal X")
+        print("a         - count the activity of every output, or show it "
+              "if counted")
+        print("d N       - shorten runs of more than N samples in traces "
+              "(0 to show all)")
+        print("b X [N]   - stop runs when signal X changes (to N)")
+        print("k         - remove all breakpoints")
         print("h         - help (this command)")
         print("q         - quit the program")
 
@@ -214,7 +293,8 @@ class UserInterface:
         """Set the specified switch to the specified signal level."""
         switch_id = self.read_name()
         if switch_id is not None:
-            switch_state = self.read_number(0, 1)
+            width = self.devices.get_port_width(switch_id, None)
+            switch_state = self.read_number(0, (1 << width) - 1)
             if switch_state is not None:
                 if self.devices.set_switch(switch_id, switch_state):
                     print("Successfully set switch.")
@@ -243,19 +323,81 @@ class UserInterface:
             else:
                 print("Error! Could not zap monitor.")
 
+    def breakpoint_command(self):
+        """Stop later runs when the specified signal changes.
+
+        If a value follows the signal name, runs only stop when the signal
+        changes to that value.
+        """
+        signal = self.read_signal_name()
+        if signal is not None:
+            [device, port] = signal
+            self.skip_spaces()
+            value = None
+            if self.character:  # a value follows the signal name
+                self.cursor -= 1
+                width = self.devices.get_port_width(device, port)
+                value = self.read_number(0, (1 << width) - 1)
+                if value is None:
+                    return
+            if self.breakpoints.make_breakpoint(device, port, value) == \
+                    self.breakpoints.NO_ERROR:
+                print("Successfully set breakpoint.")
+            else:
+                print("Error! Could not set breakpoint.")
+
+    def clear_breakpoints_command(self):
+        """Remove all breakpoints."""
+        self.breakpoints.remove_breakpoints()
+        print("Removed all breakpoints.")
+
     def run_network(self, cycles):
         """Run the network for the specified number of simulation cycles.
 
-        Return True if successful.
+        The run stops early at the end of a cycle on which a breakpoint is
+        hit. Return the number of cycles run, or None if the network
+        oscillates.
         """
-        for _ in range(cycles):
+        self.breakpoints.start()
+        cycle = 0
+        while cycle < cycles:
             if self.network.execute_network():
                 self.monitors.record_signals()
+                if self.counting_activity:
+                    self.activity.record_activity()
             else:
                 print("Error! Network oscillating.")
-                return False
-        self.monitors.display_signals()
-        return True
+                if self.network.oscillating_loop:
+                    print("Oscillating loop: " +
+                          ", ".join(self.network.oscillating_loop))
+                return None
+            cycle += 1
+            hits = self.breakpoints.check()
+            if hits:
+                print("".join([
+                    "Breakpoint: ", ", ".join([" = ".join([name, str(signal)])
+                                               for name, signal in hits]),
+                    " after cycle ", str(self.cycles_completed + cycle)]))
+                break
+            skipped = 0
+            if self.network.time_warp:
+                # Skip the cycles in which nothing can change
+                skipped = self.network.warp(cycles - cycle)
+                if skipped:
+                    self.monitors.extend_signals(skipped)
+                    if self.counting_activity:
+                        self.activity.extend_activity(skipped)
+                    cycle += skipped
+            # Checkpoint whenever a multiple of the interval is passed
+            total = self.cycles_completed + cycle
+            if self.checkpoint is not None and \
+                    total // self.checkpoint_interval != \
+                    (total - 1 - skipped) // self.checkpoint_interval:
+                self.checkpoint.write(total)
+        if self.checkpoint is not None:
+            self.checkpoint.write(self.cycles_completed + cycle)
+        self.monitors.display_signals(compress=self.compress_length)
+        return cycle
 
     def run_command(self):
         """Run the simulation from scratch."""
@@ -264,10 +406,14 @@ class UserInterface:
 
         if cycles is not None:  # if the number of cycles provided is valid
             self.monitors.reset_monitors()
+            self.activity.reset_activity()
+            if self.checkpoint is not None:
+                self.checkpoint.start()
             print("".join(["Running for ", str(cycles), " cycles"]))
             self.devices.cold_startup()
-            if self.run_network(cycles):
-                self.cycles_completed += cycles
+            cycles_run = self.run_network(cycles)
+            if cycles_run is not None:
+                self.cycles_completed += cycles_run
 
     def continue_command(self):
         """Continue a previously run simulation."""
@@ -275,7 +421,37 @@ class UserInterface:
         if cycles is not None:  # if the number of cycles provided is valid
             if self.cycles_completed == 0:
                 print("Error! Nothing to continue. Run first.")
-            elif self.run_network(cycles):
-                self.cycles_completed += cycles
-                print(" ".join(["Continuing for", str(cycles), "cycles.",
-                                "Total:", str(self.cycles_completed)]))
+            else:
+                cycles_run = self.run_network(cycles)
+                if cycles_run is not None:
+                    self.cycles_completed += cycles_run
+                    print(" ".join(["Continuing for", str(cycles_run),
+                                    "cycles.", "Total:",
+                                    str(self.cycles_completed)]))
+
+    def activity_command(self):
+        """Count or display the toggle, edge and level counts of every output.
+
+        The first use starts counting from the next cycle, so that runs made
+        without it are not slowed down. Later uses display the counts.
+        """
+        if not self.counting_activity:
+            self.counting_activity = True
+            self.activity.reset_activity()
+            print("Counting activity from the next cycle.")
+        elif self.activity.cycles == 0:
+            print("Error! No activity recorded. Run first.")
+        else:
+            self.activity.display_activity()
+
+    def display_command(self):
+        """Set the run length above which displayed traces are shortened."""
+        compress_length = self.read_number(0, None)
+        if compress_length is not None:
+            if compress_length == 0:
+                self.compress_length = None
+                print("Showing every sample.")
+            else:
+                self.compress_length = compress_length
+                print(" ".join(["Shortening runs longer than",
+                                str(compress_length), "samples."]))